@@ -1,16 +1,24 @@
+import asyncio
+import time
+
 from minitap.mobile_use.agents.executor.utils import is_last_tool_message_take_screenshot
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.controllers.mobile_command_controller import get_screen_data
 from minitap.mobile_use.controllers.platform_specific_commands_controller import (
     get_device_date,
     get_focused_app_info,
+    get_foreground_app,
 )
 from minitap.mobile_use.graph.state import State
 from minitap.mobile_use.utils.decorators import wrap_with_callbacks
 from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.spatial_index import IndexedHierarchy
+from minitap.mobile_use.utils.ui_hierarchy import get_foreground_package
 from minitap.mobile_use.utils.conversations import is_tool_message
-from minitap.mobile_use.services.llm import get_llm
+from minitap.mobile_use.services.llm import get_llm, rate_limited, with_fallback
+from minitap.mobile_use.services.vision import optimize_images
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.language_models.chat_models import BaseChatModel
 
 logger = get_logger(__name__)
 
@@ -39,6 +47,55 @@ def should_capture_screenshot(messages: list) -> bool:
 class ContextorNode:
     def __init__(self, ctx: MobileUseContext):
         self.ctx = ctx
+        # Whether the hierarchy of the device carries the packages of its elements, in which
+        # case the focused app is read from it instead of from `dumpsys window`
+        self._hierarchy_has_packages: bool | None = None
+        self._gathered_at: float | None = None
+
+    async def _gather_device_context(self):
+        """Fetches the screen, the focused app and the date of the device concurrently."""
+        started_at = time.perf_counter()
+        previous_gathered_at, self._gathered_at = self._gathered_at, time.time()
+        if get_foreground_app(self.ctx) is not None:
+            # Tracked in the background: read once the screen is captured, from a probe that
+            # came back since, not to report the app before a transition along its screen
+            device_data, device_date = await asyncio.gather(
+                asyncio.to_thread(get_screen_data, self.ctx.screen_api_client),
+                asyncio.to_thread(get_device_date, self.ctx),
+            )
+            foreground_app = await asyncio.to_thread(
+                get_foreground_app, self.ctx, probed_after=self._gathered_at
+            )
+            if foreground_app is None:
+                # The probe restarted in the meantime
+                focused_app_info = await asyncio.to_thread(get_focused_app_info, self.ctx)
+            else:
+                focused_app_info = foreground_app.focused_app_info
+                if (
+                    previous_gathered_at is not None
+                    and foreground_app.changed_at > previous_gathered_at
+                ):
+                    focused_app_info += "\n(The foreground app changed since the previous step)"
+            logger.info(f"Device context gathered in {time.perf_counter() - started_at:.2f}s")
+            return device_data, focused_app_info, device_date
+
+        fetch_focused_app = not self._hierarchy_has_packages
+        device_data, device_date, focused_app_info = await asyncio.gather(
+            asyncio.to_thread(get_screen_data, self.ctx.screen_api_client),
+            asyncio.to_thread(get_device_date, self.ctx),
+            asyncio.to_thread(get_focused_app_info, self.ctx)
+            if fetch_focused_app
+            else asyncio.sleep(0),
+        )
+
+        foreground_package = get_foreground_package(device_data.elements)
+        self._hierarchy_has_packages = foreground_package is not None
+        if foreground_package is not None:
+            focused_app_info = f"Foreground app package: {foreground_package}"
+        elif not fetch_focused_app:
+            focused_app_info = await asyncio.to_thread(get_focused_app_info, self.ctx)
+        logger.info(f"Device context gathered in {time.perf_counter() - started_at:.2f}s")
+        return device_data, focused_app_info, device_date
 
     @wrap_with_callbacks(
         before=lambda: logger.info("Starting Contextor Agent"),
@@ -50,9 +107,10 @@ class ContextorNode:
         new_depth = state.execution_depth + 1
         logger.info(f"🔢 Contextor Agent (#{new_depth})")
         
-        device_data = get_screen_data(self.ctx.screen_api_client)
-        focused_app_info = get_focused_app_info(self.ctx)
-        device_date = get_device_date(self.ctx)
+        device_data, focused_app_info, device_date = await self._gather_device_context()
+        self.ctx.ui_index = IndexedHierarchy(
+            device_data.elements, width=device_data.width, height=device_data.height
+        )
 
         should_add_screenshot_context = should_capture_screenshot(
             list(state.executor_messages)
@@ -64,7 +122,14 @@ class ContextorNode:
             should_add_screenshot_context = True
             
             # Use vision model to analyze current screen state
-            llm = get_llm(ctx=self.ctx, name="contextor", temperature=0)
+            llm = get_llm(ctx=self.ctx, name="contextor", temperature=0, use_response_cache=True)
+            llm_fallback = get_llm(
+                ctx=self.ctx,
+                name="contextor",
+                use_fallback=True,
+                temperature=0,
+                use_response_cache=True,
+            )
             
             system_message = """You are a screen analyzer for mobile automation. Analyze the current screen and provide a brief, clear description of:
 
@@ -82,8 +147,18 @@ Keep your response concise and focused on what's visible that would help plan au
                 ])
             ]
             
+            async def analyze_screen(client: BaseChatModel):
+                client_messages = optimize_images(client, messages)
+                async with rate_limited(client, client_messages):
+                    return await client.ainvoke(client_messages)
+
             try:
-                screen_analysis = await llm.ainvoke(messages)
+                screen_analysis = await with_fallback(
+                    main_call=lambda: analyze_screen(llm),
+                    fallback_call=lambda: analyze_screen(llm_fallback),
+                    name="contextor",
+                    ctx=self.ctx,
+                )
                 logger.info(f"📸 Screen Analysis: {screen_analysis.content}")
             except Exception as e:
                 logger.error(f"Vision analysis failed: {e}")
@@ -94,10 +169,14 @@ Keep your response concise and focused on what's visible that would help plan au
         return state.sanitize_update(
             ctx=self.ctx,
             update={
-                "latest_screenshot_base64": device_data.base64
-                if should_add_screenshot_context
+                "latest_screenshot_base64": self.ctx.blob_store.put_text(device_data.base64)
+                if should_add_screenshot_context and device_data.base64
                 else None,
-                "latest_ui_hierarchy": device_data.elements,
+                "latest_ui_hierarchy": self.ctx.blob_store.put_json(device_data.elements),
+                "screen_fingerprint": device_data.get_fingerprint(
+                    # The screenshot is only worth decoding when it is sent to the agents
+                    with_perceptual_hash=should_add_screenshot_context
+                ),
                 "focused_app_info": focused_app_info,
                 "screen_size": (device_data.width, device_data.height),
                 "device_date": device_date,
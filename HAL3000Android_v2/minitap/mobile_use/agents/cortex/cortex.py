@@ -1,9 +1,9 @@
 import json
 from pathlib import Path
 
-from jinja2 import Template
 from langchain_core.messages import (
     AIMessage,
+    BaseMessage,
     HumanMessage,
     RemoveMessage,
     SystemMessage,
@@ -11,16 +11,31 @@ from langchain_core.messages import (
 )
 from langgraph.graph.message import REMOVE_ALL_MESSAGES
 
-from minitap.mobile_use.agents.cortex.types import CortexOutput
+from minitap.mobile_use.agents.cortex.streaming import (
+    PENDING_THOUGHT,
+    CortexStream,
+    has_decisions,
+    stream_cortex_output,
+)
+from minitap.mobile_use.agents.cortex.types import CortexOutput, PendingCortexOutput
 from minitap.mobile_use.agents.planner.utils import get_current_subgoal
-from minitap.mobile_use.constants import EXECUTOR_MESSAGES_KEY
+from minitap.mobile_use.constants import EXECUTOR_MESSAGES_KEY, UI_HIERARCHY_REPEATED_ROWS_KEPT
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.graph.state import State
-from minitap.mobile_use.services.llm import get_llm, with_fallback
-from minitap.mobile_use.tools.index import EXECUTOR_WRAPPERS_TOOLS, format_tools_list
+from minitap.mobile_use.services.llm import get_llm, rate_limited, with_fallback
+from minitap.mobile_use.services.vision import optimize_images
+from minitap.mobile_use.tools.index import (
+    EXECUTOR_WRAPPERS_TOOLS,
+    format_tools_arguments,
+    format_tools_list,
+)
 from minitap.mobile_use.utils.conversations import get_screenshot_message_for_llm
 from minitap.mobile_use.utils.decorators import wrap_with_callbacks
 from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.prompt_cache import add_cache_control
+from minitap.mobile_use.utils.prompts import get_prompt_registry, get_system_prompt_key
+from minitap.mobile_use.utils.thoughts_memory import get_agent_thoughts_memory
+from minitap.mobile_use.utils.ui_hierarchy import collapse_repeated_subtrees
 
 logger = get_logger(__name__)
 
@@ -39,117 +54,157 @@ class CortexNode:
         new_depth = state.execution_depth + 1
         logger.info(f"🔢 Cortex Agent (#{new_depth})")
         
-        executor_feedback = get_executor_agent_feedback(state)
-
-        system_message = Template(
-            Path(__file__).parent.joinpath("cortex.md").read_text(encoding="utf-8")
-        ).render(
-            platform=self.ctx.device.mobile_platform.value,
-            initial_goal=state.initial_goal,
-            subgoal_plan=state.subgoal_plan,
-            current_subgoal=get_current_subgoal(state.subgoal_plan),
-            executor_feedback=executor_feedback,
-            executor_tools_list=format_tools_list(ctx=self.ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS),
-        )
-        
-        # HAL3000Android: Enhance with knowledge base context
-        from minitap.mobile_use.utils.knowledge_base import enhance_agent_prompt
-        system_message = enhance_agent_prompt("cortex", system_message)
-        messages = [
-            SystemMessage(content=system_message),
-            HumanMessage(
-                content="Here are my device info:\n"
-                + self.ctx.device.to_str()
-                + f"Device date: {state.device_date}\n"
-                if state.device_date
-                else "" + f"Focused app info: {state.focused_app_info}\n"
-                if state.focused_app_info
-                else ""
+        # HAL3000Android: Rendered once, enhanced with knowledge base context
+        system_message = get_prompt_registry().render_system_prompt(
+            "cortex",
+            Path(__file__).parent.joinpath("cortex.md"),
+            key=get_system_prompt_key(self.ctx),
+            get_variables=lambda: dict(
+                platform=self.ctx.device.mobile_platform.value,
+                executor_tools_list=format_tools_list(
+                    ctx=self.ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS
+                ),
+                executor_tools_arguments=format_tools_arguments(
+                    ctx=self.ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS
+                ),
             ),
-        ]
-        for thought in state.agents_thoughts:
-            messages.append(AIMessage(content=thought))
-
-        if state.latest_screenshot_base64:
-            messages.append(get_screenshot_message_for_llm(state.latest_screenshot_base64))
-            logger.info("Added screenshot to context")
-
-        if state.latest_ui_hierarchy:
-            ui_hierarchy_dict: list[dict] = state.latest_ui_hierarchy
-            ui_hierarchy_str = json.dumps(ui_hierarchy_dict, indent=2, ensure_ascii=False)
-            messages.append(HumanMessage(content="Here is the UI hierarchy:\n" + ui_hierarchy_str))
+        )
+        messages, stable_prefix_length = get_cortex_messages(self.ctx, state, system_message)
 
         llm = get_llm(ctx=self.ctx, name="cortex", temperature=1)
         llm_fallback = get_llm(ctx=self.ctx, name="cortex", use_fallback=True, temperature=1)
-        
-        if hasattr(llm, "is_cerebras"):
-            # Cerebras
-            cerebras_msgs = []
-            for m in messages:
-                if hasattr(m, "content"):
-                    if m.__class__.__name__ == "SystemMessage":
-                        role = "system"
-                    elif m.__class__.__name__ == "AIMessage":
-                        role = "assistant"
-                    else:
-                        role = "user"
-                    content = m.content
-                    if role == "system" and "JSON" not in content:
-                        content += "\nRespond ONLY in valid JSON format."
-                    cerebras_msgs.append({"role": role, "content": content})
-                elif isinstance(m, str):
-                    cerebras_msgs.append({"role": "user", "content": m})
-                else:
-                    cerebras_msgs.append(m)
-            response_obj = llm.generate(cerebras_msgs, response_format={"type": "json_object"})
-            print(f"[DEBUG] Cerebras response type: {type(response_obj)}")
-            print(f"[DEBUG] Cerebras response dir: {dir(response_obj)}")
-            print(f"[DEBUG] Cerebras response: {response_obj}")
-            if hasattr(response_obj, 'choices'):
-                print(f"[DEBUG] Choices length: {len(response_obj.choices)}")
-                print(f"[DEBUG] Choice 0: {response_obj.choices[0]}")
-                print(f"[DEBUG] Choice 0 type: {type(response_obj.choices[0])}")
-                if hasattr(response_obj.choices[0], 'message'):
-                    print(f"[DEBUG] Message: {response_obj.choices[0].message}")
-                    print(f"[DEBUG] Message type: {type(response_obj.choices[0].message)}")
-                    if hasattr(response_obj.choices[0].message, 'content'):
-                        print(f"[DEBUG] Message content: {response_obj.content}")
-            response = CortexOutput.model_validate_json(response_obj.content)
-        else:
-            llm = llm.with_structured_output(CortexOutput)
-            llm_fallback = llm_fallback.with_structured_output(CortexOutput)
-            response: CortexOutput = await with_fallback(
-                main_call=lambda: llm.ainvoke(messages),
-                fallback_call=lambda: llm_fallback.ainvoke(messages),
-            )  # type: ignore
+        main_messages = add_cache_control(
+            llm, optimize_images(llm, messages), stable_prefix_length
+        )
+        fallback_messages = add_cache_control(
+            llm_fallback, optimize_images(llm_fallback, messages), stable_prefix_length
+        )
+
+        # The decisions are dispatched as soon as they are streamed, the Executor does not need
+        # to wait for the agent thought
+        structured_llm_fallback = llm_fallback.with_structured_output(CortexOutput)
+
+        async def invoke_fallback():
+            async with rate_limited(llm_fallback, fallback_messages):
+                return await structured_llm_fallback.ainvoke(fallback_messages)
+
+        result: CortexStream | CortexOutput = await with_fallback(
+            main_call=lambda: stream_cortex_output(llm, main_messages),
+            fallback_call=invoke_fallback,
+            name="cortex",
+            ctx=self.ctx,
+        )  # type: ignore
+        if isinstance(result, CortexStream):
+            logger.info("Cortex decisions dispatched before the end of the stream")
+            self.ctx.pending_cortex_output = PendingCortexOutput(
+                output=result.output, thought_index=len(state.agents_thoughts)
+            )
+            return self._get_state_update(
+                state,
+                agent_thought=PENDING_THOUGHT,
+                structured_decisions=result.decisions.result(),
+                complete_subgoals_by_ids=[],
+                new_depth=new_depth,
+            )
+        response = result
 
         is_subgoal_completed = (
             response.complete_subgoals_by_ids is not None
             and len(response.complete_subgoals_by_ids) > 0
-            and (len(response.decisions) == 0 or response.decisions in ["{}", "[]", "null", ""])
+            and not has_decisions(response.decisions)
         )
         if not is_subgoal_completed:
             response.complete_subgoals_by_ids = []
 
+        return self._get_state_update(
+            state,
+            agent_thought=response.agent_thought,
+            structured_decisions=response.decisions if not is_subgoal_completed else None,
+            complete_subgoals_by_ids=response.complete_subgoals_by_ids or [],
+            new_depth=new_depth,
+        )
+
+    def _get_state_update(
+        self,
+        state: State,
+        agent_thought: str,
+        structured_decisions: str | None,
+        complete_subgoals_by_ids: list[str],
+        new_depth: int,
+    ) -> dict:
+        is_thought_pending = self.ctx.pending_cortex_output is not None
         return state.sanitize_update(
             ctx=self.ctx,
             update={
-                "agents_thoughts": [response.agent_thought],
-                "structured_decisions": response.decisions if not is_subgoal_completed else None,
-                "complete_subgoals_by_ids": response.complete_subgoals_by_ids or [],
+                "agents_thoughts": [agent_thought],
+                "structured_decisions": structured_decisions,
+                "complete_subgoals_by_ids": complete_subgoals_by_ids,
+                "cortex_completed_subgoals": len(complete_subgoals_by_ids) > 0,
                 "latest_screenshot_base64": None,
                 "latest_ui_hierarchy": None,
                 "focused_app_info": None,
                 "device_date": None,
                 # Executor related fields
                 EXECUTOR_MESSAGES_KEY: [RemoveMessage(id=REMOVE_ALL_MESSAGES)],
-                "cortex_last_thought": response.agent_thought,
+                "cortex_last_thought": None if is_thought_pending else agent_thought,
                 "execution_depth": new_depth,
             },
             agent="cortex",
         )
 
 
+def get_cortex_messages(
+    ctx: MobileUseContext, state: State, system_message: str
+) -> tuple[list[BaseMessage], int]:
+    """
+    The messages of a Cortex call, and the length of their stable prefix: static instructions
+    first and volatile context last, so consecutive calls share a prefix the providers can cache.
+    """
+    current_subgoal = get_current_subgoal(state.subgoal_plan)
+    human_message = get_prompt_registry().render(
+        Path(__file__).parent.joinpath("human.md"),
+        initial_goal=state.initial_goal,
+        subgoal_plan=state.subgoal_plan,
+        current_subgoal=current_subgoal,
+        executor_feedback=get_executor_agent_feedback(state),
+    )
+    messages: list[BaseMessage] = [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Here are my device info:\n" + ctx.device.to_str()),
+    ]
+    # Thoughts are folded by blocks: the prefix they form carries over to the next calls, as
+    # long as the query does not change between folds
+    thoughts_memory = get_agent_thoughts_memory(
+        "cortex", state.agents_thoughts, query=state.initial_goal
+    )
+    for thought in thoughts_memory.to_list():
+        messages.append(AIMessage(content=thought))
+    stable_prefix_length = len(messages)
+
+    device_state = ""
+    if state.device_date:
+        device_state += f"Device date: {state.device_date}\n"
+    if state.focused_app_info:
+        device_state += f"Focused app info: {state.focused_app_info}\n"
+    if device_state:
+        messages.append(HumanMessage(content=device_state))
+    messages.append(HumanMessage(content=human_message))
+
+    screenshot_base64 = state.get_latest_screenshot_base64()
+    if screenshot_base64:
+        messages.append(get_screenshot_message_for_llm(screenshot_base64))
+        logger.info("Added screenshot to context")
+
+    ui_hierarchy = state.get_latest_ui_hierarchy()
+    if ui_hierarchy:
+        ui_hierarchy_dict: list[dict] = collapse_repeated_subtrees(
+            ui_hierarchy, keep_first=UI_HIERARCHY_REPEATED_ROWS_KEPT
+        )
+        ui_hierarchy_str = json.dumps(ui_hierarchy_dict, indent=2, ensure_ascii=False)
+        messages.append(HumanMessage(content="Here is the UI hierarchy:\n" + ui_hierarchy_str))
+    return messages, stable_prefix_length
+
+
 def get_executor_agent_feedback(state: State) -> str:
     if state.structured_decisions is None:
         return "None."
@@ -0,0 +1,143 @@
+"""
+Fast mode of the Cortex: a single tool-calling model sees the screen, thinks, and emits the
+tool calls itself, without the Executor LLM in between.
+
+The tool calls feed the same `ExecutorToolNode`, summarizer and orchestrator path as the two
+stage graph, and the decisions are kept as action specs for the feedback of the next turn.
+"""
+
+import json
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, RemoveMessage
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_vertexai.chat_models import ChatVertexAI
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from pydantic import BaseModel, Field
+
+from minitap.mobile_use.agents.cortex.cortex import get_cortex_messages
+from minitap.mobile_use.agents.executor.compiler import ACTION_SPEC_TOOL_KEY
+from minitap.mobile_use.constants import EXECUTOR_MESSAGES_KEY
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.graph.state import State
+from minitap.mobile_use.services.llm import get_llm, rate_limited, with_fallback
+from minitap.mobile_use.services.vision import optimize_images
+from minitap.mobile_use.tools.index import EXECUTOR_WRAPPERS_TOOLS, get_tools_from_wrappers
+from minitap.mobile_use.utils.decorators import wrap_with_callbacks
+from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.prompt_cache import add_cache_control
+from minitap.mobile_use.utils.prompts import get_prompt_registry, get_system_prompt_key
+
+logger = get_logger(__name__)
+
+
+class CompleteSubgoals(BaseModel):
+    """Marks subgoals as completed. Must be the only tool called in its turn."""
+
+    subgoal_ids: list[str] = Field(description="IDs of the subgoals that are achieved")
+    agent_thought: str = Field(description="Why the subgoals are achieved")
+
+
+def get_fast_cortex_thought(message: AIMessage) -> str:
+    """The thought written before the tool calls, or else the thoughts of the tool calls."""
+    thought = message.text().strip()
+    if thought:
+        return thought
+    tool_thoughts = [
+        str(tool_call["args"]["agent_thought"])
+        for tool_call in message.tool_calls
+        if tool_call["args"].get("agent_thought")
+    ]
+    return " ".join(tool_thoughts) or "No thought provided."
+
+
+def get_action_specs(message: AIMessage) -> str:
+    """The tool calls of the message, as the action specs the Cortex decisions are made of."""
+    return json.dumps(
+        [
+            {ACTION_SPEC_TOOL_KEY: tool_call["name"], **tool_call["args"]}
+            for tool_call in message.tool_calls
+        ],
+        ensure_ascii=False,
+    )
+
+
+class FastCortexNode:
+    def __init__(self, ctx: MobileUseContext):
+        self.ctx = ctx
+
+    @wrap_with_callbacks(
+        before=lambda: logger.info("Starting Fast Cortex Agent..."),
+        on_success=lambda _: logger.success("Fast Cortex Agent"),
+        on_failure=lambda _: logger.error("Fast Cortex Agent"),
+    )
+    async def __call__(self, state: State):
+        # HAL3000Android: Track execution depth
+        new_depth = state.execution_depth + 1
+        logger.info(f"🔢 Fast Cortex Agent (#{new_depth})")
+
+        # HAL3000Android: Rendered once, enhanced with knowledge base context
+        system_message = get_prompt_registry().render_system_prompt(
+            "cortex",
+            Path(__file__).parent.joinpath("fast_cortex.md"),
+            key=get_system_prompt_key(self.ctx),
+            get_variables=lambda: dict(
+                platform=self.ctx.device.mobile_platform.value,
+                complete_subgoals_tool=CompleteSubgoals.__name__,
+            ),
+        )
+        messages, stable_prefix_length = get_cortex_messages(self.ctx, state, system_message)
+
+        tools = [*get_tools_from_wrappers(self.ctx, EXECUTOR_WRAPPERS_TOOLS), CompleteSubgoals]
+        llm = get_llm(ctx=self.ctx, name="cortex", temperature=1)
+        llm_fallback = get_llm(ctx=self.ctx, name="cortex", use_fallback=True, temperature=1)
+
+        def get_call(client):
+            client_messages = add_cache_control(
+                client, optimize_images(client, messages), stable_prefix_length
+            )
+            llm_bind_tools_kwargs: dict = {"tools": tools}
+            # ChatGoogleGenerativeAI does not support the "parallel_tool_calls" keyword
+            if not isinstance(client, ChatGoogleGenerativeAI | ChatVertexAI):
+                llm_bind_tools_kwargs["parallel_tool_calls"] = True
+            tools_llm = client.bind_tools(**llm_bind_tools_kwargs)
+
+            async def call():
+                async with rate_limited(client, client_messages):
+                    return await tools_llm.ainvoke(client_messages)
+
+            return call
+
+        response: AIMessage = await with_fallback(
+            main_call=get_call(llm),
+            fallback_call=get_call(llm_fallback),
+            name="fast_cortex",
+            ctx=self.ctx,
+        )  # type: ignore
+
+        agent_thought = get_fast_cortex_thought(response)
+        complete_subgoals_by_ids = [
+            subgoal_id
+            for tool_call in response.tool_calls
+            if tool_call["name"] == CompleteSubgoals.__name__
+            for subgoal_id in tool_call["args"].get("subgoal_ids", [])
+        ]
+        update: dict = {
+            "agents_thoughts": [agent_thought],
+            "complete_subgoals_by_ids": complete_subgoals_by_ids,
+            "cortex_completed_subgoals": len(complete_subgoals_by_ids) > 0,
+            "structured_decisions": None,
+            "latest_screenshot_base64": None,
+            "latest_ui_hierarchy": None,
+            "focused_app_info": None,
+            "device_date": None,
+            EXECUTOR_MESSAGES_KEY: [RemoveMessage(id=REMOVE_ALL_MESSAGES)],
+            "cortex_last_thought": agent_thought,
+            "execution_depth": new_depth,
+        }
+        # Completing subgoals and acting are mutually exclusive, completing takes precedence
+        if not complete_subgoals_by_ids and response.tool_calls:
+            logger.info(f"Fast Cortex emitted {len(response.tool_calls)} tool calls")
+            update["structured_decisions"] = get_action_specs(response)
+            update[EXECUTOR_MESSAGES_KEY].append(response)
+        return state.sanitize_update(ctx=self.ctx, update=update, agent="cortex")
@@ -0,0 +1,147 @@
+"""
+Streaming of the Cortex output.
+
+The `decisions` field comes first in the output, and is usually complete well before the model
+has finished writing its `agent_thought`. Streaming the output lets the graph dispatch the
+decisions right away, while the rest of the stream finishes in the background.
+"""
+
+import asyncio
+import json
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+from minitap.mobile_use.agents.cortex.types import CortexOutput
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.graph.state import State
+from minitap.mobile_use.services.llm import rate_limited
+from minitap.mobile_use.utils.json_stream import IncrementalJsonObjectParser
+from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.recorder import record_interaction
+
+logger = get_logger(__name__)
+
+PENDING_THOUGHT = "(Decisions dispatched, thought still being written)"
+
+_EMPTY_DECISIONS = ("", "{}", "[]", "null")
+
+
+def has_decisions(decisions: str | None) -> bool:
+    return decisions is not None and decisions.strip() not in _EMPTY_DECISIONS
+
+
+def _is_dispatchable(decisions: str) -> bool:
+    if not has_decisions(decisions):
+        return False
+    try:
+        json.loads(decisions)
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+class CortexStream:
+    """
+    Streams a Cortex output through a forced tool call.
+    `decisions` resolves as soon as the decisions are complete and valid JSON, `output` once the
+    whole stream has been received.
+    """
+
+    def __init__(self, llm: BaseChatModel, messages: list[BaseMessage]):
+        self.decisions: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self.output: asyncio.Task[CortexOutput] = asyncio.create_task(self._run(llm, messages))
+
+    async def _run(self, llm: BaseChatModel, messages: list[BaseMessage]) -> CortexOutput:
+        tool_llm = llm.bind_tools([CortexOutput], tool_choice=CortexOutput.__name__)
+        parser = IncrementalJsonObjectParser()
+        message: AIMessageChunk | None = None
+        # The call holds its rate limit slots until the end of the stream
+        async with rate_limited(llm, messages):
+            async for chunk in tool_llm.astream(messages):
+                if not isinstance(chunk, AIMessageChunk):
+                    continue
+                message = chunk if message is None else message + chunk
+                for tool_call_chunk in chunk.tool_call_chunks:
+                    if tool_call_chunk.get("index") not in (None, 0) or not tool_call_chunk["args"]:
+                        continue
+                    for key, value in parser.feed(tool_call_chunk["args"]):
+                        if (
+                            key == "decisions"
+                            and isinstance(value, str)
+                            and _is_dispatchable(value)
+                        ):
+                            self.decisions.set_result(value)
+
+        # The aggregated tool call is the reference: the parser only serves the early dispatch
+        if message is None or not message.tool_calls:
+            raise ValueError("The Cortex stream did not contain any tool call")
+        return CortexOutput.model_validate(message.tool_calls[0]["args"])
+
+    async def wait_for_decisions(self) -> str | None:
+        """
+        Waits for the first of the decisions or the whole output.
+        Returns the decisions if they came before the end of the stream, None otherwise.
+        Raises if the stream failed before the decisions were received.
+        """
+        await asyncio.wait({self.decisions, self.output}, return_when=asyncio.FIRST_COMPLETED)
+        if self.output.done():
+            self.output.result()
+            return None
+        return self.decisions.result()
+
+
+async def stream_cortex_output(
+    llm: BaseChatModel, messages: list[BaseMessage]
+) -> CortexStream | CortexOutput:
+    """
+    Returns the stream as soon as its decisions can be dispatched, or the whole output if it
+    came first. Cancelling the call (e.g. when a hedged fallback wins) cancels the stream.
+    """
+    stream = CortexStream(llm, messages)
+    try:
+        decisions = await stream.wait_for_decisions()
+    except BaseException:
+        stream.output.cancel()
+        raise
+    return stream if decisions is not None else stream.output.result()
+
+
+async def resolve_pending_cortex_thought(ctx: MobileUseContext, state: State) -> dict:
+    """
+    Waits for the stream of an early dispatched Cortex output, and returns the state update
+    replacing its placeholder thought with the actual one.
+    """
+    pending = ctx.pending_cortex_output
+    if pending is None:
+        return {}
+    ctx.pending_cortex_output = None
+    try:
+        output: CortexOutput = await pending.output
+        thought = output.agent_thought
+    except Exception as e:
+        logger.warning(f"Cortex stream failed after its decisions were dispatched: {e}")
+        thought = "My decisions were dispatched, but the end of my reasoning was lost."
+
+    named_thought = f"[cortex] {thought}"
+    if ctx.execution_setup:
+        record_interaction(ctx, response=AIMessage(content=str([named_thought])))
+    agents_thoughts = list(state.agents_thoughts)
+    if pending.thought_index < len(agents_thoughts):
+        agents_thoughts[pending.thought_index] = named_thought
+    else:
+        agents_thoughts.append(named_thought)
+    return {"agents_thoughts": agents_thoughts, "cortex_last_thought": thought}
+
+
+async def cancel_pending_cortex_output(ctx: MobileUseContext):
+    """
+    Cancels the stream of an early dispatched Cortex output left unresolved, the task having
+    ended before the Summarizer, so that it releases its rate limit slots.
+    """
+    pending = ctx.pending_cortex_output
+    if pending is None:
+        return
+    ctx.pending_cortex_output = None
+    pending.output.cancel()
+    await asyncio.gather(pending.output, return_exceptions=True)
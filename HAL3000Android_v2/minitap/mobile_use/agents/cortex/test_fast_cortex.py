@@ -0,0 +1,104 @@
+import json
+
+from langchain_core.messages import AIMessage
+
+from minitap.mobile_use.agents.cortex.fast_cortex import (
+    CompleteSubgoals,
+    get_action_specs,
+    get_fast_cortex_thought,
+)
+from minitap.mobile_use.agents.executor.compiler import compile_decisions
+from minitap.mobile_use.config import LLM, LLMConfig, LLMConfigUtils, LLMWithFallback
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.graph.graph import get_fast_graph, post_fast_cortex_gate
+from minitap.mobile_use.graph.state import State
+from minitap.mobile_use.tools.index import EXECUTOR_WRAPPERS_TOOLS, get_tools_from_wrappers
+
+
+def _get_ctx() -> MobileUseContext:
+    llm = LLM(provider="openai", model="gpt-5-nano")
+    llm_with_fallback = LLMWithFallback(provider="openai", model="gpt-5-nano", fallback=llm)
+    return MobileUseContext.model_construct(
+        llm_config=LLMConfig(
+            planner=llm,
+            orchestrator=llm,
+            contextor=llm_with_fallback,
+            cortex=llm_with_fallback,
+            executor=llm,
+            utils=LLMConfigUtils(outputter=llm, hopper=llm),
+        )
+    )
+
+
+def _get_state(**update) -> State:
+    fields = dict(
+        messages=[],
+        initial_goal="Open the settings",
+        subgoal_plan=[],
+        latest_ui_hierarchy=None,
+        latest_screenshot_base64=None,
+        focused_app_info=None,
+        device_date=None,
+        structured_decisions=None,
+        complete_subgoals_by_ids=[],
+        agents_thoughts=[],
+        remaining_steps=10,
+        executor_messages=[],
+        cortex_last_thought=None,
+    )
+    return State(**{**fields, **update})
+
+
+TAP_MESSAGE = AIMessage(
+    content="",
+    tool_calls=[
+        {
+            "name": "tap",
+            "args": {"selector_request": {"text": "Settings"}, "agent_thought": "Open it"},
+            "id": "call_0",
+        },
+        {"name": "press_key", "args": {"key": "Back", "agent_thought": "Go back"}, "id": "call_1"},
+    ],
+)
+
+
+def test_thought_is_the_text_before_the_tool_calls():
+    message = TAP_MESSAGE.model_copy(update={"content": "The settings icon is visible."})
+
+    assert get_fast_cortex_thought(message) == "The settings icon is visible."
+
+
+def test_thought_falls_back_to_the_thoughts_of_the_tool_calls():
+    assert get_fast_cortex_thought(TAP_MESSAGE) == "Open it Go back"
+
+
+def test_action_specs_of_the_tool_calls_compile_back_to_them():
+    specs = get_action_specs(TAP_MESSAGE)
+
+    assert json.loads(specs)[0] == {
+        "tool": "tap",
+        "selector_request": {"text": "Settings"},
+        "agent_thought": "Open it",
+    }
+    tools = get_tools_from_wrappers(_get_ctx(), EXECUTOR_WRAPPERS_TOOLS)
+    compiled = compile_decisions(specs, tools)
+    assert compiled is not None
+    assert [tool_call["args"] for tool_call in compiled.tool_calls] == [
+        tool_call["args"] for tool_call in TAP_MESSAGE.tool_calls
+    ]
+
+
+def test_gate_routes_tool_calls_completions_and_empty_turns():
+    assert post_fast_cortex_gate(_get_state(executor_messages=[TAP_MESSAGE])) == "invoke_tools"
+    assert post_fast_cortex_gate(_get_state(complete_subgoals_by_ids=["1"])) == "end_subgoal"
+    assert post_fast_cortex_gate(_get_state(executor_messages=[AIMessage("...")])) == "skip"
+
+
+def test_fast_graph_has_no_executor_node():
+    graph = get_fast_graph(_get_ctx())
+
+    assert "fast_cortex" in graph.nodes
+    assert "executor_tools" in graph.nodes
+    assert "executor" not in graph.nodes
+    assert "cortex" not in graph.nodes
+    assert CompleteSubgoals.__name__ not in graph.nodes
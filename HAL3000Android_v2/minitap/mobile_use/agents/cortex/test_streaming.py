@@ -0,0 +1,142 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from minitap.mobile_use.agents.cortex.streaming import (
+    cancel_pending_cortex_output,
+    CortexStream,
+    resolve_pending_cortex_thought,
+    stream_cortex_output,
+)
+from minitap.mobile_use.agents.cortex.types import PendingCortexOutput
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.graph.state import State
+
+MESSAGES: list[BaseMessage] = [HumanMessage(content="Open the settings")]
+
+
+class StreamingToolCallModel(BaseChatModel):
+    """Streams the arguments of a tool call in small chunks."""
+
+    args: str
+    chunk_size: int = 8
+    gate: asyncio.Event | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-tool-call"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for start in range(0, len(self.args), self.chunk_size):
+            if self.gate is not None and start > len(self.args) // 2:
+                await self.gate.wait()
+            tool_call_chunk = {
+                "name": "CortexOutput" if start == 0 else None,
+                "args": self.args[start : start + self.chunk_size],
+                "id": "call_0" if start == 0 else None,
+                "index": 0,
+            }
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", tool_call_chunks=[tool_call_chunk])
+            )
+
+
+def _args(decisions: str) -> str:
+    return json.dumps(
+        {
+            "decisions": decisions,
+            "agent_thought": "Tapping on the settings icon. " * 10,
+            "complete_subgoals_by_ids": [],
+        }
+    )
+
+
+def test_decisions_are_available_before_the_end_of_the_stream():
+    async def run():
+        gate = asyncio.Event()
+        llm = StreamingToolCallModel(args=_args('{"action": "tap"}'), gate=gate)
+        stream = CortexStream(llm, MESSAGES)
+
+        decisions = await stream.wait_for_decisions()
+        assert decisions == '{"action": "tap"}'
+        assert not stream.output.done()
+
+        gate.set()
+        output = await stream.output
+        assert output.agent_thought.startswith("Tapping on the settings icon.")
+
+    asyncio.run(run())
+
+
+def test_empty_decisions_wait_for_the_whole_output():
+    async def run():
+        stream = CortexStream(StreamingToolCallModel(args=_args("{}")), MESSAGES)
+
+        assert await stream.wait_for_decisions() is None
+        assert stream.output.result().decisions == "{}"
+
+    asyncio.run(run())
+
+
+def test_pending_thought_replaces_its_placeholder():
+    async def run():
+        ctx = MobileUseContext.model_construct(execution_setup=None)
+        state = State.model_construct(agents_thoughts=["[planner] Plan", "[cortex] ..."])
+        stream = CortexStream(StreamingToolCallModel(args=_args('{"action": "tap"}')), MESSAGES)
+        ctx.pending_cortex_output = PendingCortexOutput(output=stream.output, thought_index=1)
+
+        update = await resolve_pending_cortex_thought(ctx, state)
+
+        assert update["agents_thoughts"][0] == "[planner] Plan"
+        assert update["agents_thoughts"][1].startswith("[cortex] Tapping on the settings icon.")
+        assert update["cortex_last_thought"].startswith("Tapping")
+        assert ctx.pending_cortex_output is None
+
+    asyncio.run(run())
+
+
+def test_pending_output_of_an_ended_task_is_cancelled():
+    async def run():
+        ctx = MobileUseContext.model_construct(execution_setup=None)
+        gate = asyncio.Event()
+        stream = CortexStream(
+            StreamingToolCallModel(args=_args('{"action": "tap"}'), gate=gate), MESSAGES
+        )
+        await stream.wait_for_decisions()
+        ctx.pending_cortex_output = PendingCortexOutput(output=stream.output, thought_index=1)
+
+        await cancel_pending_cortex_output(ctx)
+
+        assert stream.output.cancelled()
+        assert ctx.pending_cortex_output is None
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
+
+
+def test_cancelling_the_call_cancels_the_stream():
+    async def run():
+        gate = asyncio.Event()
+        llm = StreamingToolCallModel(args=_args("{}"), gate=gate)
+        call = asyncio.ensure_future(stream_cortex_output(llm, MESSAGES))
+        await asyncio.sleep(0.01)
+
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        # The stream task is not left running in the background
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+import asyncio
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class CortexOutput(BaseModel):
@@ -7,3 +9,12 @@ class CortexOutput(BaseModel):
     complete_subgoals_by_ids: list[str] | None = Field(
         [], description="List of subgoal IDs to complete"
     )
+
+
+class PendingCortexOutput(BaseModel):
+    """Output of a Cortex call whose decisions were dispatched before the end of its stream."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    output: asyncio.Task
+    thought_index: int = Field(description="Index of the placeholder thought in agents_thoughts")
@@ -0,0 +1,90 @@
+"""
+Compilation of the Cortex decisions into Executor tool calls.
+
+When the Cortex writes its decisions as action specs (`{"tool": <name>, ...<arguments>}`) whose
+arguments match the tool exactly, turning them into tool calls is deterministic: the Executor
+LLM is bypassed, and only runs for ambiguous or free-form decisions.
+"""
+
+import json
+import uuid
+
+from langchain_core.messages import AIMessage, ToolCall
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, ValidationError
+
+ACTION_SPEC_TOOL_KEY = "tool"
+
+
+class DecisionCompilerStats:
+    """How often the Executor LLM was bypassed, and the latency of its calls when it was not."""
+
+    def __init__(self):
+        self.compiled = 0
+        self.interpreted = 0
+        self.llm_seconds = 0.0
+
+    def record_llm_call(self, seconds: float):
+        self.interpreted += 1
+        self.llm_seconds += seconds
+
+    def get_bypass_rate(self) -> float:
+        total = self.compiled + self.interpreted
+        return self.compiled / total if total else 0
+
+    def get_saved_seconds_per_step(self) -> float:
+        """Mean latency of the Executor LLM calls, saved by each compiled step."""
+        return self.llm_seconds / self.interpreted if self.interpreted else 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.compiled}/{self.compiled + self.interpreted} decisions compiled "
+            f"({self.get_bypass_rate():.0%}), ~{self.get_saved_seconds_per_step():.2f}s saved per "
+            f"compiled step, ~{self.compiled * self.get_saved_seconds_per_step():.1f}s in total"
+        )
+
+
+def _get_action_specs(decisions: str) -> list[dict] | None:
+    """The action specs of the decisions: a list of them, a single one, or an `actions` list."""
+    try:
+        parsed = json.loads(decisions)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(parsed, dict):
+        parsed = parsed["actions"] if "actions" in parsed else [parsed]
+    if not isinstance(parsed, list) or not parsed:
+        return None
+    for spec in parsed:
+        if not isinstance(spec, dict) or not isinstance(spec.get(ACTION_SPEC_TOOL_KEY), str):
+            return None
+    return parsed
+
+
+def compile_decisions(decisions: str, tools: list[BaseTool]) -> AIMessage | None:
+    """
+    The tool calls of the decisions, in their order, or None when any of them is not an action
+    spec of one of the tools with valid arguments: the whole decisions then go to the Executor.
+    """
+    specs = _get_action_specs(decisions)
+    if specs is None:
+        return None
+    tools_by_name = {tool.name: tool for tool in tools}
+    tool_calls: list[ToolCall] = []
+    for spec in specs:
+        args = {key: value for key, value in spec.items() if key != ACTION_SPEC_TOOL_KEY}
+        tool = tools_by_name.get(spec[ACTION_SPEC_TOOL_KEY])
+        if tool is None:
+            return None
+        args.setdefault(
+            "agent_thought",
+            f"Executing the {tool.name} action decided by the Cortex: {json.dumps(args)}",
+        )
+        schema = tool.tool_call_schema
+        if not isinstance(schema, type) or not issubclass(schema, BaseModel):
+            return None
+        try:
+            schema.model_validate(args)
+        except ValidationError:
+            return None
+        tool_calls.append(ToolCall(name=tool.name, args=args, id=f"call_{uuid.uuid4().hex}"))
+    return AIMessage(content="", tool_calls=tool_calls)
@@ -0,0 +1,78 @@
+import json
+
+from minitap.mobile_use.agents.executor.compiler import DecisionCompilerStats, compile_decisions
+from minitap.mobile_use.config import LLM, LLMConfig, LLMConfigUtils, LLMWithFallback
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.tools.index import EXECUTOR_WRAPPERS_TOOLS, get_tools_from_wrappers
+
+
+def _get_tools():
+    llm = LLM(provider="openai", model="gpt-5-nano")
+    llm_with_fallback = LLMWithFallback(provider="openai", model="gpt-5-nano", fallback=llm)
+    ctx = MobileUseContext.model_construct(
+        llm_config=LLMConfig(
+            planner=llm,
+            orchestrator=llm,
+            contextor=llm_with_fallback,
+            cortex=llm_with_fallback,
+            executor=llm,
+            utils=LLMConfigUtils(outputter=llm, hopper=llm),
+        )
+    )
+    return get_tools_from_wrappers(ctx, EXECUTOR_WRAPPERS_TOOLS)
+
+
+TOOLS = _get_tools()
+
+
+def test_action_specs_compile_to_tool_calls_in_order():
+    decisions = json.dumps(
+        [
+            {"tool": "tap", "selector_request": {"text": "Settings"}},
+            {"tool": "swipe", "swipe_request": {"swipe_mode": "up"}, "agent_thought": "Scroll"},
+            {"tool": "press_key", "key": "Back"},
+        ]
+    )
+
+    message = compile_decisions(decisions, TOOLS)
+
+    assert message is not None
+    assert [tool_call["name"] for tool_call in message.tool_calls] == ["tap", "swipe", "press_key"]
+    assert message.tool_calls[0]["args"]["selector_request"] == {"text": "Settings"}
+    assert message.tool_calls[0]["args"]["agent_thought"].startswith("Executing the tap action")
+    assert message.tool_calls[1]["args"]["agent_thought"] == "Scroll"
+    assert len({tool_call["id"] for tool_call in message.tool_calls}) == 3
+
+
+def test_single_specs_and_action_lists_compile():
+    single = json.dumps({"tool": "launch_app", "package_name": "com.android.settings"})
+    wrapped = json.dumps({"actions": [{"tool": "back"}]})
+
+    assert compile_decisions(single, TOOLS) is not None
+    assert compile_decisions(wrapped, TOOLS) is not None
+
+
+def test_free_form_or_invalid_decisions_go_to_the_executor():
+    free_form = json.dumps({"action": "tap", "target": {"text": "Settings"}})
+    unknown_tool = json.dumps([{"tool": "shake_device"}])
+    missing_argument = json.dumps([{"tool": "tap"}])
+    partially_valid = json.dumps([{"tool": "back"}, {"tool": "tap", "selector": "Settings"}])
+
+    assert compile_decisions(free_form, TOOLS) is None
+    assert compile_decisions("Tap on Settings", TOOLS) is None
+    assert compile_decisions("[]", TOOLS) is None
+    assert compile_decisions(unknown_tool, TOOLS) is None
+    assert compile_decisions(missing_argument, TOOLS) is None
+    assert compile_decisions(partially_valid, TOOLS) is None
+
+
+def test_stats_report_the_bypass_rate_and_the_saved_latency():
+    stats = DecisionCompilerStats()
+    stats.compiled = 3
+    stats.record_llm_call(2.0)
+
+    assert stats.get_bypass_rate() == 0.75
+    assert stats.get_saved_seconds_per_step() == 2.0
+    assert (
+        str(stats) == "3/4 decisions compiled (75%), ~2.00s saved per compiled step, ~6.0s in total"
+    )
@@ -10,3 +10,12 @@ def is_last_tool_message_take_screenshot(messages: list[BaseMessage]) -> bool:
         if is_tool_message(msg):
             return msg.name == "glimpse_screen"
     return False
+
+
+def is_last_tool_message_failed(messages: list[BaseMessage]) -> bool:
+    if not messages:
+        return False
+    for msg in messages[::-1]:
+        if is_tool_message(msg):
+            return getattr(msg, "status", None) == "error"
+    return False
@@ -1,9 +1,11 @@
 from pathlib import Path
 
-from jinja2 import Template
 from langchain_core.messages import HumanMessage, SystemMessage
 from minitap.mobile_use.context import MobileUseContext
-from minitap.mobile_use.services.llm import get_llm
+from minitap.mobile_use.services.llm import get_llm, rate_limited
+from minitap.mobile_use.utils.llm_usage import get_agent_run_config
+from minitap.mobile_use.utils.prompt_cache import add_cache_control
+from minitap.mobile_use.utils.prompts import get_prompt_registry
 from pydantic import BaseModel, Field
 
 
@@ -23,36 +25,22 @@ async def hopper(
     data: str,
 ) -> HopperOutput:
     print("Starting Hopper Agent", flush=True)
-    system_message = Template(
-        Path(__file__).parent.joinpath("hopper.md").read_text(encoding="utf-8")
-    ).render()
-    
-    # HAL3000Android: Enhance with knowledge base context
-    from minitap.mobile_use.utils.knowledge_base import enhance_agent_prompt
-    system_message = enhance_agent_prompt("hopper", system_message)
+    # HAL3000Android: Rendered once, enhanced with knowledge base context
+    system_message = get_prompt_registry().render_system_prompt(
+        "hopper", Path(__file__).parent.joinpath("hopper.md"), key=None
+    )
     messages = [
         SystemMessage(content=system_message),
         HumanMessage(content=f"{request}\nHere is the data you must dig:\n{data}"),
     ]
 
-    llm = get_llm(ctx=ctx, name="hopper", is_utils=True, temperature=0)
-    if hasattr(llm, "is_cerebras"):
-        # Cerebras
-        cerebras_msgs = []
-        for m in messages:
-            if hasattr(m, "content"):
-                role = "system" if m.__class__.__name__ == "SystemMessage" else "user"
-                content = m.content
-                if role == "system" and "JSON" not in content:
-                    content += "\nRespond ONLY in valid JSON format."
-                cerebras_msgs.append({"role": role, "content": content})
-            else:
-                cerebras_msgs.append(m)
-        response_obj = llm.generate(cerebras_msgs, response_format={"type": "json_object"})
-        response = HopperOutput.model_validate_json(response_obj.content)
-    else:
-        structured_llm = llm.with_structured_output(HopperOutput)
-        response: HopperOutput = await structured_llm.ainvoke(messages)  # type: ignore
+    llm = get_llm(ctx=ctx, name="hopper", is_utils=True, temperature=0, use_response_cache=True)
+    messages = add_cache_control(llm, messages, stable_prefix_length=1)
+    structured_llm = llm.with_structured_output(HopperOutput)
+    async with rate_limited(llm, messages):
+        response: HopperOutput = await structured_llm.ainvoke(
+            messages, config=get_agent_run_config("hopper")
+        )  # type: ignore
     return HopperOutput(
         step=response.step,
         output=response.output,
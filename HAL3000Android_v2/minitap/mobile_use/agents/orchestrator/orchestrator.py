@@ -1,9 +1,11 @@
 from pathlib import Path
 
-from jinja2 import Template
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from minitap.mobile_use.agents.cortex.streaming import has_decisions
+from minitap.mobile_use.agents.executor.utils import is_last_tool_message_failed
 from minitap.mobile_use.agents.orchestrator.types import OrchestratorOutput
+from minitap.mobile_use.agents.planner.types import Subgoal
 from minitap.mobile_use.agents.planner.utils import (
     all_completed,
     complete_subgoals_by_ids,
@@ -15,9 +17,12 @@ from minitap.mobile_use.agents.planner.utils import (
 )
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.graph.state import State
-from minitap.mobile_use.services.llm import get_llm
+from minitap.mobile_use.services.llm import get_llm, rate_limited
 from minitap.mobile_use.utils.decorators import wrap_with_callbacks
 from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.prompt_cache import add_cache_control
+from minitap.mobile_use.utils.prompts import get_prompt_registry, get_system_prompt_key
+from minitap.mobile_use.utils.thoughts_memory import get_agent_thoughts_memory
 
 logger = get_logger(__name__)
 
@@ -59,20 +64,32 @@ class OrchestratorNode:
         if len(subgoals_to_examine) <= 0:
             return _get_state_update(ctx=self.ctx, state=state, thoughts=["No subgoal to examine."])
 
-        system_message = Template(
-            Path(__file__).parent.joinpath("orchestrator.md").read_text(encoding="utf-8")
-        ).render(platform=self.ctx.device.mobile_platform.value)
-        
-        # HAL3000Android: Enhance with knowledge base context
-        from minitap.mobile_use.utils.knowledge_base import enhance_agent_prompt
-        system_message = enhance_agent_prompt("orchestrator", system_message)
-        human_message = Template(
-            Path(__file__).parent.joinpath("human.md").read_text(encoding="utf-8")
-        ).render(
+        # Unambiguous transitions are decided by rules, the LLM only examines the others
+        rule_based_update = self._examine_without_llm(state, current_subgoal)
+        if rule_based_update is not None:
+            self.ctx.orchestrator_stats.rule_based_examinations += 1
+            return rule_based_update
+        self.ctx.orchestrator_stats.llm_examinations += 1
+
+        # HAL3000Android: Rendered once, enhanced with knowledge base context
+        system_message = get_prompt_registry().render_system_prompt(
+            "orchestrator",
+            Path(__file__).parent.joinpath("orchestrator.md"),
+            key=get_system_prompt_key(self.ctx),
+            get_variables=lambda: dict(platform=self.ctx.device.mobile_platform.value),
+        )
+        human_message = get_prompt_registry().render(
+            Path(__file__).parent.joinpath("human.md"),
             initial_goal=state.initial_goal,
             subgoal_plan="\n".join(str(s) for s in state.subgoal_plan),
             subgoals_to_examine="\n".join(str(s) for s in subgoals_to_examine),
-            agent_thoughts="\n".join(state.agents_thoughts),
+            agent_thoughts=str(
+                get_agent_thoughts_memory(
+                    "orchestrator",
+                    state.agents_thoughts,
+                    query="\n".join(s.description for s in subgoals_to_examine),
+                )
+            ),
         )
         messages = [
             SystemMessage(content=system_message),
@@ -80,23 +97,10 @@ class OrchestratorNode:
         ]
 
         llm = get_llm(ctx=self.ctx, name="orchestrator", temperature=1)
-        if hasattr(llm, "is_cerebras"):
-            # Cerebras
-            cerebras_msgs = []
-            for m in messages:
-                if hasattr(m, "content"):
-                    role = "system" if m.__class__.__name__ == "SystemMessage" else "user"
-                    content = m.content
-                    if role == "system" and "JSON" not in content:
-                        content += "\nRespond ONLY in valid JSON format."
-                    cerebras_msgs.append({"role": role, "content": content})
-                else:
-                    cerebras_msgs.append(m)
-            response_obj = llm.generate(cerebras_msgs, response_format={"type": "json_object"})
-            response = OrchestratorOutput.model_validate_json(response_obj.content)
-        else:
-            llm = llm.with_structured_output(OrchestratorOutput)
-            response: OrchestratorOutput = await llm.ainvoke(messages)  # type: ignore
+        messages = add_cache_control(llm, messages, stable_prefix_length=1)
+        structured_llm = llm.with_structured_output(OrchestratorOutput)
+        async with rate_limited(llm, messages):
+            response: OrchestratorOutput = await structured_llm.ainvoke(messages)  # type: ignore
 
         if response.needs_replaning:
             thoughts = [response.reason]
@@ -104,16 +108,53 @@ class OrchestratorNode:
             thoughts.append("==== END OF PLAN, REPLANNING ====")
             return _get_state_update(ctx=self.ctx, state=state, thoughts=thoughts, update_plan=True, clear_examination_list=True)
 
+        return self._complete_subgoals(
+            state=state,
+            current_subgoal=current_subgoal,
+            completed_subgoal_ids=response.completed_subgoal_ids,
+            thoughts=[response.reason],
+        )
+
+    def _examine_without_llm(self, state: State, current_subgoal: Subgoal) -> dict | None:
+        """The state update of an unambiguous examination, None when it needs the LLM."""
+        if (
+            state.cortex_completed_subgoals
+            and state.complete_subgoals_by_ids == [current_subgoal.id]
+            and not has_decisions(state.structured_decisions)
+        ):
+            logger.info(f"⚡ The Cortex completed the current subgoal {current_subgoal.id}")
+            return self._complete_subgoals(
+                state=state,
+                current_subgoal=current_subgoal,
+                completed_subgoal_ids=[current_subgoal.id],
+                thoughts=[f"The Cortex completed the current subgoal: {current_subgoal}"],
+            )
+        if is_last_tool_message_failed(state.executor_messages):
+            logger.info(f"⚡ The last action failed, subgoal {current_subgoal.id} is not complete")
+            return _get_state_update(
+                ctx=self.ctx,
+                state=state,
+                thoughts=["The last action failed, the current subgoal is not complete yet."],
+                clear_examination_list=True,
+            )
+        return None
+
+    def _complete_subgoals(
+        self,
+        state: State,
+        current_subgoal: Subgoal,
+        completed_subgoal_ids: list[str],
+        thoughts: list[str],
+    ) -> dict:
         state.subgoal_plan = complete_subgoals_by_ids(
             subgoals=state.subgoal_plan,
-            ids=response.completed_subgoal_ids,
+            ids=completed_subgoal_ids,
         )
-        thoughts = [response.reason]
         if all_completed(state.subgoal_plan):
             logger.success("All the subgoals have been completed successfully.")
             return _get_state_update(ctx=self.ctx, state=state, thoughts=thoughts, update_plan=True, clear_examination_list=True)
 
-        if current_subgoal.id not in response.completed_subgoal_ids:
+        if current_subgoal.id not in completed_subgoal_ids:
             # The current subgoal is not yet complete - KEEP IT IN EXAMINATION LIST
             # Don't clear examination list so it can be retried
             return _get_state_update(ctx=self.ctx, state=state, thoughts=thoughts)
@@ -138,6 +179,7 @@ def _get_state_update(
     # HAL3000Android: Only clear examination list when explicitly requested
     if clear_examination_list:
         update["complete_subgoals_by_ids"] = []
+        update["cortex_completed_subgoals"] = False
     if update_plan:
         update["subgoal_plan"] = state.subgoal_plan
     return state.sanitize_update(ctx=ctx, update=update, agent="orchestrator")
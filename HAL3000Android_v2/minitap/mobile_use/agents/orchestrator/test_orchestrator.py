@@ -0,0 +1,77 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from minitap.mobile_use.agents.orchestrator.orchestrator import OrchestratorNode
+from minitap.mobile_use.agents.orchestrator.types import OrchestratorStats
+from minitap.mobile_use.agents.planner.types import Subgoal, SubgoalStatus
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.graph.state import State
+
+
+def _get_state(**update) -> State:
+    fields = dict(
+        messages=[],
+        initial_goal="Open the Wi-Fi settings",
+        subgoal_plan=[
+            Subgoal(id="1", description="Open the settings", status=SubgoalStatus.PENDING),
+            Subgoal(id="2", description="Open Wi-Fi", status=SubgoalStatus.NOT_STARTED),
+        ],
+        latest_ui_hierarchy=None,
+        latest_screenshot_base64=None,
+        focused_app_info=None,
+        device_date=None,
+        structured_decisions=None,
+        complete_subgoals_by_ids=["1"],
+        agents_thoughts=[],
+        remaining_steps=10,
+        executor_messages=[],
+        cortex_last_thought=None,
+    )
+    return State(**{**fields, **update})
+
+
+def _tool_messages(status: str) -> list:
+    return [
+        AIMessage(content="", tool_calls=[{"name": "tap", "args": {}, "id": "call_0"}]),
+        ToolMessage(content="Tapped", name="tap", tool_call_id="call_0", status=status),
+    ]
+
+
+def test_subgoal_completed_by_the_cortex_starts_the_next_one_without_llm():
+    ctx = MobileUseContext.model_construct(orchestrator_stats=OrchestratorStats())
+    state = _get_state(cortex_completed_subgoals=True)
+
+    update = asyncio.run(OrchestratorNode(ctx)(state))
+
+    assert [s.status for s in update["subgoal_plan"]] == [
+        SubgoalStatus.SUCCESS,
+        SubgoalStatus.PENDING,
+    ]
+    assert update["complete_subgoals_by_ids"] == []
+    assert ctx.orchestrator_stats.rule_based_examinations == 1
+    assert ctx.orchestrator_stats.llm_examinations == 0
+
+
+def test_failed_action_keeps_the_subgoal_pending_without_llm():
+    ctx = MobileUseContext.model_construct(orchestrator_stats=OrchestratorStats())
+    state = _get_state(executor_messages=_tool_messages("error"))
+
+    update = asyncio.run(OrchestratorNode(ctx)(state))
+
+    assert "subgoal_plan" not in update
+    assert update["complete_subgoals_by_ids"] == []
+    assert ctx.orchestrator_stats.rule_based_examinations == 1
+
+
+def test_ambiguous_examinations_are_left_to_the_llm():
+    ctx = MobileUseContext.model_construct(orchestrator_stats=OrchestratorStats())
+    node = OrchestratorNode(ctx)
+    current_subgoal = _get_state().subgoal_plan[0]
+
+    # Marked for examination after a successful action
+    state = _get_state(executor_messages=_tool_messages("success"))
+    assert node._examine_without_llm(state, current_subgoal) is None
+    # Completed by the Cortex along with a subgoal that is not started yet
+    state = _get_state(cortex_completed_subgoals=True, complete_subgoals_by_ids=["1", "2"])
+    assert node._examine_without_llm(state, current_subgoal) is None
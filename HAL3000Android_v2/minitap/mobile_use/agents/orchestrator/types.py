@@ -9,3 +9,17 @@ class OrchestratorOutput(BaseModel):
     ] = []
     needs_replaning: Annotated[bool, "Whether the orchestrator needs to replan the subgoal plan"]
     reason: str
+
+
+class OrchestratorStats(BaseModel):
+    """How the subgoals of a task were examined: by rules or by the LLM."""
+
+    rule_based_examinations: int = 0
+    llm_examinations: int = 0
+
+    def __str__(self) -> str:
+        total = self.rule_based_examinations + self.llm_examinations
+        return (
+            f"{self.rule_based_examinations}/{total} examinations without LLM, "
+            f"{self.rule_based_examinations} LLM calls avoided"
+        )
@@ -1,21 +1,27 @@
 import json
 from pathlib import Path
 
-from jinja2 import Template
+from langchain_core.callbacks import Callbacks
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from minitap.mobile_use.config import OutputConfig
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.graph.state import State
-from minitap.mobile_use.services.llm import get_llm
+from minitap.mobile_use.services.llm import get_llm, rate_limited
 from minitap.mobile_use.utils.conversations import is_ai_message
+from minitap.mobile_use.utils.llm_usage import get_agent_run_config
 from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.prompts import get_prompt_registry
+from minitap.mobile_use.utils.thoughts_memory import get_agent_thoughts_memory
 from pydantic import BaseModel
 
 logger = get_logger(__name__)
 
 
 async def outputter(
-    ctx: MobileUseContext, output_config: OutputConfig, graph_output: State
+    ctx: MobileUseContext,
+    output_config: OutputConfig,
+    graph_output: State,
+    callbacks: Callbacks = None,
 ) -> dict:
     logger.info("Starting Outputter Agent")
     last_message = graph_output.messages[-1] if graph_output.messages else None
@@ -28,11 +34,12 @@ async def outputter(
     # HAL3000Android: Enhance with knowledge base context
     from minitap.mobile_use.utils.knowledge_base import enhance_agent_prompt
     system_message = enhance_agent_prompt("outputter", system_message)
-    human_message = Template(
-        Path(__file__).parent.joinpath("human.md").read_text(encoding="utf-8")
-    ).render(
+    human_message = get_prompt_registry().render(
+        Path(__file__).parent.joinpath("human.md"),
         initial_goal=graph_output.initial_goal,
-        agents_thoughts=graph_output.agents_thoughts,
+        agents_thoughts=get_agent_thoughts_memory(
+            "outputter", graph_output.agents_thoughts, query=graph_output.initial_goal
+        ).to_list(),
         structured_output=output_config.structured_output,
         output_description=output_config.output_description,
         last_ai_message=last_message.content
@@ -63,23 +70,11 @@ async def outputter(
             schema = so
 
         if schema is not None:
-            if hasattr(llm, "is_cerebras"):
-                # Cerebras
-                cerebras_msgs = []
-                for m in messages:
-                    if hasattr(m, "content"):
-                        role = "system" if m.__class__.__name__ == "SystemMessage" else "user"
-                        content = m.content
-                        if role == "system" and "JSON" not in content:
-                            content += "\nRespond ONLY in valid JSON format."
-                        cerebras_msgs.append({"role": role, "content": content})
-                    else:
-                        cerebras_msgs.append(m)
-                response_obj = llm.generate(cerebras_msgs, response_format={"type": "json_object"})
-                response = schema.model_validate_json(response_obj.content)
-            else:
-                structured_llm = llm.with_structured_output(schema)
-                response = await structured_llm.ainvoke(messages)  # type: ignore
+            structured_llm = llm.with_structured_output(schema)
+            async with rate_limited(llm, messages):
+                response = await structured_llm.ainvoke(
+                    messages, config={**get_agent_run_config("outputter"), "callbacks": callbacks}
+                )  # type: ignore
     if isinstance(response, BaseModel):
         if output_config.output_description and hasattr(response, "content"):
             response = json.loads(response.content)  # type: ignore
@@ -1,17 +1,20 @@
 import uuid
 from pathlib import Path
 
-from jinja2 import Template
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from minitap.mobile_use.agents.planner.types import PlannerOutput, Subgoal, SubgoalStatus
 from minitap.mobile_use.agents.planner.utils import one_of_them_is_failure
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.graph.state import State
-from minitap.mobile_use.services.llm import get_llm
+from minitap.mobile_use.services.llm import get_llm, rate_limited
+from minitap.mobile_use.services.plan_cache import get_plan_cache
 from minitap.mobile_use.tools.index import EXECUTOR_WRAPPERS_TOOLS, format_tools_list
 from minitap.mobile_use.utils.decorators import wrap_with_callbacks
 from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.prompt_cache import add_cache_control
+from minitap.mobile_use.utils.prompts import get_prompt_registry, get_system_prompt_key
+from minitap.mobile_use.utils.thoughts_memory import get_agent_thoughts_memory
 
 logger = get_logger(__name__)
 
@@ -41,23 +44,61 @@ class PlannerNode:
                 agent="planner",
             )
 
-        system_message = Template(
-            Path(__file__).parent.joinpath("planner.md").read_text(encoding="utf-8")
-        ).render(
-            platform=self.ctx.device.mobile_platform.value,
-            executor_tools_list=format_tools_list(ctx=self.ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS),
+        plan_cache = get_plan_cache()
+        cached_plan_update: dict = {}
+        if needs_replan and state.cached_plan_id is not None and plan_cache is not None:
+            # The cached plan did not hold: the replan is not cached in its place, which would
+            # reset the outcomes of the entry
+            plan_cache.record_outcome(state.cached_plan_id, success=False)
+            cached_plan_update = {"cached_plan_id": None, "cached_plan_failed": True}
+        elif not needs_replan and plan_cache is not None:
+            cached_plan = plan_cache.lookup(
+                goal=state.initial_goal, platform=self.ctx.device.mobile_platform.value
+            )
+            if cached_plan is not None:
+                subgoals_plan = [
+                    Subgoal(
+                        id=subgoal.id or str(uuid.uuid4()),
+                        description=subgoal.description,
+                        status=SubgoalStatus.NOT_STARTED,
+                        completion_reason=None,
+                    )
+                    for subgoal in cached_plan.subgoals
+                ]
+                logger.info(f"📜 Cached plan ({cached_plan.similarity:.0%} similar goal):")
+                logger.info("\n".join(str(s) for s in subgoals_plan))
+                return state.sanitize_update(
+                    ctx=self.ctx,
+                    update={
+                        "subgoal_plan": subgoals_plan,
+                        "cached_plan_id": cached_plan.entry_id,
+                        "execution_depth": new_depth,
+                    },
+                    agent="planner",
+                )
+
+        # HAL3000Android: Rendered once, enhanced with knowledge base context
+        system_message = get_prompt_registry().render_system_prompt(
+            "planner",
+            Path(__file__).parent.joinpath("planner.md"),
+            key=get_system_prompt_key(self.ctx),
+            get_variables=lambda: dict(
+                platform=self.ctx.device.mobile_platform.value,
+                executor_tools_list=format_tools_list(
+                    ctx=self.ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS
+                ),
+            ),
         )
-        
-        # HAL3000Android: Enhance with knowledge base context
-        from minitap.mobile_use.utils.knowledge_base import enhance_agent_prompt
-        system_message = enhance_agent_prompt("planner", system_message)
-        human_message = Template(
-            Path(__file__).parent.joinpath("human.md").read_text(encoding="utf-8")
-        ).render(
+        human_message = get_prompt_registry().render(
+            Path(__file__).parent.joinpath("human.md"),
             action="replan" if needs_replan else "plan",
             initial_goal=state.initial_goal,
             previous_plan="\n".join(str(s) for s in state.subgoal_plan),
-            agent_thoughts="\n".join(state.agents_thoughts),
+            agent_thoughts=str(
+                get_agent_thoughts_memory(
+                    "planner", state.agents_thoughts, query=state.initial_goal
+                )
+            ),
             screen_analysis=state.screen_analysis,
         )
         messages = [
@@ -65,44 +106,11 @@ class PlannerNode:
             HumanMessage(content=human_message),
         ]
 
-        llm = get_llm(ctx=self.ctx, name="planner")
-        if hasattr(llm, "is_cerebras"):
-            # Cerebras
-            # Add tool information to system message
-            enhanced_system_message = system_message + """
-
-CRITICAL: You must respond in this EXACT JSON format:
-{
-  "subgoals": [
-    {
-      "id": null,
-      "description": "First step description"
-    },
-    {
-      "id": null, 
-      "description": "Second step description"
-    }
-  ]
-}
-
-Do NOT return just an array. Always wrap in an object with "subgoals" key.
-"""
-            
-            cerebras_msgs = []
-            for m in messages:
-                if hasattr(m, "content"):
-                    role = "system" if m.__class__.__name__ == "SystemMessage" else "user"
-                    content = m.content if m != messages[0] else enhanced_system_message
-                    if role == "system" and "JSON" not in content:
-                        content += "\nRespond ONLY in valid JSON format."
-                    cerebras_msgs.append({"role": role, "content": content})
-                else:
-                    cerebras_msgs.append(m)
-            response_obj = llm.generate(cerebras_msgs, response_format={"type": "json_object"})
-            response = PlannerOutput.model_validate_json(response_obj.content)
-        else:
-            llm = llm.with_structured_output(PlannerOutput)
-            response: PlannerOutput = await llm.ainvoke(messages)  # type: ignore
+        llm = get_llm(ctx=self.ctx, name="planner", use_response_cache=True)
+        messages = add_cache_control(llm, messages, stable_prefix_length=1)
+        structured_llm = llm.with_structured_output(PlannerOutput)
+        async with rate_limited(llm, messages):
+            response: PlannerOutput = await structured_llm.ainvoke(messages)  # type: ignore
 
         subgoals_plan = [
             Subgoal(
@@ -121,6 +129,7 @@ Do NOT return just an array. Always wrap in an object with "subgoals" key.
             update={
                 "subgoal_plan": subgoals_plan,
                 "execution_depth": new_depth,
+                **cached_plan_update,
             },
             agent="planner",
         )
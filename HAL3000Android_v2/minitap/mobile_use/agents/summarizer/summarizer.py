@@ -4,6 +4,7 @@ from langchain_core.messages import (
     ToolMessage,
 )
 
+from minitap.mobile_use.agents.cortex.streaming import resolve_pending_cortex_thought
 from minitap.mobile_use.constants import MAX_MESSAGES_IN_HISTORY
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.graph.state import State
@@ -17,7 +18,13 @@ class SummarizerNode:
     def __init__(self, ctx: MobileUseContext):
         self.ctx = ctx
 
-    def __call__(self, state: State):
+    async def __call__(self, state: State):
+        update = self._get_update(state)
+        # Decisions may have been dispatched before the end of the Cortex stream
+        update.update(await resolve_pending_cortex_thought(ctx=self.ctx, state=state))
+        return update
+
+    def _get_update(self, state: State) -> dict:
         # HAL3000Android: Track execution depth
         new_depth = state.execution_depth + 1
         logger.info(f"🔢 Summarizer Agent (#{new_depth})")
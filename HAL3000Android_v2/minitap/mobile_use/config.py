@@ -6,7 +6,7 @@ from typing import Annotated, Any, Literal
 import google.auth
 from dotenv import load_dotenv
 from google.auth.exceptions import DefaultCredentialsError
-from pydantic import BaseModel, Field, SecretStr, ValidationError, model_validator
+from pydantic import BaseModel, ConfigDict, Field, SecretStr, ValidationError, model_validator
 from pydantic_settings import BaseSettings
 
 from minitap.mobile_use.utils.file import load_jsonc
@@ -19,6 +19,22 @@ load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / ".env", verbose=Tr
 logger = get_logger(__name__)
 
 
+class LLMRateLimit(BaseModel):
+    max_concurrency: int | None = Field(default=None, gt=0)
+    tokens_per_minute: int | None = Field(default=None, gt=0)
+
+
+class ImagePolicy(BaseModel):
+    """Encoding of the screenshots sent to a model, see `services.vision`."""
+
+    model_config = ConfigDict(frozen=True)
+
+    max_dimension: int | None = Field(default=1568, gt=0)
+    format: Literal["jpeg", "webp", "png"] = "jpeg"
+    quality: int = Field(default=80, ge=1, le=100)
+    grayscale: bool = False
+    crop_system_bars: bool = False
+
 
 class Settings(BaseSettings):
     OPENAI_API_KEY: SecretStr | None = None
@@ -35,6 +51,40 @@ class Settings(BaseSettings):
     ADB_HOST: str | None = None
     ADB_PORT: int | None = None
 
+    # Opt-in cache of the responses of deterministic LLM calls
+    LLM_RESPONSE_CACHE_PATH: str | None = None
+    LLM_RESPONSE_CACHE_MAX_SIZE_MB: int = 256
+    # Opt-in cache of the plans of successful goals, matched by goal template
+    PLAN_CACHE_PATH: str | None = None
+    PLAN_CACHE_MAX_ENTRIES: int = 500
+    # Delay after which fallback LLMs are hedged, instead of the rolling p90 of each agent
+    LLM_HEDGE_AFTER_SECONDS: float | None = None
+    # Client-side limits of the LLM calls, keyed by provider ("openai") or by provider and
+    # model ("openai/gpt-4.1"), e.g. {"openai": {"max_concurrency": 8}}
+    LLM_RATE_LIMITS: dict[str, LLMRateLimit] = {}
+    # Record of the LLM calls, and the recording served by the "replay" provider
+    LLM_RECORD_PATH: str | None = None
+    LLM_REPLAY_PATH: str | None = None
+    LLM_REPLAY_MATCH: Literal["hash", "sequence"] = "hash"
+    # Synthetic latency of the replayed calls, None to replay the recorded latencies
+    LLM_REPLAY_LATENCY_SECONDS: float | None = 0
+    # Screenshot encoding, keyed by provider, by provider/model or "default" for the others
+    LLM_IMAGE_POLICIES: dict[str, ImagePolicy] = {}
+    # Interval of the background probe of the foreground app of Android devices, None to
+    # run `dumpsys window` on every Contextor pass instead. The probe keeps running on the
+    # device between tasks, until the agent is cleaned
+    FOREGROUND_APP_PROBE_INTERVAL_SECONDS: float | None = Field(default=0.5, gt=0)
+    # Token budget of the agent thoughts in the prompt of each agent ("cortex", "planner"...),
+    # the latest thoughts being kept verbatim and the older ones summarized
+    THOUGHTS_TOKEN_BUDGET: int = Field(default=3000, gt=0)
+    THOUGHTS_TOKEN_BUDGETS: dict[str, int] = {"outputter": 16000}
+    THOUGHTS_KEPT_VERBATIM: int = Field(default=10, gt=0)
+    # Memory kept for the screenshots and UI hierarchies of each task, beyond which the least
+    # recently used ones are spilled to disk
+    BLOB_STORE_MEMORY_MB: int = Field(default=64, gt=0)
+    # Reload the prompt templates and the knowledge base when their files change (development)
+    PROMPT_RELOAD: bool = False
+
     model_config = {"env_file": ".env", "extra": "ignore"}
 
 
@@ -94,10 +144,15 @@ def record_events(output_path: Path | None, events: list[str] | BaseModel | Any)
 
 ### LLM Configuration
 
-LLMProvider = Literal["openai", "google", "openrouter", "xai", "vertexai", "cerebras", "anthropic"]
+LLMProvider = Literal[
+    "openai", "google", "openrouter", "xai", "vertexai", "cerebras", "anthropic", "replay"
+]
 LLMUtilsNode = Literal["outputter", "hopper"]
 AgentNode = Literal["planner", "orchestrator", "contextor", "cortex", "executor"]
 AgentNodeWithFallback = Literal["cortex", "contextor"]
+# "two_stage": the Cortex decides and the Executor turns its decisions into tool calls,
+# "fast": the Cortex emits the tool calls itself
+GraphMode = Literal["two_stage", "fast"]
 
 ROOT_DIR = Path(__file__).parent.parent.parent
 DEFAULT_LLM_CONFIG_FILENAME = "llm-config.defaults.jsonc"
@@ -135,6 +190,9 @@ class LLM(BaseModel):
             case "xai":
                 if not settings.XAI_API_KEY:
                     raise Exception(f"{name} requires XAI_API_KEY in .env")
+            case "replay":
+                if not settings.LLM_REPLAY_PATH:
+                    raise Exception(f"{name} requires LLM_REPLAY_PATH in .env")
 
     def __str__(self):
         return f"{self.provider}/{self.model}"
@@ -1,3 +1,5 @@
 RECURSION_LIMIT = 400
 MAX_MESSAGES_IN_HISTORY = 25
 EXECUTOR_MESSAGES_KEY = "executor_messages"
+# Number of structurally identical sibling rows kept in full in the UI hierarchy sent to LLMs
+UI_HIERARCHY_REPEATED_ROWS_KEPT = 3
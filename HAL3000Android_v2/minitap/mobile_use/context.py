@@ -9,12 +9,18 @@ from pathlib import Path
 
 from adbutils import AdbClient
 from openai import BaseModel
-from pydantic import ConfigDict
+from pydantic import ConfigDict, Field
 from typing import Literal
 
+from minitap.mobile_use.agents.cortex.types import PendingCortexOutput
+from minitap.mobile_use.agents.executor.compiler import DecisionCompilerStats
+from minitap.mobile_use.agents.orchestrator.types import OrchestratorStats
 from minitap.mobile_use.clients.device_hardware_client import DeviceHardwareClient
 from minitap.mobile_use.clients.screen_api_client import ScreenApiClient
 from minitap.mobile_use.config import LLMConfig
+from minitap.mobile_use.services.blob_store import BlobStore
+from minitap.mobile_use.services.hedging import HedgingStats
+from minitap.mobile_use.utils.spatial_index import IndexedHierarchy
 
 
 class DevicePlatform(str, Enum):
@@ -57,6 +63,14 @@ class MobileUseContext(BaseModel):
     llm_config: LLMConfig
     adb_client: AdbClient | None = None
     execution_setup: ExecutionSetup | None = None
+    ui_index: IndexedHierarchy | None = None
+    pending_cortex_output: PendingCortexOutput | None = None
+    orchestrator_stats: OrchestratorStats = Field(default_factory=OrchestratorStats)
+    decision_compiler_stats: DecisionCompilerStats = Field(default_factory=DecisionCompilerStats)
+    # Hedged fallbacks of the LLM calls of the task, by node
+    hedging_stats: dict[str, HedgingStats] = Field(default_factory=dict)
+    # Screenshots and UI hierarchies of the task, referenced by the graph state
+    blob_store: BlobStore = Field(default_factory=BlobStore)
 
     def get_adb_client(self) -> AdbClient:
         if self.adb_client is None:
@@ -1,3 +1,5 @@
+import difflib
+import re
 import uuid
 from enum import Enum
 from typing import Annotated, Literal
@@ -13,9 +15,25 @@ from minitap.mobile_use.config import initialize_llm_config
 from minitap.mobile_use.context import DeviceContext, DevicePlatform, MobileUseContext
 from minitap.mobile_use.utils.errors import ControllerErrors
 from minitap.mobile_use.utils.logger import get_logger
+from minitap.mobile_use.utils.screen_fingerprint import (
+    ScreenFingerprint,
+    compute_screen_fingerprint,
+)
+from minitap.mobile_use.utils.spatial_index import (
+    IndexedHierarchy,
+    get_element_center,
+    is_element_actionable,
+    is_point_in_element,
+    parse_element_rect,
+)
 
 logger = get_logger(__name__)
 
+# Max distance (in pixels) a coordinates tap can be moved to land on an actionable element
+COORDINATES_SNAP_MAX_DISTANCE = 48
+# Max number of candidates suggested when a selector does not resolve to a single element
+MAX_SELECTOR_SUGGESTIONS = 5
+
 
 ###### Screen elements retrieval ######
 
@@ -27,6 +45,18 @@ class ScreenDataResponse(BaseModel):
     height: int
     platform: str
 
+    def get_fingerprint(self, with_perceptual_hash: bool = False) -> ScreenFingerprint:
+        """
+        Identity of the screen: a hash of the hierarchy skeleton, optionally combined with
+        a perceptual hash of the screenshot (which requires decoding it).
+        """
+        return compute_screen_fingerprint(
+            self.elements,
+            width=self.width,
+            height=self.height,
+            screenshot_base64=self.base64 if with_perceptual_hash else None,
+        )
+
 
 def get_screen_data(screen_api_client: ScreenApiClient):
     response = screen_api_client.get_with_retry("/screen-info")
@@ -48,6 +78,9 @@ def run_flow(ctx: MobileUseContext, flow_steps: list, dry_run: bool = False) ->
     Run a flow i.e, a sequence of commands.
     Returns None on success, or the response body of the failed command.
     """
+    if not dry_run:
+        # The screen is about to change: the indexed hierarchy can't be trusted anymore
+        ctx.ui_index = None
     logger.info(f"Running flow: {flow_steps}")
 
     for step in flow_steps:
@@ -146,6 +179,177 @@ SelectorRequest = (
 )
 
 
+def snap_coordinates(
+    ctx: MobileUseContext, coordinates: CoordinatesSelectorRequest
+) -> CoordinatesSelectorRequest | dict:
+    """
+    Validates a coordinates selector against the spatial index of the current frame.
+    Returns the coordinates to dispatch - moved to the center of the nearest actionable element
+    when nothing actionable sits under the point - or an error if the point is off-screen.
+    """
+    index = ctx.ui_index
+    if index is None:
+        return coordinates
+    x, y = coordinates.x, coordinates.y
+    if not index.contains_point(x, y):
+        error = f"Point ({x}, {y}) is outside of the screen ({index.width}x{index.height})"
+        logger.error(error)
+        return {"error": error}
+
+    hit = index.element_at(x, y)
+    if hit is not None and is_element_actionable(hit):
+        return coordinates
+    nearest = index.nearest_element(x, y, max_distance=COORDINATES_SNAP_MAX_DISTANCE)
+    if nearest is None:
+        logger.warning(f"No actionable element found around ({x}, {y})")
+        return coordinates
+    center = get_element_center(nearest)
+    if center is None or is_point_in_element(nearest, x, y):
+        return coordinates
+    logger.info(f"Snapped tap from ({x}, {y}) to ({center.x}, {center.y})")
+    return CoordinatesSelectorRequest(x=center.x, y=center.y)
+
+
+def _find_elements_by_text(ui_index: IndexedHierarchy, text: str) -> list[dict]:
+    """Same semantics as Maestro: the text is a regex matching the whole (hint/a11y) text."""
+    exact_matches = ui_index.find_by_text(text)
+    if exact_matches:
+        return exact_matches
+    try:
+        pattern = re.compile(text, flags=re.DOTALL)
+    except re.error:
+        return []
+    return [
+        element
+        for element in ui_index.elements
+        if any(
+            element.get(key) and pattern.fullmatch(element[key])
+            for key in ("text", "accessibilityText", "hintText")
+        )
+    ]
+
+
+def _find_elements(ui_index: IndexedHierarchy, selector_request: SelectorRequest) -> list[dict]:
+    if isinstance(selector_request, IdSelectorRequest):
+        return ui_index.find_by_resource_id(selector_request.id)
+    if isinstance(selector_request, TextSelectorRequest):
+        return _find_elements_by_text(ui_index, selector_request.text)
+    if isinstance(selector_request, IdWithTextSelectorRequest):
+        text_matches = _find_elements_by_text(ui_index, selector_request.text)
+        return [e for e in text_matches if e.get("resourceId") == selector_request.id]
+    return []
+
+
+def _dedupe_by_bounds(elements: list[dict]) -> list[tuple[int, dict]]:
+    """
+    The distinct tap targets among the elements, with their index in the list: a container and
+    its child sharing the same bounds are the same tap target.
+    """
+    seen: set = set()
+    deduped = []
+    for index, element in enumerate(elements):
+        rect = parse_element_rect(element)
+        if rect is not None and rect in seen:
+            continue
+        seen.add(rect)
+        deduped.append((index, element))
+    return deduped
+
+
+def _format_candidate(element: dict) -> str:
+    description = ", ".join(
+        f"{key}={element[key]!r}"
+        for key in ("resourceId", "text", "accessibilityText")
+        if element.get(key)
+    )
+    description = "{" + description + "}"
+    center = get_element_center(element)
+    if center is not None:
+        description += f" at ({center.x}, {center.y})"
+    return description
+
+
+def _get_suggestions(ui_index: IndexedHierarchy, selector_request: SelectorRequest) -> list[str]:
+    queries: list[tuple[str, str]] = []
+    if isinstance(selector_request, IdSelectorRequest | IdWithTextSelectorRequest):
+        queries.append((selector_request.id, "resourceId"))
+    if isinstance(selector_request, TextSelectorRequest | IdWithTextSelectorRequest):
+        queries.append((selector_request.text, "text"))
+
+    suggestions: list[str] = []
+    for query, kind in queries:
+        keys = (
+            ("resourceId",) if kind == "resourceId" else ("text", "accessibilityText", "hintText")
+        )
+        values = list(dict.fromkeys(e[k] for e in ui_index.elements for k in keys if e.get(k)))
+        matches = difflib.get_close_matches(query, values, n=MAX_SELECTOR_SUGGESTIONS, cutoff=0.5)
+        suggestions += [f"{kind}={match!r}" for match in matches]
+    return suggestions[:MAX_SELECTOR_SUGGESTIONS]
+
+
+def resolve_selector_request(
+    ctx: MobileUseContext,
+    selector_request: SelectorRequest,
+    index: int | None = None,
+    to_coordinates: bool = True,
+) -> tuple[SelectorRequest, int | None] | dict:
+    """
+    Resolves a selector against the indexed hierarchy of the current frame, before dispatching it.
+
+    A unique match is turned into the center coordinates of the element (if `to_coordinates`),
+    which spares Maestro its own lookup. A missing or ambiguous match returns an error listing
+    candidates, without any Maestro call. As in Maestro, `index` picks among all the matching
+    elements, including those sharing their bounds with another match.
+    When no fresh hierarchy is available, the selector is returned untouched.
+    """
+    if isinstance(selector_request, SelectorRequestWithCoordinates):
+        coordinates = snap_coordinates(ctx, selector_request.coordinates)
+        if isinstance(coordinates, dict):
+            return coordinates
+        return SelectorRequestWithCoordinates(coordinates=coordinates), index
+
+    ui_index = ctx.ui_index
+    if ui_index is None or isinstance(selector_request, SelectorRequestWithPercentages):
+        return selector_request, index
+
+    matches = _find_elements(ui_index, selector_request)
+    selector = selector_request.to_dict()
+    if not matches:
+        error = f"No element matches {selector} on the current screen."
+        suggestions = _get_suggestions(ui_index, selector_request)
+        if suggestions:
+            error += f" Closest candidates: {', '.join(suggestions)}"
+        logger.error(error)
+        return {"error": error}
+
+    targets = _dedupe_by_bounds(matches)
+    if index is not None:
+        if not 0 <= index < len(matches):
+            error = f"Index {index} is out of range: {len(matches)} elements match {selector}."
+            logger.error(error)
+            return {"error": error}
+        element = matches[index]
+    elif len(targets) == 1:
+        element = targets[0][1]
+    else:
+        candidates = ", ".join(
+            f"index={i}: {_format_candidate(e)}" for i, e in targets[:MAX_SELECTOR_SUGGESTIONS]
+        )
+        error = (
+            f"{len(targets)} elements match {selector}, specify an index or a more precise "
+            f"selector. Candidates: {candidates}"
+        )
+        logger.error(error)
+        return {"error": error}
+
+    center = get_element_center(element)
+    if not to_coordinates or center is None:
+        return selector_request, index
+    logger.info(f"Resolved {selector} to ({center.x}, {center.y})")
+    coordinates = CoordinatesSelectorRequest(x=center.x, y=center.y)
+    return SelectorRequestWithCoordinates(coordinates=coordinates), None
+
+
 def tap(
     ctx: MobileUseContext,
     selector_request: SelectorRequest,
@@ -156,6 +360,10 @@ def tap(
     Tap on a selector.
     Index is optional and is used when you have multiple views matching the same selector.
     """
+    resolved = resolve_selector_request(ctx, selector_request, index=index)
+    if isinstance(resolved, dict):
+        return resolved
+    selector_request, index = resolved
     tap_body = selector_request.to_dict()
     if not tap_body:
         error = "Invalid tap selector request, could not format yaml"
@@ -173,6 +381,10 @@ def long_press_on(
     dry_run: bool = False,
     index: int | None = None,
 ):
+    resolved = resolve_selector_request(ctx, selector_request, index=index)
+    if isinstance(resolved, dict):
+        return resolved
+    selector_request, index = resolved
     long_press_on_body = selector_request.to_dict()
     if not long_press_on_body:
         error = "Invalid longPressOn selector request, could not format yaml"
@@ -226,8 +438,42 @@ class SwipeRequest(BaseModel):
         return res
 
 
+def _clamp_swipe_request(ctx: MobileUseContext, swipe_request: SwipeRequest) -> SwipeRequest:
+    """Keeps swipe start and end points on the screen."""
+    mode = swipe_request.swipe_mode
+    if isinstance(mode, SwipeStartEndPercentagesRequest):
+        mode = SwipeStartEndPercentagesRequest(
+            start=PercentagesSelectorRequest(
+                x_percent=min(max(mode.start.x_percent, 0), 100),
+                y_percent=min(max(mode.start.y_percent, 0), 100),
+            ),
+            end=PercentagesSelectorRequest(
+                x_percent=min(max(mode.end.x_percent, 0), 100),
+                y_percent=min(max(mode.end.y_percent, 0), 100),
+            ),
+        )
+    elif isinstance(mode, SwipeStartEndCoordinatesRequest):
+        width = ctx.ui_index.width if ctx.ui_index else ctx.device.device_width
+        height = ctx.ui_index.height if ctx.ui_index else ctx.device.device_height
+        mode = SwipeStartEndCoordinatesRequest(
+            start=CoordinatesSelectorRequest(
+                x=min(max(mode.start.x, 0), width - 1),
+                y=min(max(mode.start.y, 0), height - 1),
+            ),
+            end=CoordinatesSelectorRequest(
+                x=min(max(mode.end.x, 0), width - 1),
+                y=min(max(mode.end.y, 0), height - 1),
+            ),
+        )
+    else:
+        return swipe_request
+    if mode != swipe_request.swipe_mode:
+        logger.info(f"Clamped swipe to the screen: {mode.to_dict()}")
+    return SwipeRequest(swipe_mode=mode, duration=swipe_request.duration)
+
+
 def swipe(ctx: MobileUseContext, swipe_request: SwipeRequest, dry_run: bool = False):
-    swipe_body = swipe_request.to_dict()
+    swipe_body = _clamp_swipe_request(ctx, swipe_request).to_dict()
     if not swipe_body:
         error = "Invalid swipe selector request, could not format yaml"
         logger.error(error)
@@ -244,6 +490,10 @@ def input_text(ctx: MobileUseContext, text: str, dry_run: bool = False):
 
 
 def copy_text_from(ctx: MobileUseContext, selector_request: SelectorRequest, dry_run: bool = False):
+    # copyTextFrom needs an element selector: only check that it resolves to a single element
+    resolved = resolve_selector_request(ctx, selector_request, to_coordinates=False)
+    if isinstance(resolved, dict):
+        return resolved
     copy_text_from_body = selector_request.to_dict()
     if not copy_text_from_body:
         error = "Invalid copyTextFrom selector request, could not format yaml"
@@ -348,11 +598,11 @@ if __name__ == "__main__":
     from minitap.mobile_use.graph.state import State
 
     dummy_state = State(
-        latest_ui_hierarchy=screen_data.elements,
+        latest_ui_hierarchy=ctx.blob_store.put_json(screen_data.elements),
         messages=[],
         initial_goal="",
         subgoal_plan=[],
-        latest_screenshot_base64=screen_data.base64,
+        latest_screenshot_base64=ctx.blob_store.put_text(screen_data.base64),
         focused_app_info=None,
         device_date="",
         structured_decisions=None,
@@ -1,7 +1,15 @@
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 import json
+import threading
+import time
 
 from adbutils import AdbDevice
+from minitap.mobile_use.config import settings
+from minitap.mobile_use.services.foreground_app import (
+    FOCUSED_APP_COMMAND,
+    ForegroundApp,
+    get_foreground_app_watcher,
+)
 from minitap.mobile_use.utils.logger import MobileUseLogger
 from minitap.mobile_use.utils.shell_utils import run_shell_command_on_host
 from minitap.mobile_use.context import MobileUseContext
@@ -49,18 +57,109 @@ def get_first_device(
     return None, None
 
 
+def get_foreground_app(
+    ctx: MobileUseContext, probed_after: float | None = None
+) -> ForegroundApp | None:
+    """
+    The foreground app tracked by the background watcher of the device, which is started on
+    first use. None until its first probe, or when the watcher is disabled.
+    With `probed_after` (host time.time), waits up to two probe intervals for a probe that came
+    back after it, so that the app is not older than what was captured since.
+    """
+    interval = settings.FOREGROUND_APP_PROBE_INTERVAL_SECONDS
+    if ctx.device.mobile_platform != DevicePlatform.ANDROID or interval is None:
+        return None
+    watcher = get_foreground_app_watcher(get_adb_device(ctx), interval_seconds=interval)
+    if probed_after is None:
+        return watcher.get_current()
+    return watcher.wait_for_probe(after=probed_after, timeout=2 * interval)
+
+
 def get_focused_app_info(ctx: MobileUseContext) -> str | None:
     if ctx.device.mobile_platform == DevicePlatform.IOS:
         return None
+    foreground_app = get_foreground_app(ctx)
+    if foreground_app is not None:
+        return foreground_app.focused_app_info
+    device = get_adb_device(ctx)
+    return str(device.shell(FOCUSED_APP_COMMAND))
+
+
+# The device clock is read again after this delay, in case it was changed
+DEVICE_CLOCK_RESYNC_SECONDS = 600
+# Format of the `date` command of Android
+DEVICE_DATE_FORMAT = "%a %b %d %H:%M:%S %Z %Y"
+
+
+class DeviceClock:
+    """Offset of a device clock from the host one, and the timezone of the device."""
+
+    def __init__(self, offset_seconds: float, tz: timezone, synced_at: float):
+        self.offset_seconds = offset_seconds
+        self.tz = tz
+        self.synced_at = synced_at
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(time.time() + self.offset_seconds, tz=self.tz)
+
+
+_device_clocks: dict[str, DeviceClock] = {}
+# Host time at which the clock of a device could not be parsed, not to ask it again every step
+_device_clock_failures: dict[str, float] = {}
+_device_clocks_lock = threading.Lock()
+
+
+def parse_device_clock(output: str, requested_at: float, received_at: float) -> DeviceClock:
+    """Parses the output of `date +'%s %z %Z'`, read between the two host times."""
+    epoch, utc_offset, tz_name = output.split()
+    sign = -1 if utc_offset.startswith("-") else 1
+    utc_offset = utc_offset.lstrip("+-")
+    tz = timezone(
+        sign * timedelta(hours=int(utc_offset[:2]), minutes=int(utc_offset[2:4])), tz_name
+    )
+    # The device read its clock somewhere between the request and the response
+    offset_seconds = int(epoch) - (requested_at + received_at) / 2
+    return DeviceClock(offset_seconds=offset_seconds, tz=tz, synced_at=received_at)
+
+
+def _get_device_clock(ctx: MobileUseContext) -> DeviceClock:
+    device_id = ctx.device.device_id
+    with _device_clocks_lock:
+        clock = _device_clocks.get(device_id)
+        failed_at = _device_clock_failures.get(device_id)
+    if clock is not None and time.time() - clock.synced_at < DEVICE_CLOCK_RESYNC_SECONDS:
+        return clock
+    if failed_at is not None and time.time() - failed_at < DEVICE_CLOCK_RESYNC_SECONDS:
+        raise ValueError(f"The clock of {device_id} could not be parsed")
     device = get_adb_device(ctx)
-    return str(device.shell("dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'"))
+    requested_at = time.time()
+    output = str(device.shell("date +'%s %z %Z'"))
+    try:
+        clock = parse_device_clock(output, requested_at=requested_at, received_at=time.time())
+    except ValueError:
+        with _device_clocks_lock:
+            _device_clock_failures[device_id] = time.time()
+        raise
+    with _device_clocks_lock:
+        _device_clocks[device_id] = clock
+        _device_clock_failures.pop(device_id, None)
+    return clock
 
 
 def get_device_date(ctx: MobileUseContext) -> str:
+    """
+    The date of the device, derived from its cached clock offset: the device is only asked for
+    its clock every `DEVICE_CLOCK_RESYNC_SECONDS`. When its clock cannot be parsed, its plain
+    `date` is read instead until then.
+    """
     if ctx.device.mobile_platform == DevicePlatform.IOS:
-        return date.today().strftime("%a %b %d %H:%M:%S %Z %Y")
-    device = get_adb_device(ctx)
-    return str(device.shell("date"))
+        return date.today().strftime(DEVICE_DATE_FORMAT)
+    try:
+        return _get_device_clock(ctx).now().strftime(DEVICE_DATE_FORMAT)
+    except ValueError:
+        # Unexpected `date` output, e.g. an old toolbox without format support
+        device = get_adb_device(ctx)
+        return str(device.shell("date"))
 
 
 def list_packages(ctx: MobileUseContext) -> str:
@@ -0,0 +1,100 @@
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.controllers.mobile_command_controller import (
+    IdSelectorRequest,
+    IdWithTextSelectorRequest,
+    SelectorRequestWithCoordinates,
+    TextSelectorRequest,
+    resolve_selector_request,
+)
+from minitap.mobile_use.utils.spatial_index import IndexedHierarchy
+
+
+def _element(resource_id: str, text: str, y: int) -> dict:
+    return {
+        "resourceId": resource_id,
+        "text": text,
+        "bounds": {"x": 0, "y": y, "width": 1080, "height": 100},
+    }
+
+
+def _get_ctx() -> MobileUseContext:
+    elements = [
+        _element("com.example:id/search", "Search", 100),
+        _element("com.example:id/row", "Alice", 300),
+        _element("com.example:id/row", "Bob", 400),
+    ]
+    return MobileUseContext.model_construct(
+        ui_index=IndexedHierarchy(elements, width=1080, height=2000)
+    )
+
+
+def test_unique_match_is_resolved_to_center_coordinates():
+    resolved = resolve_selector_request(_get_ctx(), IdSelectorRequest(id="com.example:id/search"))
+
+    assert isinstance(resolved, tuple)
+    selector_request, index = resolved
+    assert isinstance(selector_request, SelectorRequestWithCoordinates)
+    assert selector_request.coordinates.to_str() == "540, 150"
+    assert index is None
+
+
+def test_id_with_text_and_index_disambiguate():
+    ctx = _get_ctx()
+    by_text = resolve_selector_request(
+        ctx, IdWithTextSelectorRequest(id="com.example:id/row", text="Bob")
+    )
+    by_index = resolve_selector_request(ctx, IdSelectorRequest(id="com.example:id/row"), index=1)
+
+    assert isinstance(by_text, tuple) and isinstance(by_index, tuple)
+    assert by_text[0] == by_index[0]
+
+
+def test_ambiguous_match_fails_with_candidates():
+    resolved = resolve_selector_request(_get_ctx(), IdSelectorRequest(id="com.example:id/row"))
+
+    assert isinstance(resolved, dict)
+    assert "2 elements match" in resolved["error"]
+    assert "index=1: {resourceId='com.example:id/row', text='Bob'}" in resolved["error"]
+
+
+def test_missing_match_fails_with_suggestions():
+    resolved = resolve_selector_request(_get_ctx(), TextSelectorRequest(text="Serach"))
+
+    assert isinstance(resolved, dict)
+    assert "Closest candidates: text='Search'" in resolved["error"]
+
+
+def test_text_is_matched_as_a_regex():
+    resolved = resolve_selector_request(_get_ctx(), TextSelectorRequest(text="Ali.*"))
+
+    assert isinstance(resolved, tuple)
+    assert resolved[0].to_dict() == {"point": "540, 350"}
+
+
+def test_selector_is_untouched_without_hierarchy():
+    selector_request = TextSelectorRequest(text="Unknown")
+
+    resolved = resolve_selector_request(MobileUseContext.model_construct(), selector_request)
+
+    assert resolved == (selector_request, None)
+
+
+def test_index_picks_among_all_the_matches_as_maestro_does():
+    # A row container and its label share their bounds, and both match the text
+    elements = [
+        _element("com.example:id/row", "Alice", 300),
+        _element("com.example:id/label", "Alice", 300),
+        _element("com.example:id/row", "Alice", 400),
+    ]
+    ctx = MobileUseContext.model_construct(
+        ui_index=IndexedHierarchy(elements, width=1080, height=2000)
+    )
+
+    ambiguous = resolve_selector_request(ctx, TextSelectorRequest(text="Alice"))
+    by_index = resolve_selector_request(ctx, TextSelectorRequest(text="Alice"), index=2)
+
+    assert isinstance(ambiguous, dict)
+    assert "index=0:" in ambiguous["error"] and "index=2:" in ambiguous["error"]
+    assert "index=1:" not in ambiguous["error"]
+    assert isinstance(by_index, tuple)
+    assert by_index[0].to_dict() == {"point": "540, 450"}
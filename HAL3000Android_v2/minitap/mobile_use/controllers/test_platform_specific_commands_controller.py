@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from minitap.mobile_use.context import DeviceContext, DevicePlatform, MobileUseContext
+from minitap.mobile_use.controllers import platform_specific_commands_controller
+from minitap.mobile_use.controllers.platform_specific_commands_controller import (
+    DEVICE_DATE_FORMAT,
+    get_device_date,
+    parse_device_clock,
+)
+
+
+def test_device_clock_offset_is_measured_at_the_middle_of_the_call():
+    clock = parse_device_clock(
+        "1760000100 +0200 CEST\n", requested_at=1760000000, received_at=1760000002
+    )
+
+    assert clock.offset_seconds == 99
+    assert clock.tz.utcoffset(None) == timedelta(hours=2)
+    assert clock.synced_at == 1760000002
+
+
+def test_device_clock_formats_like_the_date_command():
+    clock = parse_device_clock("1760000000 -0530 XYZ", requested_at=0, received_at=0)
+
+    date = clock.now()
+    assert date.utcoffset() == -timedelta(hours=5, minutes=30)
+    assert date.strftime(DEVICE_DATE_FORMAT).split()[4] == "XYZ"
+
+
+class OldToolboxDevice:
+    """Device whose `date` command ignores its format."""
+
+    def __init__(self):
+        self.commands: list[str] = []
+
+    def shell(self, command: str) -> str:
+        self.commands.append(command)
+        return "Mon Oct 13 10:00:00 CEST 2025"
+
+
+def test_unparsable_device_clocks_are_not_asked_again_every_step(monkeypatch):
+    device = OldToolboxDevice()
+    monkeypatch.setattr(platform_specific_commands_controller, "get_adb_device", lambda _: device)
+    ctx = MobileUseContext.model_construct(
+        device=DeviceContext.model_construct(
+            device_id="old-toolbox", mobile_platform=DevicePlatform.ANDROID
+        )
+    )
+
+    dates = [get_device_date(ctx) for _ in range(3)]
+
+    assert dates == ["Mon Oct 13 10:00:00 CEST 2025"] * 3
+    assert device.commands == ["date +'%s %z %Z'", "date", "date", "date"]
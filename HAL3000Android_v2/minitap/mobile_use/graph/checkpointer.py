@@ -0,0 +1,85 @@
+"""
+Durable checkpoints of the graph state, so that a long task can be resumed after a crash.
+
+LangGraph saves the state after every node in the checkpointer of the task request: a local
+SQLite database by default, or any other LangGraph checkpointer. The state only holds references
+to the screenshots and UI hierarchies, which are written once to the blob store of the task,
+next to the database, so that each checkpoint stays small.
+
+The checkpoints and blobs of a task are deleted once it completes. Those of a failed or cancelled
+task are kept for it to be resumed, until it completes or they are deleted with
+`Agent.delete_task_checkpoints`.
+"""
+
+import shutil
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph.state import CompiledStateGraph
+from langchain_core.runnables import RunnableConfig
+
+from minitap.mobile_use.graph.state import State
+from minitap.mobile_use.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Node refreshing the screen context of the state, from the device
+SCREEN_CONTEXT_NODE = "contextor"
+
+
+@asynccontextmanager
+async def open_checkpointer(
+    checkpoint_path: Path | None, checkpointer: BaseCheckpointSaver | None = None
+) -> AsyncIterator[BaseCheckpointSaver | None]:
+    """The given checkpointer, or the SQLite one of the path, None when not checkpointing."""
+    if checkpointer is not None or checkpoint_path is None:
+        yield checkpointer
+        return
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(str(checkpoint_path)) as sqlite_checkpointer:
+        yield sqlite_checkpointer
+
+
+def get_checkpoint_config(task_id: str) -> RunnableConfig:
+    """The checkpoints of a task are saved in the thread of its id."""
+    return {"configurable": {"thread_id": task_id}}
+
+
+def get_blobs_directory(checkpoint_path: Path, task_id: str) -> Path:
+    """Directory of the blobs of a task, next to the checkpoint database."""
+    return checkpoint_path.parent / f"{checkpoint_path.stem}-blobs" / task_id
+
+
+async def delete_checkpoints(
+    checkpointer: BaseCheckpointSaver, task_id: str, blobs_directory: Path | None = None
+):
+    """Deletes the checkpoints of a task, and the blobs they reference."""
+    await checkpointer.adelete_thread(task_id)
+    if blobs_directory is not None:
+        shutil.rmtree(blobs_directory, ignore_errors=True)
+
+
+async def get_resumable_state(
+    graph: CompiledStateGraph,
+    config: RunnableConfig,
+    refresh_screen_context: Callable[[State], Awaitable[dict]],
+) -> State | None:
+    """
+    The last checkpointed state of the task, None if it has none.
+
+    Unless the Contextor runs next, the screen context of the state is refreshed first: the
+    device may have changed since the checkpoint. The refresh is saved as an update of the last
+    completed node, so the task continues from the node that was about to run.
+    """
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        return None
+    state = State(**snapshot.values)
+    if snapshot.next and snapshot.next[0] != SCREEN_CONTEXT_NODE:
+        logger.info(f"Refreshing the screen context before resuming at {snapshot.next[0]}")
+        updated_config = await graph.aupdate_state(config, await refresh_screen_context(state))
+        state = State(**(await graph.aget_state(updated_config)).values)
+    return state
@@ -3,12 +3,14 @@ from typing import Literal
 from langchain_core.messages import (
     AIMessage,
 )
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.constants import END, START
 from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from minitap.mobile_use.agents.contextor.contextor import ContextorNode
 from minitap.mobile_use.agents.cortex.cortex import CortexNode
+from minitap.mobile_use.agents.cortex.fast_cortex import FastCortexNode
 from minitap.mobile_use.agents.executor.executor import ExecutorNode
 from minitap.mobile_use.agents.executor.tool_node import ExecutorToolNode
 from minitap.mobile_use.agents.orchestrator.orchestrator import OrchestratorNode
@@ -19,6 +21,7 @@ from minitap.mobile_use.agents.planner.utils import (
     one_of_them_is_failure,
 )
 from minitap.mobile_use.agents.summarizer.summarizer import SummarizerNode
+from minitap.mobile_use.config import GraphMode
 from minitap.mobile_use.constants import EXECUTOR_MESSAGES_KEY
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.graph.state import State
@@ -89,7 +92,23 @@ def post_executor_gate(
     return "skip"
 
 
-async def get_graph(ctx: MobileUseContext) -> CompiledStateGraph:
+def post_fast_cortex_gate(
+    state: State,
+) -> Literal["invoke_tools", "end_subgoal", "skip"]:
+    logger.info("Starting post_fast_cortex_gate")
+    if len(state.complete_subgoals_by_ids) > 0:
+        return "end_subgoal"
+    return post_executor_gate(state)
+
+
+async def get_graph(
+    ctx: MobileUseContext,
+    mode: GraphMode = "two_stage",
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> CompiledStateGraph:
+    if mode == "fast":
+        return get_fast_graph(ctx, checkpointer=checkpointer)
+
     graph_builder = StateGraph(State)
 
     ## Define nodes
@@ -146,4 +165,58 @@ async def get_graph(ctx: MobileUseContext) -> CompiledStateGraph:
     )
     graph_builder.add_edge("planner", "cortex")
 
-    return graph_builder.compile()
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
+def get_fast_graph(
+    ctx: MobileUseContext, checkpointer: BaseCheckpointSaver | None = None
+) -> CompiledStateGraph:
+    """
+    Single-call graph: the fast Cortex sees the screen and emits the tool calls directly,
+    feeding the same tools, summarizer and orchestrator path as the two stage graph.
+    """
+    graph_builder = StateGraph(State)
+
+    graph_builder.add_node("planner", PlannerNode(ctx))
+    graph_builder.add_node("orchestrator", OrchestratorNode(ctx))
+    graph_builder.add_node("contextor", ContextorNode(ctx))
+    graph_builder.add_node("fast_cortex", FastCortexNode(ctx))
+    executor_tool_node = ExecutorToolNode(
+        tools=get_tools_from_wrappers(ctx=ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS),
+        messages_key=EXECUTOR_MESSAGES_KEY,
+    )
+    graph_builder.add_node("executor_tools", executor_tool_node)
+    graph_builder.add_node("summarizer", SummarizerNode(ctx))
+
+    graph_builder.add_edge(START, "contextor")
+    graph_builder.add_conditional_edges(
+        "contextor",
+        post_contextor_gate,
+        {
+            "cortex": "fast_cortex",
+            "planner": "planner",
+        },
+    )
+    graph_builder.add_edge("planner", "fast_cortex")
+    graph_builder.add_conditional_edges(
+        "fast_cortex",
+        post_fast_cortex_gate,
+        {
+            "invoke_tools": "executor_tools",
+            "end_subgoal": "orchestrator",
+            "skip": "summarizer",
+        },
+    )
+    graph_builder.add_edge("executor_tools", "summarizer")
+    graph_builder.add_edge("summarizer", "orchestrator")
+    graph_builder.add_conditional_edges(
+        "orchestrator",
+        post_orchestrator_gate,
+        {
+            "continue": "contextor",
+            "replan": "planner",
+            "end": END,
+        },
+    )
+
+    return graph_builder.compile(checkpointer=checkpointer)
@@ -5,8 +5,10 @@ from typing import Annotated
 
 from minitap.mobile_use.agents.planner.types import Subgoal
 from minitap.mobile_use.config import AgentNode
+from minitap.mobile_use.services.blob_store import BlobRef
 from minitap.mobile_use.utils.logger import get_logger
 from minitap.mobile_use.utils.recorder import record_interaction
+from minitap.mobile_use.utils.screen_fingerprint import ScreenFingerprint
 from minitap.mobile_use.context import MobileUseContext
 
 logger = get_logger(__name__)
@@ -22,15 +24,28 @@ class State(AgentStatePydantic):
 
     # orchestrator related keys
     subgoal_plan: Annotated[list[Subgoal], "The current plan, made of subgoals"]
+    cached_plan_id: Annotated[
+        int | None, "Entry of the plan cache the current plan comes from", take_last
+    ] = None
+    cached_plan_failed: Annotated[
+        bool,
+        "Whether the cached plan failed and was replanned, its entry keeping the failure recorded",
+        take_last,
+    ] = False
 
     # contextor related keys
-    latest_screenshot_base64: Annotated[str | None, "Latest screenshot of the device", take_last]
+    latest_screenshot_base64: Annotated[
+        BlobRef | None, "Reference to the latest base64 screenshot of the device", take_last
+    ]
     latest_ui_hierarchy: Annotated[
-        list[dict] | None, "Latest UI hierarchy of the device", take_last
+        BlobRef | None, "Reference to the latest UI hierarchy of the device", take_last
     ]
     focused_app_info: Annotated[str | None, "Focused app info", take_last]
     device_date: Annotated[str | None, "Date of the device", take_last]
     screen_analysis: Annotated[str | None, "Vision-based analysis of current screen state", take_last] = None
+    screen_fingerprint: Annotated[
+        ScreenFingerprint | None, "Identity of the latest screen, to recognize it", take_last
+    ] = None
 
     # cortex related keys
     structured_decisions: Annotated[
@@ -43,6 +58,11 @@ class State(AgentStatePydantic):
         "List of subgoal IDs to complete",
         take_last,
     ]
+    cortex_completed_subgoals: Annotated[
+        bool,
+        "Whether the subgoals to complete were declared completed by the cortex itself",
+        take_last,
+    ] = False
 
     # executor related keys
     executor_messages: Annotated[list[AnyMessage], "Sequential Executor messages", add_messages]
@@ -58,6 +78,17 @@ class State(AgentStatePydantic):
     # HAL3000Android: Execution depth tracking to detect parallel execution
     execution_depth: Annotated[int, "Current execution depth counter", take_last] = 0
 
+    def get_latest_screenshot_base64(self) -> str | None:
+        if self.latest_screenshot_base64 is None:
+            return None
+        return self.latest_screenshot_base64.load_text()
+
+    def get_latest_ui_hierarchy(self) -> list[dict] | None:
+        """The latest UI hierarchy, shared with the other readers: it must not be modified."""
+        if self.latest_ui_hierarchy is None:
+            return None
+        return self.latest_ui_hierarchy.load_json()
+
     def sanitize_update(
         self,
         ctx: MobileUseContext,
@@ -0,0 +1,148 @@
+import asyncio
+
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.constants import END, START
+from langgraph.graph import StateGraph
+
+from minitap.mobile_use.graph.checkpointer import (
+    delete_checkpoints,
+    get_blobs_directory,
+    get_checkpoint_config,
+    get_resumable_state,
+    open_checkpointer,
+)
+from minitap.mobile_use.graph.state import State
+from minitap.mobile_use.services.blob_store import BlobStore
+
+SCREENSHOT = "a" * 1_000_000
+
+
+def _get_initial_state() -> dict:
+    return State(
+        messages=[],
+        initial_goal="Open the settings",
+        subgoal_plan=[],
+        latest_ui_hierarchy=None,
+        latest_screenshot_base64=None,
+        focused_app_info=None,
+        device_date=None,
+        structured_decisions=None,
+        complete_subgoals_by_ids=[],
+        agents_thoughts=[],
+        remaining_steps=10,
+        executor_messages=[],
+        cortex_last_thought=None,
+    ).model_dump()
+
+
+def _build_graph(store: BlobStore, executed: list[str], crash: bool):
+    def contextor(state: State):
+        return {"latest_screenshot_base64": store.put_text(SCREENSHOT), "focused_app_info": "old"}
+
+    def cortex(state: State):
+        executed.append("cortex")
+        return {"cortex_last_thought": "Tap on Settings"}
+
+    def executor(state: State):
+        if crash:
+            raise RuntimeError("Device disconnected")
+        executed.append(f"executor on {state.focused_app_info}")
+        return {}
+
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("contextor", contextor)
+    graph_builder.add_node("cortex", cortex)
+    graph_builder.add_node("executor", executor)
+    graph_builder.add_edge(START, "contextor")
+    graph_builder.add_edge("contextor", "cortex")
+    graph_builder.add_edge("cortex", "executor")
+    graph_builder.add_edge("executor", END)
+    return graph_builder
+
+
+def test_crashed_tasks_resume_after_the_last_completed_node(tmp_path):
+    checkpoint_path = tmp_path / "checkpoints.sqlite"
+    config = get_checkpoint_config("task")
+    executed: list[str] = []
+
+    async def crash():
+        store = BlobStore(store_id="task", directory=get_blobs_directory(checkpoint_path, "task"))
+        try:
+            async with open_checkpointer(checkpoint_path) as checkpointer:
+                graph = _build_graph(store, executed, crash=True).compile(checkpointer=checkpointer)
+                await graph.ainvoke(_get_initial_state(), config)
+        except RuntimeError:
+            pass
+        finally:
+            store.close()
+
+    async def refresh_screen_context(state: State) -> dict:
+        return {"focused_app_info": "fresh"}
+
+    async def resume():
+        store = BlobStore(store_id="task", directory=get_blobs_directory(checkpoint_path, "task"))
+        try:
+            async with open_checkpointer(checkpoint_path) as checkpointer:
+                graph = _build_graph(store, executed, crash=False).compile(
+                    checkpointer=checkpointer
+                )
+                state = await get_resumable_state(graph, config, refresh_screen_context)
+                assert state is not None
+                assert state.focused_app_info == "fresh"
+                assert state.get_latest_screenshot_base64() == SCREENSHOT
+                await graph.ainvoke(None, config)
+        finally:
+            store.close()
+
+    asyncio.run(crash())
+    asyncio.run(resume())
+
+    assert executed == ["cortex", "executor on fresh"]
+    # The checkpoints only reference the screenshot
+    assert checkpoint_path.stat().st_size < len(SCREENSHOT) // 10
+
+
+def test_tasks_without_checkpoints_cannot_be_resumed(tmp_path):
+    async def resume():
+        async with open_checkpointer(tmp_path / "checkpoints.sqlite") as checkpointer:
+            graph = _build_graph(BlobStore(), [], crash=False).compile(checkpointer=checkpointer)
+            return await get_resumable_state(
+                graph,
+                get_checkpoint_config("unknown"),
+                refresh_screen_context=None,  # type: ignore
+            )
+
+    assert asyncio.run(resume()) is None
+
+
+def test_deleted_checkpoints_take_their_blobs_along(tmp_path):
+    checkpoint_path = tmp_path / "checkpoints.sqlite"
+    blobs_directory = get_blobs_directory(checkpoint_path, "task")
+    config = get_checkpoint_config("task")
+
+    async def run_and_delete():
+        store = BlobStore(store_id="task", directory=blobs_directory)
+        try:
+            async with open_checkpointer(checkpoint_path) as checkpointer:
+                graph = _build_graph(store, [], crash=False).compile(checkpointer=checkpointer)
+                await graph.ainvoke(_get_initial_state(), config)
+                assert any(blobs_directory.iterdir())
+                await delete_checkpoints(checkpointer, "task", blobs_directory=blobs_directory)
+                return await graph.aget_state(config)
+        finally:
+            store.close()
+
+    assert not asyncio.run(run_and_delete()).values
+    assert not blobs_directory.exists()
+
+
+def test_the_sqlite_checkpointer_sets_up_its_connection(tmp_path):
+    # AsyncSqliteSaver.setup checks its connection with Connection.is_alive, that aiosqlite 0.22
+    # removed: the dependency is capped below it
+    async def set_up():
+        async with open_checkpointer(tmp_path / "checkpoints.sqlite") as checkpointer:
+            assert isinstance(checkpointer, AsyncSqliteSaver)
+            await checkpointer.setup()
+            return checkpointer.conn.is_alive()
+
+    assert asyncio.run(set_up())
@@ -1,13 +1,15 @@
 import asyncio
 import os
+from enum import Enum
 
 import typer
 from adbutils import AdbClient
 from langchain.callbacks.base import Callbacks
 from rich.console import Console
-from typing import Annotated
+from typing import Annotated, cast
 
 from minitap.mobile_use.config import (
+    GraphMode,
     initialize_llm_config,
     settings,
 )
@@ -21,15 +23,23 @@ app = typer.Typer(add_completion=False, pretty_exceptions_enable=False)
 logger = get_logger(__name__)
 
 
+class GraphModeOption(str, Enum):
+    """Choices of the --graph-mode option, the values of `GraphMode`."""
+
+    TWO_STAGE = "two_stage"
+    FAST = "fast"
+
+
 async def run_automation(
     goal: str,
     test_name: str | None = None,
     traces_output_path_str: str = "traces",
     output_description: str | None = None,
     graph_config_callbacks: Callbacks = [],
+    graph_mode: GraphMode = "two_stage",
 ):
     llm_config = initialize_llm_config()
-    agent_profile = AgentProfile(name="default", llm_config=llm_config)
+    agent_profile = AgentProfile(name="default", llm_config=llm_config, graph_mode=graph_mode)
     config = Builders.AgentConfig.with_default_profile(profile=agent_profile)
 
     if settings.ADB_HOST:
@@ -45,6 +55,7 @@ async def run_automation(
     agent.init(
         retry_count=int(os.getenv("MOBILE_USE_HEALTH_RETRIES", 5)),
         retry_wait_seconds=int(os.getenv("MOBILE_USE_HEALTH_DELAY", 2)),
+        warm_up_llm_clients=True,
     )
 
     task = agent.new_task(goal)
@@ -97,6 +108,17 @@ def main(
             ),
         ),
     ] = None,
+    graph_mode: Annotated[
+        GraphModeOption,
+        typer.Option(
+            "--graph-mode",
+            "-g",
+            help=(
+                "two_stage: the Cortex decides and the Executor calls the tools. "
+                "fast: the Cortex calls the tools itself, in a single LLM call per step."
+            ),
+        ),
+    ] = GraphModeOption.TWO_STAGE,
 ):
     """
     Run the Mobile-use agent to automate tasks on a mobile device.
@@ -113,6 +135,7 @@ def main(
             test_name=test_name,
             traces_output_path_str=traces_path,
             output_description=output_description,
+            graph_mode=cast(GraphMode, graph_mode.value),
         )
     )
 
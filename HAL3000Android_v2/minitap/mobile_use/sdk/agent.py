@@ -3,6 +3,7 @@ import sys
 import tempfile
 import time
 import uuid
+from contextlib import AsyncExitStack
 from datetime import datetime
 from pathlib import Path
 from shutil import which
@@ -10,13 +11,19 @@ from types import NoneType
 from typing import TypeVar, overload
 
 from adbutils import AdbClient
-from langchain_core.messages import AIMessage
+from langchain_core.callbacks import BaseCallbackHandler, Callbacks
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel
 
+from minitap.mobile_use.agents.contextor.contextor import ContextorNode
+from minitap.mobile_use.agents.cortex.streaming import cancel_pending_cortex_output
 from minitap.mobile_use.agents.outputter.outputter import outputter
+from minitap.mobile_use.agents.planner.utils import all_completed
 from minitap.mobile_use.clients.device_hardware_client import DeviceHardwareClient
 from minitap.mobile_use.clients.screen_api_client import ScreenApiClient
 from minitap.mobile_use.config import OutputConfig, record_events
+from minitap.mobile_use.constants import EXECUTOR_MESSAGES_KEY
 from minitap.mobile_use.context import (
     DeviceContext,
     DevicePlatform,
@@ -28,6 +35,13 @@ from minitap.mobile_use.controllers.mobile_command_controller import (
     get_screen_data,
 )
 from minitap.mobile_use.controllers.platform_specific_commands_controller import get_first_device
+from minitap.mobile_use.graph.checkpointer import (
+    delete_checkpoints,
+    get_blobs_directory,
+    get_checkpoint_config,
+    get_resumable_state,
+    open_checkpointer,
+)
 from minitap.mobile_use.graph.graph import get_graph
 from minitap.mobile_use.graph.state import State
 from minitap.mobile_use.sdk.builders.agent_config_builder import get_default_agent_config
@@ -52,13 +66,26 @@ from minitap.mobile_use.servers.start_servers import (
     start_device_screen_api,
 )
 from minitap.mobile_use.servers.stop_servers import stop_servers
+from minitap.mobile_use.services.llm import (
+    get_rate_limiters,
+    warm_up_llm_clients,
+)
+from minitap.mobile_use.services.rate_limiter import llm_caller_id
+from minitap.mobile_use.services.blob_store import BlobStore
+from minitap.mobile_use.services.llm_cache import get_llm_response_cache
+from minitap.mobile_use.services.foreground_app import stop_foreground_app_watchers
+from minitap.mobile_use.services.plan_cache import CachedSubgoal, get_plan_cache
+from minitap.mobile_use.services.llm_replay import get_llm_recorder
+from minitap.mobile_use.utils.llm_usage import LLMUsageTracker
 from minitap.mobile_use.utils.logger import get_logger
 from minitap.mobile_use.utils.media import (
     create_gif_from_trace_folder,
     create_steps_json_from_trace_folder,
     remove_images_from_trace_folder,
     remove_steps_json_from_trace_folder,
+    write_llm_usage_to_trace_folder,
 )
+from minitap.mobile_use.utils.prompt_cache import PromptCacheStats
 from minitap.mobile_use.utils.recorder import log_agent_thought
 
 logger = get_logger(__name__)
@@ -66,6 +93,40 @@ logger = get_logger(__name__)
 TOutput = TypeVar("TOutput", bound=BaseModel | None)
 
 
+def _count_tool_messages(update: dict | list | None) -> int:
+    """Tool messages of a tools node update, made of one or several (Command) updates."""
+    updates = update if isinstance(update, list) else [update]
+    return sum(
+        isinstance(message, ToolMessage)
+        for update in updates
+        if isinstance(update, dict)
+        for message in update.get(EXECUTOR_MESSAGES_KEY, [])
+    )
+
+
+def _record_plan_outcome(ctx: MobileUseContext, state: State | None):
+    """
+    Records the outcome of the cached plan of a task that ran to its end, or caches its successful
+    plan. The replan of a failed cached plan is not cached, the entry keeping the failure recorded
+    by the Planner.
+    """
+    plan_cache = get_plan_cache()
+    if plan_cache is None or state is None or not state.subgoal_plan or state.cached_plan_failed:
+        return
+    succeeded = all_completed(state.subgoal_plan)
+    if state.cached_plan_id is not None:
+        plan_cache.record_outcome(state.cached_plan_id, success=succeeded)
+    elif succeeded:
+        plan_cache.add(
+            goal=state.initial_goal,
+            platform=ctx.device.mobile_platform.value,
+            subgoals=[
+                CachedSubgoal(id=subgoal.id, description=subgoal.description)
+                for subgoal in state.subgoal_plan
+            ],
+        )
+
+
 class Agent:
     _config: AgentConfig
     _tasks: list[Task] = []
@@ -77,6 +138,8 @@ class Agent:
     _screen_api_client: ScreenApiClient
     _hw_bridge_client: DeviceHardwareClient
     _adb_client: AdbClient | None
+    _llm_warm_up_pending: bool = False
+    _llm_warm_up_task: asyncio.Task | None = None
 
     def __init__(self, config: AgentConfig | None = None):
         self._config = config or get_default_agent_config()
@@ -95,7 +158,16 @@ class Agent:
         server_restart_attempts: int = 3,
         retry_count: int = 5,
         retry_wait_seconds: int = 5,
+        warm_up_llm_clients: bool = False,
     ):
+        """
+        Starts the servers and connects to the device.
+
+        Args:
+            warm_up_llm_clients: Open the connections to the LLM providers of every profile
+                ahead of the first inference. When called outside of an event loop, the warm-up
+                starts along with the first task.
+        """
         if not which("adb"):
             raise ExecutableNotFoundError("adb")
         if self._is_default_hw_bridge and not which("maestro"):
@@ -150,10 +222,30 @@ class Agent:
 
         self._device_context = self._get_device_context(device_id=device_id, platform=platform)
         logger.info(self._device_context.to_str())
+        if warm_up_llm_clients:
+            self._llm_warm_up_pending = True
+            try:
+                asyncio.get_running_loop()
+                self._start_llm_warm_up()
+            except RuntimeError:
+                # No running event loop: clients are bound to the loop the tasks will run in
+                pass
         logger.info("✅ Mobile-use agent initialized.")
         self._initialized = True
         return True
 
+    def _start_llm_warm_up(self):
+        self._llm_warm_up_pending = False
+        llm_configs = {id(p.llm_config): p.llm_config for p in self._config.agent_profiles.values()}
+        llm_configs.setdefault(
+            id(self._config.default_profile.llm_config), self._config.default_profile.llm_config
+        )
+
+        async def warm_up():
+            await asyncio.gather(*(warm_up_llm_clients(c) for c in llm_configs.values()))
+
+        self._llm_warm_up_task = asyncio.create_task(warm_up())
+
     def new_task(self, goal: str):
         return TaskRequestBuilder[None].from_common(
             goal=goal,
@@ -221,9 +313,59 @@ class Agent:
             task_request.with_name(name=name)
         return await self._run_task(task_request.build())
 
-    async def _run_task(self, request: TaskRequest[TOutput]) -> str | dict | TOutput | None:
+    async def resume_task(
+        self, task_id: str, request: TaskRequest[TOutput] | None = None
+    ) -> str | dict | TOutput | None:
+        """
+        Resumes a checkpointed task from its last completed node, once the screen context is
+        refreshed from the device.
+
+        Args:
+            task_id: Id of the task to resume
+            request: Request the task was run with, required when it was run by another process,
+                     its checkpoints being read from the same checkpointer
+        """
+        request = self._get_checkpointed_request(task_id, request)
+        return await self._run_task(request, resume_task_id=task_id)
+
+    async def delete_task_checkpoints(
+        self, task_id: str, request: TaskRequest[TOutput] | None = None
+    ):
+        """
+        Deletes the checkpoints of a failed or cancelled task which will not be resumed, those of
+        completed tasks being deleted once they complete.
+
+        Args:
+            task_id: Id of the task
+            request: Request the task was run with, required when it was run by another process
+        """
+        request = self._get_checkpointed_request(task_id, request)
+        async with open_checkpointer(request.checkpoint_path, request.checkpointer) as checkpointer:
+            await delete_checkpoints(
+                checkpointer,  # type: ignore
+                task_id,
+                blobs_directory=_get_blobs_directory(request, task_id),
+            )
+
+    def _get_checkpointed_request(
+        self, task_id: str, request: TaskRequest[TOutput] | None
+    ) -> TaskRequest[TOutput]:
+        if request is None:
+            task = next((task for task in self._tasks if task.id == task_id), None)
+            if task is None:
+                raise AgentTaskRequestError(f"Task {task_id} is unknown: its request is required")
+            request = task.request
+        if request.checkpoint_path is None and request.checkpointer is None:
+            raise AgentTaskRequestError(f"Task {task_id} is not checkpointed")
+        return request
+
+    async def _run_task(
+        self, request: TaskRequest[TOutput], resume_task_id: str | None = None
+    ) -> str | dict | TOutput | None:
         if not self._initialized:
             raise AgentNotInitializedError()
+        if self._llm_warm_up_pending:
+            self._start_llm_warm_up()
 
         if request.profile:
             agent_profile = self._config.agent_profiles.get(request.profile)
@@ -234,21 +376,25 @@ class Agent:
         logger.info(str(agent_profile))
 
         task = Task(
-            id=str(uuid.uuid4()),
+            id=resume_task_id or str(uuid.uuid4()),
             device=self._device_context,
             status=TaskStatus.PENDING,
             request=request,
             created_at=datetime.now(),
+            graph_mode=request.graph_mode or agent_profile.graph_mode,
         )
+        self._tasks = [previous for previous in self._tasks if previous.id != task.id]
         self._tasks.append(task)
         task_name = task.get_name()
 
+        blob_store = BlobStore(store_id=task.id, directory=_get_blobs_directory(request, task.id))
         context = MobileUseContext(
             device=self._device_context,
             hw_bridge_client=self._hw_bridge_client,
             screen_api_client=self._screen_api_client,
             adb_client=self._adb_client,
             llm_config=agent_profile.llm_config,
+            blob_store=blob_store,
         )
 
         self._prepare_tracing(task=task, context=context)
@@ -262,22 +408,49 @@ class Agent:
             )
             logger.info(str(output_config))
 
-        logger.info(f"[{task_name}] Starting graph with goal: `{request.goal}`")
-        state = self._get_graph_state(task=task)
-        graph_input = state.model_dump()
+        if resume_task_id is None:
+            logger.info(f"[{task_name}] Starting graph with goal: `{request.goal}`")
+            graph_input = self._get_graph_state(task=task).model_dump()
+        else:
+            logger.info(f"[{task_name}] Resuming graph with goal: `{request.goal}`")
+            graph_input = None
 
         last_state: State | None = None
         last_state_snapshot: dict | None = None
+        # Whether the graph ran to its end, the outcome of the plan being known
+        graph_ended = False
         output = None
+        prompt_cache_stats = PromptCacheStats()
+        llm_usage_tracker = LLMUsageTracker()
+        callbacks = self._get_graph_callbacks(prompt_cache_stats, llm_usage_tracker)
+        llm_caller_token = llm_caller_id.set(task.id)
+        checkpoints = AsyncExitStack()
+        checkpointer = None
         try:
+            checkpointer = await checkpoints.enter_async_context(
+                open_checkpointer(request.checkpoint_path, request.checkpointer)
+            )
+            graph = await get_graph(context, mode=task.graph_mode, checkpointer=checkpointer)
+            graph_config: RunnableConfig = {
+                "recursion_limit": task.request.max_steps,
+                "callbacks": callbacks,
+            }
+            if checkpointer is not None:
+                logger.info(f"[{task_name}] Checkpointing task {task.id}")
+                graph_config.update(get_checkpoint_config(task.id))
+            if resume_task_id is not None:
+                last_state = await get_resumable_state(
+                    graph, graph_config, refresh_screen_context=ContextorNode(context)
+                )
+                if last_state is None:
+                    raise AgentTaskRequestError(f"No checkpoint found for task {task.id}")
+                last_state_snapshot = last_state.model_dump()
+
             logger.info(f"[{task_name}] Invoking graph with input: {graph_input}")
             task.status = TaskStatus.RUNNING
-            async for chunk in (await get_graph(context)).astream(
+            async for chunk in graph.astream(
                 input=graph_input,
-                config={
-                    "recursion_limit": task.request.max_steps,
-                    "callbacks": self._config.graph_config_callbacks,
-                },
+                config=graph_config,
                 stream_mode=["messages", "custom", "updates", "values"],
             ):
                 stream_mode, payload = chunk
@@ -291,7 +464,9 @@ class Agent:
                         )
 
                 if stream_mode == "updates":
-                    for _, value in payload.items():  # type: ignore node name, node output
+                    for node, value in payload.items():  # type: ignore node name, node output
+                        if node == "executor_tools":
+                            task.actions_executed += _count_tool_messages(value)
                         if value and "agents_thoughts" in value:
                             new_thoughts = value["agents_thoughts"]
                             last_item = new_thoughts[-1] if new_thoughts else None
@@ -299,6 +474,7 @@ class Agent:
                                 log_agent_thought(
                                     agent_thought=last_item,
                                 )
+            graph_ended = True
 
             if not last_state:
                 err = f"[{task_name}] No result received from graph"
@@ -313,6 +489,7 @@ class Agent:
                 request=request,
                 output_config=output_config,
                 state=last_state,
+                callbacks=callbacks,
             )
             logger.info(f"✅ Automation '{task_name}' is success ✅")
             task.finalize(content=output, state=last_state_snapshot)
@@ -327,9 +504,60 @@ class Agent:
             task.finalize(content=output, state=last_state_snapshot, error=err)
             raise
         finally:
+            await cancel_pending_cortex_output(context)
+            task.llm_usage = llm_usage_tracker.get_usage()
+            minutes = (datetime.now() - task.created_at).total_seconds() / 60
+            logger.info(
+                f"[{task_name}] {task.graph_mode} graph: {task.status.value}, "
+                f"{task.actions_executed} actions in {minutes:.1f} min "
+                f"({task.actions_executed / minutes if minutes else 0:.1f} actions/min)"
+            )
+            for agent, usage in task.llm_usage.items():
+                logger.info(f"[{task_name}] LLM usage of {agent}: {usage}")
+            logger.info(f"[{task_name}] Prompt cache: {prompt_cache_stats}")
+            if (response_cache := get_llm_response_cache()) is not None:
+                logger.info(f"[{task_name}] LLM response cache: {response_cache}")
+            if (llm_recorder := get_llm_recorder()) is not None:
+                logger.info(f"[{task_name}] LLM recorder: {llm_recorder}")
+            for node, hedging_stats in context.hedging_stats.items():
+                logger.info(f"[{task_name}] Hedged {node} fallbacks: {hedging_stats}")
+            logger.info(f"[{task_name}] Executor: {context.decision_compiler_stats}")
+            logger.info(f"[{task_name}] Orchestrator: {context.orchestrator_stats}")
+            if (plan_cache := get_plan_cache()) is not None:
+                # A cancelled task or a crash does not tell whether the plan holds
+                if graph_ended:
+                    _record_plan_outcome(ctx=context, state=last_state)
+                logger.info(f"[{task_name}] Plan cache: {plan_cache}")
+            for name, rate_limiter in get_rate_limiters().items():
+                logger.info(f"[{task_name}] {name} rate limit: {rate_limiter}")
+            logger.info(f"[{task_name}] Blob store: {context.blob_store}")
+            llm_caller_id.reset(llm_caller_token)
             self._finalize_tracing(task=task, context=context)
+            context.blob_store.close()
+            if checkpointer is not None and task.status == TaskStatus.COMPLETED:
+                try:
+                    await delete_checkpoints(
+                        checkpointer,
+                        task.id,
+                        blobs_directory=_get_blobs_directory(request, task.id),
+                    )
+                except Exception as e:
+                    logger.warning(f"[{task_name}] Failed to delete the checkpoints: {e}")
+            await checkpoints.aclose()
         return output
 
+    def _get_graph_callbacks(self, *handlers: BaseCallbackHandler) -> Callbacks:
+        """The user provided graph callbacks, along with the built-in handlers."""
+        callbacks = self._config.graph_config_callbacks
+        if callbacks is None:
+            return list(handlers)
+        if isinstance(callbacks, list):
+            return [*callbacks, *handlers]
+        manager = callbacks.copy()
+        for handler in handlers:
+            manager.add_handler(handler, inherit=True)
+        return manager
+
     def clean(self, force: bool = False):
         if not self._initialized and not force:
             return
@@ -341,6 +569,7 @@ class Agent:
             logger.warning("Failed to stop Device Screen API.")
         if not hw_bridge_ok:
             logger.warning("Failed to stop Device Hardware Bridge.")
+        stop_foreground_app_watchers()
         self._initialized = False
         logger.info("✅ Mobile-use agent stopped.")
 
@@ -378,6 +607,7 @@ class Agent:
         logger.info(f"[{task_name}] Video created, removing dust...")
         remove_images_from_trace_folder(temp_trace_path)
         remove_steps_json_from_trace_folder(temp_trace_path)
+        write_llm_usage_to_trace_folder(temp_trace_path, task.llm_usage)
         logger.info(f"[{task_name}] 📽️ Trace compiled, moving to output path 📽️")
 
         output_folder_path = temp_trace_path.rename(traces_output_path / new_name).resolve()
@@ -396,6 +626,7 @@ class Agent:
         request: TaskRequest[TOutput],
         output_config: OutputConfig | None,
         state: State,
+        callbacks: Callbacks = None,
     ) -> str | dict | TOutput | None:
         if output_config and output_config.needs_structured_format():
             logger.info(f"[{task_name}] Generating structured output...")
@@ -404,6 +635,7 @@ class Agent:
                     ctx=ctx,
                     output_config=output_config,
                     graph_output=state,
+                    callbacks=callbacks,
                 )
                 logger.info(f"[{task_name}] Structured output: {structured_output}")
                 record_events(output_path=request.llm_output_path, events=structured_output)
@@ -531,6 +763,13 @@ class Agent:
         )
 
 
+def _get_blobs_directory(request: TaskRequest, task_id: str) -> Path | None:
+    """Kept next to the SQLite checkpoints, which only reference the screenshots and hierarchies."""
+    if request.checkpoint_path is None or request.checkpointer is not None:
+        return None
+    return get_blobs_directory(request.checkpoint_path, task_id)
+
+
 def _validate_and_prepare_file(file_path: Path):
     path_obj = Path(file_path)
     if path_obj.exists() and path_obj.is_dir():
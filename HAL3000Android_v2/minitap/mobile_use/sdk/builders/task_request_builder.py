@@ -13,8 +13,10 @@ else:
     except ImportError:
         from typing_extensions import Self
 
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from pydantic import BaseModel
 
+from minitap.mobile_use.config import GraphMode
 from minitap.mobile_use.constants import RECURSION_LIMIT
 from minitap.mobile_use.sdk.types.agent import AgentProfile
 from minitap.mobile_use.sdk.types.task import TaskRequest, TaskRequestCommon
@@ -35,6 +37,9 @@ class TaskRequestCommonBuilder(BaseModel):
         self._trace_path = Path("mobile-use-traces")
         self._llm_output_path: Path | None = None
         self._thoughts_output_path: Path | None = None
+        self._graph_mode: GraphMode | None = None
+        self._checkpoint_path: Path | None = None
+        self._checkpointer: BaseCheckpointSaver | None = None
 
     def with_max_steps(self, max_steps: int) -> Self:
         """
@@ -81,6 +86,35 @@ class TaskRequestCommonBuilder(BaseModel):
         self._thoughts_output_path = Path(path)
         return self
 
+    def with_graph_mode(self, graph_mode: GraphMode) -> Self:
+        """
+        Set the graph running the task, instead of the one of its profile.
+
+        Args:
+            graph_mode: "two_stage" (Cortex then Executor) or "fast" (single tool-calling Cortex)
+        """
+        self._graph_mode = graph_mode
+        return self
+
+    def with_checkpointing(
+        self, path: str | None = None, checkpointer: BaseCheckpointSaver | None = None
+    ) -> Self:
+        """
+        Checkpoint the graph state after every node, so that the task can be resumed with
+        `Agent.resume_task` after a crash. The checkpoints are deleted once the task completes,
+        and kept otherwise until deleted with `Agent.delete_task_checkpoints`.
+
+        Args:
+            path: SQLite database where to save the checkpoints
+                  (default: mobile-use-checkpoints.sqlite)
+            checkpointer: LangGraph checkpointer to use instead of the SQLite database
+        """
+        self._checkpointer = checkpointer
+        self._checkpoint_path = (
+            Path(path or "mobile-use-checkpoints.sqlite") if checkpointer is None else None
+        )
+        return self
+
     def build(self) -> TaskRequestCommon:
         """
         Build the TaskRequestCommon object.
@@ -97,6 +131,9 @@ class TaskRequestCommonBuilder(BaseModel):
             trace_path=self._trace_path,
             llm_output_path=self._llm_output_path,
             thoughts_output_path=self._thoughts_output_path,
+            graph_mode=self._graph_mode,
+            checkpoint_path=self._checkpoint_path,
+            checkpointer=self._checkpointer,
         )
 
 
@@ -135,6 +172,9 @@ class TaskRequestBuilder(TaskRequestCommonBuilder, Generic[TIn]):
         res._trace_path = common.trace_path
         res._llm_output_path = common.llm_output_path
         res._thoughts_output_path = common.thoughts_output_path
+        res._graph_mode = common.graph_mode
+        res._checkpoint_path = common.checkpoint_path
+        res._checkpointer = common.checkpointer
         return res
 
     def using_profile(self, profile: str | AgentProfile) -> "TaskRequestBuilder[TIn]":
@@ -222,5 +262,8 @@ class TaskRequestBuilder(TaskRequestCommonBuilder, Generic[TIn]):
             trace_path=self._trace_path,
             llm_output_path=self._llm_output_path,
             thoughts_output_path=self._thoughts_output_path,
+            graph_mode=self._graph_mode,
+            checkpoint_path=self._checkpoint_path,
+            checkpointer=self._checkpointer,
         )
         return task_request
@@ -7,12 +7,14 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, TypeVar, overload, Generic
 
-from pydantic import BaseModel, Field
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from pydantic import BaseModel, ConfigDict, Field
 
-from minitap.mobile_use.config import LLMConfig, get_default_llm_config
+from minitap.mobile_use.config import GraphMode, LLMConfig, get_default_llm_config
 from minitap.mobile_use.constants import RECURSION_LIMIT
 from minitap.mobile_use.context import DeviceContext
 from minitap.mobile_use.sdk.utils import load_llm_config_override
+from minitap.mobile_use.utils.llm_usage import LLMNodeUsage
 
 
 class AgentProfile(BaseModel):
@@ -22,16 +24,21 @@ class AgentProfile(BaseModel):
     Attributes:
         name: Name of the agent - used to reference the agent when running tasks.
         llm_config: LLM configuration for the agent.
+        graph_mode: Graph running the tasks of the profile: "two_stage" (the Cortex decides and
+                    the Executor calls the tools) or "fast" (the Cortex calls the tools itself).
     """
 
     name: str
     llm_config: LLMConfig = Field(default_factory=get_default_llm_config)
+    graph_mode: GraphMode = "two_stage"
 
     @overload
-    def __init__(self, *, name: str, llm_config: LLMConfig): ...
+    def __init__(
+        self, *, name: str, llm_config: LLMConfig, graph_mode: GraphMode = "two_stage"
+    ): ...
 
     @overload
-    def __init__(self, *, name: str, from_file: str): ...
+    def __init__(self, *, name: str, from_file: str, graph_mode: GraphMode = "two_stage"): ...
 
     def __init__(
         self,
@@ -51,7 +58,7 @@ class AgentProfile(BaseModel):
         super().__init__(**kwargs)
 
     def __str__(self):
-        return f"Profile {self.name}:\n{self.llm_config}"
+        return f"Profile {self.name} ({self.graph_mode} graph):\n{self.llm_config}"
 
 
 class TaskStatus(str, Enum):
@@ -73,11 +80,16 @@ class TaskRequestCommon(BaseModel):
     Defines common parameters of a mobile automation task request.
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     max_steps: int = RECURSION_LIMIT
     record_trace: bool = False
     trace_path: Path = Path("mobile-use-traces")
     llm_output_path: Path | None = None
     thoughts_output_path: Path | None = None
+    graph_mode: GraphMode | None = None
+    checkpoint_path: Path | None = None
+    checkpointer: BaseCheckpointSaver | None = None
 
 
 TOutput = TypeVar('TOutput')
@@ -99,6 +111,9 @@ class TaskRequest(TaskRequestCommon, Generic[TOutput]):
         trace_path: Directory path to save trace data if recording is enabled
         llm_output_path: Path to save LLM output data
         thoughts_output_path: Path to save thoughts output data
+        graph_mode: Graph running the task, overriding the one of the profile
+        checkpoint_path: SQLite database where to checkpoint the task, to resume it after a crash
+        checkpointer: LangGraph checkpointer to use instead of the SQLite one
     """
 
     goal: str
@@ -155,6 +170,9 @@ class Task(BaseModel):
         request: User task request
         created_at: ISO timestamp when the task was created
         ended_at: ISO timestamp when the task ended
+        llm_usage: LLM usage (tokens, images, latency) of the task, per agent
+        graph_mode: Graph that ran the task
+        actions_executed: Number of tool calls executed on the device
     """
 
     id: str
@@ -164,6 +182,9 @@ class Task(BaseModel):
     created_at: datetime
     ended_at: datetime | None = None
     result: TaskResult | None = None
+    llm_usage: dict[str, LLMNodeUsage] = Field(default_factory=dict)
+    graph_mode: GraphMode = "two_stage"
+    actions_executed: int = 0
 
     def finalize(
         self,
@@ -172,6 +193,11 @@ class Task(BaseModel):
         error: str | None = None,
         cancelled: bool = False,
     ):
+        """
+        Ends the task with its result. The graph `state` is only read for the steps taken, and
+        not kept: its screenshot and UI hierarchy are references into the blob store of the
+        task, which can no longer be resolved once the task has ended.
+        """
         self.status = TaskStatus.COMPLETED if error is None else TaskStatus.FAILED
         if self.status == TaskStatus.FAILED and cancelled:
             self.status = TaskStatus.CANCELLED
@@ -1,11 +1,37 @@
 import asyncio
 import logging
-import re
+from collections.abc import Iterable
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from minitap.mobile_use.utils.spatial_index import IndexedHierarchy
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+UI_DUMP_CHUNK_SIZE = 64 * 1024
+
+_XML_START_MARKERS = (b"<?xml", b"<hierarchy")
+_HIERARCHY_END_TAG = b"</hierarchy>"
+
+# uiautomator node attribute -> Maestro element key
+_NODE_ATTRIBUTES_MAPPING = {
+    "text": "text",
+    "resource-id": "resourceId",
+    "content-desc": "accessibilityText",
+    "hint": "hintText",
+    "class": "className",
+    "package": "packageName",
+    "clickable": "clickable",
+    "long-clickable": "longClickable",
+    "enabled": "enabled",
+    "focused": "focused",
+    "checked": "checked",
+    "selected": "selected",
+    "scrollable": "scrollable",
+    "password": "password",
+}
+
 
 async def run_subprocess(command: str) -> tuple[str, str]:
     """
@@ -26,15 +52,166 @@ async def run_subprocess(command: str) -> tuple[str, str]:
     return stdout.decode(errors="ignore"), stderr.decode(errors="ignore")
 
 
-async def get_accessibility_tree(device_id: str | None = None) -> str:
+def node_to_element(attributes: dict[str, str]) -> dict:
+    """
+    Converts the attributes of a uiautomator `<node>` into the element schema returned by Maestro.
+    Boolean flags are kept as "true"/"false" strings, like Maestro does.
+    """
+    element = {
+        key: attributes.get(attribute, "")
+        for attribute, key in _NODE_ATTRIBUTES_MAPPING.items()
+        if attribute in attributes or key in ("text", "resourceId", "accessibilityText")
+    }
+    bounds = attributes.get("bounds", "")
+    try:
+        left_top, right_bottom = bounds[1:-1].split("][")
+        left, top = (int(v) for v in left_top.split(","))
+        right, bottom = (int(v) for v in right_bottom.split(","))
+        element["bounds"] = {"x": left, "y": top, "width": right - left, "height": bottom - top}
+    except ValueError:
+        pass
+    return element
+
+
+class UiDumpParser:
+    """
+    Incremental parser for `uiautomator dump` output.
+
+    Bytes can be fed as they come out of the device: every `<node>` is converted to a Maestro
+    element and indexed as soon as its start tag is parsed. Text printed by uiautomator before
+    the XML declaration or after `</hierarchy>` is ignored.
+    """
+
+    def __init__(self, width: int | None = None, height: int | None = None):
+        self.hierarchy = IndexedHierarchy(width=width, height=height)
+        self.rotation: int | None = None
+        self.done = False
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._started = False
+        self._pending = b""
+
+    def feed(self, chunk: bytes):
+        """Raises `xml.etree.ElementTree.ParseError` on malformed XML."""
+        if self.done or not chunk:
+            return
+        if not self._started:
+            chunk = self._skip_leading_output(chunk)
+            if not chunk:
+                return
+
+        # The closing tag may be split across two chunks
+        tail_size = len(_HIERARCHY_END_TAG) - 1
+        window = self._pending + chunk
+        end = window.find(_HIERARCHY_END_TAG)
+        if end != -1:
+            chunk = chunk[: end + len(_HIERARCHY_END_TAG) - len(self._pending)]
+            self.done = True
+        self._pending = window[-tail_size:]
+
+        self._parser.feed(chunk)
+        for event, node in self._parser.read_events():
+            if node.tag == "node":
+                if event == "start":
+                    self.hierarchy.add(node_to_element(node.attrib))
+                else:
+                    node.clear()
+            elif node.tag == "hierarchy" and event == "start":
+                self.rotation = int(node.get("rotation", 0))
+
+    def close(self) -> IndexedHierarchy:
+        if not self._started:
+            raise ParseError("No XML content found in the UI dump")
+        self._parser.close()
+        return self.hierarchy
+
+    def _skip_leading_output(self, chunk: bytes) -> bytes:
+        buffer = self._pending + chunk
+        starts = [i for i in (buffer.find(marker) for marker in _XML_START_MARKERS) if i != -1]
+        if not starts:
+            self._pending = buffer[-len(_XML_START_MARKERS[1]) :]
+            return b""
+        self._started = True
+        self._pending = b""
+        return buffer[min(starts) :]
+
+
+def parse_ui_dump(chunks: Iterable[bytes]) -> IndexedHierarchy:
+    """Parses a `uiautomator dump` output, given as an iterable of byte chunks."""
+    parser = UiDumpParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.close()
+
+
+async def get_ui_hierarchy(
+    device_id: str | None = None, compressed: bool = False
+) -> IndexedHierarchy | None:
+    """
+    Streams the UI hierarchy out of an Android device and parses it on the fly.
+
+    The dump is read from `adb exec-out`, which forwards the raw binary stdout of the device
+    instead of going through a pseudo-terminal, so the XML is parsed while it is being received.
+
+    Args:
+        device_id: The optional ID of the target device.
+        compressed: Use `uiautomator dump --compressed`, which skips the layout-only nodes.
+
+    Returns:
+        The indexed UI hierarchy, or None if the dump failed.
+    """
+    args = ["-s", device_id] if device_id else []
+    args += ["exec-out", "uiautomator", "dump"]
+    if compressed:
+        args.append("--compressed")
+    args.append("/dev/tty")
+
+    logger.info(f"Executing command: adb {' '.join(args)}")
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "adb",
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        assert process.stdout is not None and process.stderr is not None
+        parser = UiDumpParser()
+        while not parser.done:
+            chunk = await process.stdout.read(UI_DUMP_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+        # Drain the trailing "UI hierchary dumped to" message
+        await process.stdout.read()
+        stderr = (await process.stderr.read()).decode(errors="ignore")
+        await process.wait()
+
+        if not parser.done and "ERROR" in stderr:
+            logger.error(f"Failed to get UI hierarchy: {stderr.strip()}")
+            return None
+        return parser.close()
+
+    except ParseError as e:
+        logger.error(f"Failed to parse UI hierarchy: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"An exception occurred while getting the UI hierarchy: {e}")
+        return None
+
+
+async def get_accessibility_tree(device_id: str | None = None, compressed: bool = False) -> str:
     """
     Retrieves the UI accessibility tree from an Android device as an XML string.
 
     This function uses `uiautomator` to dump the current UI hierarchy.
+    Prefer `get_ui_hierarchy`, which parses the dump while it is being received.
 
     Args:
         device_id: The optional ID of the target device. If not provided,
                    the command will run on the only connected device.
+        compressed: Use `uiautomator dump --compressed`, which skips the layout-only nodes.
 
     Returns:
         The UI hierarchy as an XML string.
@@ -44,35 +221,25 @@ async def get_accessibility_tree(device_id: str | None = None) -> str:
     if device_id:
         adb_command = f"adb -s {device_id}"
 
-    # The '/dev/tty' trick is used to get the raw XML output directly.
-    # On some devices, '/dev/null' or a temporary file might be needed.
-    command = f"{adb_command} shell uiautomator dump /dev/tty"
+    # `exec-out` forwards the raw stdout of the device, the XML is not mixed with the tty output
+    dump_args = "--compressed /dev/tty" if compressed else "/dev/tty"
+    command = f"{adb_command} exec-out uiautomator dump {dump_args}"
 
     logger.info(f"Executing command: {command}")
 
     try:
         stdout, stderr = await run_subprocess(command)
 
-        if "UI hierchary dumped to" in stderr:  # Mispelling is in the original tool
-            # The XML is often in stdout, but sometimes mixed with stderr
-            # We'll clean it up to ensure we only get the XML part.
-            xml_output = re.sub(r"UI hierchary dumped to.*", "", stderr, flags=re.DOTALL).strip()
-            if not xml_output.startswith("<?xml"):
-                xml_output = stdout
-
-            # Clean up potential non-XML text at the beginning
-            xml_start_index = xml_output.find("<?xml")
-            if xml_start_index != -1:
-                return xml_output[xml_start_index:].strip()
-            else:
-                logger.error("Could not find XML content in the output.")
-                return ""
-
-        elif "ERROR" in stderr:
+        if "ERROR" in stderr:
             logger.error(f"Failed to get accessibility tree: {stderr.strip()}")
             return ""
 
-        return stdout.strip()
+        xml_start_index = stdout.find("<?xml")
+        xml_end_index = stdout.find(_HIERARCHY_END_TAG.decode())
+        if xml_start_index == -1 or xml_end_index == -1:
+            logger.error("Could not find XML content in the output.")
+            return ""
+        return stdout[xml_start_index : xml_end_index + len(_HIERARCHY_END_TAG)]
 
     except Exception as e:
         logger.error(f"An exception occurred while getting the accessibility tree: {e}")
@@ -83,11 +250,12 @@ async def get_accessibility_tree(device_id: str | None = None) -> str:
 async def main():
     print("Attempting to retrieve accessibility tree from the connected device...")
     # You can specify a device_id like "emulator-5554" if you have multiple devices
-    accessibility_tree = await get_accessibility_tree()
+    hierarchy = await get_ui_hierarchy()
 
-    if accessibility_tree:
-        print("\n--- Accessibility Tree XML ---")
-        print(accessibility_tree)
+    if hierarchy:
+        print("\n--- Accessibility Tree ---")
+        for element in hierarchy.elements:
+            print(element)
         print("\n----------------------------")
     else:
         print("\nFailed to retrieve the accessibility tree.")
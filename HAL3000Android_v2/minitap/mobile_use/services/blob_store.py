@@ -0,0 +1,185 @@
+"""
+Per-task, content-addressed store of the large artifacts of the graph state (screenshots and UI
+hierarchies), so that the state only holds small references to them.
+
+LangGraph copies the state on every step, and the SDK rebuilds it from every streamed chunk: with
+the artifacts out of band, these copies stay small. Blobs are kept in memory up to
+`BLOB_STORE_MEMORY_MB`, the least recently used ones being spilled to disk, and are only read
+back when a prompt or a tool needs them.
+"""
+
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from minitap.mobile_use.config import settings
+from minitap.mobile_use.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Decoded JSON blobs kept, prompts and tools resolving the latest hierarchy several times a step
+DECODED_BLOBS_KEPT = 4
+
+
+class BlobRef(BaseModel):
+    """Reference to a blob: the store holding it, and the SHA-256 of its content."""
+
+    store_id: str
+    digest: str
+    size: int
+
+    def load_bytes(self) -> bytes:
+        return get_blob_store(self.store_id).get(self.digest)
+
+    def load_text(self) -> str:
+        return self.load_bytes().decode("utf-8")
+
+    def load_json(self) -> Any:
+        return get_blob_store(self.store_id).get_json(self.digest)
+
+
+class BlobStore:
+    """
+    Blobs of a task, by content hash. With a `directory`, the blobs are written through to it
+    and kept on close, to be resolved again by another process; otherwise they are only
+    spilled to a temporary directory, removed on close.
+    """
+
+    def __init__(
+        self,
+        store_id: str | None = None,
+        directory: Path | None = None,
+        max_memory_bytes: int | None = None,
+    ):
+        self.store_id = store_id or uuid.uuid4().hex
+        self.persistent = directory is not None
+        self.directory = directory
+        self.max_memory_bytes = (
+            max_memory_bytes
+            if max_memory_bytes is not None
+            else settings.BLOB_STORE_MEMORY_MB * 1024 * 1024
+        )
+        self.puts = 0
+        self.deduplicated = 0
+        self.spills = 0
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._on_disk: set[str] = set()
+        self._decoded: OrderedDict[str, Any] = OrderedDict()
+        _register_blob_store(self)
+
+    def _get_directory(self) -> Path:
+        if self.directory is None:
+            self.directory = Path(tempfile.mkdtemp(prefix=f"mobile-use-blobs-{self.store_id}-"))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory
+
+    def _write(self, digest: str, data: bytes):
+        path = self._get_directory() / digest
+        if not path.exists():
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(data)
+            temp_path.replace(path)
+        self._on_disk.add(digest)
+
+    def put(self, data: bytes) -> BlobRef:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self.puts += 1
+            if digest in self._memory or digest in self._on_disk:
+                self.deduplicated += 1
+            else:
+                self._memory[digest] = data
+                self._memory_bytes += len(data)
+                if self.persistent:
+                    self._write(digest, data)
+                self._spill()
+        return BlobRef(store_id=self.store_id, digest=digest, size=len(data))
+
+    def put_text(self, text: str) -> BlobRef:
+        return self.put(text.encode("utf-8"))
+
+    def put_json(self, value: Any) -> BlobRef:
+        return self.put(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode())
+
+    def get(self, digest: str) -> bytes:
+        with self._lock:
+            data = self._memory.get(digest)
+            if data is not None:
+                self._memory.move_to_end(digest)
+                return data
+            if self.directory is None:
+                raise KeyError(f"Blob {digest} not found in store {self.store_id}")
+            path = self.directory / digest
+            if not path.exists():
+                raise KeyError(f"Blob {digest} not found in store {self.store_id}")
+            return path.read_bytes()
+
+    def get_json(self, digest: str) -> Any:
+        """The decoded JSON blob, shared between callers: it must not be modified."""
+        with self._lock:
+            if digest in self._decoded:
+                self._decoded.move_to_end(digest)
+                return self._decoded[digest]
+        value = json.loads(self.get(digest))
+        with self._lock:
+            self._decoded[digest] = value
+            while len(self._decoded) > DECODED_BLOBS_KEPT:
+                self._decoded.popitem(last=False)
+        return value
+
+    def _spill(self):
+        """Moves the least recently used blobs to disk, until the memory budget is met."""
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            digest, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+            if digest not in self._on_disk:
+                self._write(digest, data)
+                self.spills += 1
+
+    def close(self):
+        _unregister_blob_store(self)
+        with self._lock:
+            self._memory.clear()
+            self._decoded.clear()
+            self._memory_bytes = 0
+        if not self.persistent and self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.puts} blobs stored ({self.deduplicated} deduplicated), "
+            f"{self._memory_bytes / 1024 / 1024:.1f} MB in memory, {self.spills} spilled to disk"
+        )
+
+
+_blob_stores: dict[str, BlobStore] = {}
+_blob_stores_lock = threading.Lock()
+
+
+def _register_blob_store(store: BlobStore):
+    with _blob_stores_lock:
+        _blob_stores[store.store_id] = store
+
+
+def _unregister_blob_store(store: BlobStore):
+    with _blob_stores_lock:
+        if _blob_stores.get(store.store_id) is store:
+            del _blob_stores[store.store_id]
+
+
+def get_blob_store(store_id: str) -> BlobStore:
+    with _blob_stores_lock:
+        store = _blob_stores.get(store_id)
+    if store is None:
+        raise KeyError(f"Blob store {store_id} is closed or was never opened")
+    return store
@@ -0,0 +1,193 @@
+"""
+Event-driven tracking of the foreground app of Android devices.
+
+Instead of a `dumpsys window` shell call on every Contextor pass, a background watcher per
+device keeps the foreground window up to date: a single persistent shell probes it on the
+device, and only streams it back. Looking it up is then instant, and its change timestamp
+tells the other components when an app transition happened.
+
+The probe keeps running on the device between tasks, until the agent is cleaned.
+"""
+
+import re
+import threading
+import time
+from collections.abc import Iterator
+
+from adbutils import AdbDevice, AdbError
+from pydantic import BaseModel
+
+from minitap.mobile_use.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FOCUSED_APP_COMMAND = "dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'"
+_PROBE_END_MARKER = "__foreground_app_probe_end__"
+# Delay before the persistent shell is opened again, when it was closed by the device
+PROBE_RESTART_DELAY_SECONDS = 1.0
+
+# e.g. "mFocusedApp=ActivityRecord{2f1c u0 com.android.settings/.Settings t12}"
+_COMPONENT_PATTERN = re.compile(r"\s(?P<package>[\w.]+)/(?P<activity>[\w.$]+)[\s}]")
+
+
+class ForegroundApp(BaseModel):
+    """The foreground window of a device, and when it last changed (host time.time)."""
+
+    package: str | None
+    activity: str | None
+    focused_app_info: str
+    changed_at: float
+
+
+def parse_focused_app_info(focused_app_info: str) -> tuple[str | None, str | None]:
+    """The package and the activity of the focused app, from the `dumpsys window` output."""
+    lines = focused_app_info.splitlines()
+    # The focused app is the activity, the current focus may be a dialog or the keyboard
+    for line in sorted(lines, key=lambda line: "mFocusedApp" not in line):
+        match = _COMPONENT_PATTERN.search(line)
+        if match is not None:
+            activity = match["activity"]
+            if activity.startswith("."):
+                activity = match["package"] + activity
+            return match["package"], activity
+    return None, None
+
+
+class ForegroundAppWatcher:
+    """
+    Keeps the foreground app of a device up to date from a persistent shell probing it every
+    `interval_seconds`. The shell is opened again whenever the device closes it.
+    """
+
+    def __init__(self, device: AdbDevice, interval_seconds: float):
+        self.device = device
+        self.interval_seconds = interval_seconds
+        self.changes = 0
+        self._current: ForegroundApp | None = None
+        # Kept while the probe restarts, so that a restart is not taken for a transition
+        self._last: ForegroundApp | None = None
+        self._stopped = threading.Event()
+        # Host time of the latest probe, notified to the callers waiting for a newer one
+        self._probed = threading.Condition()
+        self._probed_at: float | None = None
+        self._connection = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"foreground-app-{device.serial}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._probed:
+            self._probed.notify_all()
+        connection = self._connection
+        if connection is not None:
+            connection.close()
+
+    def get_current(self) -> ForegroundApp | None:
+        """The latest foreground app, None until the first probe came back."""
+        return self._current
+
+    def wait_for_probe(self, after: float, timeout: float) -> ForegroundApp | None:
+        """
+        The foreground app from a probe that came back after `after` (host time.time), or the
+        latest one when none did within `timeout` seconds.
+        """
+        with self._probed:
+            self._probed.wait_for(
+                lambda: self._stopped.is_set()
+                or (self._probed_at is not None and self._probed_at > after),
+                timeout=timeout,
+            )
+        return self._current
+
+    def has_changed_since(self, timestamp: float) -> bool:
+        current = self._current
+        return current is not None and current.changed_at > timestamp
+
+    def _get_probe_command(self) -> str:
+        return (
+            f"while true; do {FOCUSED_APP_COMMAND}; echo {_PROBE_END_MARKER}; "
+            f"sleep {self.interval_seconds}; done"
+        )
+
+    def _read_probe_lines(self) -> Iterator[str]:
+        self._connection = self.device.shell(self._get_probe_command(), stream=True)
+        try:
+            with self._connection.conn.makefile("r", encoding="utf-8", errors="ignore") as f:
+                yield from f
+        finally:
+            self._connection.close()
+            self._connection = None
+
+    def _update(self, focused_app_info: str):
+        self._set_current(focused_app_info)
+        with self._probed:
+            self._probed_at = time.time()
+            self._probed.notify_all()
+
+    def _set_current(self, focused_app_info: str):
+        last = self._last
+        if last is not None and last.focused_app_info == focused_app_info:
+            self._current = last
+            return
+        package, activity = parse_focused_app_info(focused_app_info)
+        self._current = self._last = ForegroundApp(
+            package=package,
+            activity=activity,
+            focused_app_info=focused_app_info,
+            changed_at=time.time(),
+        )
+        if last is not None:
+            self.changes += 1
+            logger.info(f"Foreground app changed: {last.activity} -> {activity}")
+
+    def _run(self):
+        while not self._stopped.is_set():
+            block: list[str] = []
+            try:
+                for line in self._read_probe_lines():
+                    if self._stopped.is_set():
+                        return
+                    if line.strip() == _PROBE_END_MARKER:
+                        self._update("\n".join(block))
+                        block = []
+                    else:
+                        block.append(line.rstrip("\n"))
+            except (AdbError, OSError, ValueError) as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Foreground app probe of {self.device.serial} failed: {e}")
+            if self._stopped.is_set():
+                return
+            # The snapshot is stale until the probe is running again
+            self._current = None
+            self._stopped.wait(PROBE_RESTART_DELAY_SECONDS)
+
+    def __str__(self) -> str:
+        current = self._current
+        return f"{self.changes} app transitions, current: {current.activity if current else None}"
+
+
+_watchers: dict[str, ForegroundAppWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_foreground_app_watcher(device: AdbDevice, interval_seconds: float) -> ForegroundAppWatcher:
+    """The watcher of the device, started on first use."""
+    with _watchers_lock:
+        watcher = _watchers.get(device.serial)
+        if watcher is None:
+            watcher = ForegroundAppWatcher(device, interval_seconds=interval_seconds)
+            watcher.start()
+            _watchers[device.serial] = watcher
+            logger.info(f"Watching the foreground app of {device.serial}")
+        return watcher
+
+
+def stop_foreground_app_watchers():
+    with _watchers_lock:
+        for watcher in _watchers.values():
+            watcher.stop()
+        _watchers.clear()
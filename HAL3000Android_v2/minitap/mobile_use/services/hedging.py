@@ -0,0 +1,49 @@
+"""
+Hedging of the slow main LLM calls with their fallback.
+
+The latencies of the main calls of a node are shared by all the tasks of the process, to learn
+its hedging threshold, while the outcome of the hedged fallbacks is counted per task.
+"""
+
+import math
+from collections import deque
+
+# Main calls slower than the rolling p90 of their node get a hedged fallback request
+HEDGING_PERCENTILE = 0.9
+HEDGING_LATENCY_WINDOW = 50
+HEDGING_MIN_SAMPLES = 10
+
+
+class HedgingLatencies:
+    """Rolling latencies of the main LLM calls of a node."""
+
+    def __init__(self):
+        self.latencies: deque[float] = deque(maxlen=HEDGING_LATENCY_WINDOW)
+
+    def get_threshold(self) -> float | None:
+        """Rolling p90 of the main calls latency, once enough of them were observed."""
+        if len(self.latencies) < HEDGING_MIN_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[math.ceil(HEDGING_PERCENTILE * len(latencies)) - 1]
+
+    def estimate_remaining_latency(self, elapsed: float) -> float:
+        """Expected remaining latency of a main call still running after `elapsed` seconds."""
+        slower = [latency for latency in self.latencies if latency > elapsed]
+        return sum(slower) / len(slower) - elapsed if slower else 0
+
+
+class HedgingStats:
+    """Outcome of the hedged fallbacks of a node, during a task."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hedged = 0
+        self.won_by_fallback = 0
+        self.saved_seconds = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hedged}/{self.calls} calls hedged, {self.won_by_fallback} won by the "
+            f"fallback, ~{self.saved_seconds:.1f}s saved"
+        )
@@ -1,69 +1,66 @@
-
+import asyncio
 import logging
-from collections.abc import Awaitable, Callable
-from typing import Literal, TypeVar, overload, List, Dict, Any
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Literal, TypeVar, overload
 
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_vertexai import ChatVertexAI
 from langchain_openai import ChatOpenAI
+from langchain_openai.chat_models.base import BaseChatOpenAI
 from langchain_anthropic import ChatAnthropic
-
-# Cerebras SDK
-try:
-    from cerebras.cloud.sdk import Cerebras
-except ImportError:
-    Cerebras = None
+from langchain_cerebras import ChatCerebras
 
 from minitap.mobile_use.config import (
+    LLM,
     AgentNode,
     AgentNodeWithFallback,
+    LLMConfig,
+    LLMProvider,
     LLMUtilsNode,
     LLMWithFallback,
     settings,
 )
 from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.services.hedging import HedgingLatencies, HedgingStats
+from minitap.mobile_use.services.llm_cache import get_llm_response_cache
+from minitap.mobile_use.services.llm_replay import (
+    ReplayChatModel,
+    get_llm_recorder,
+    get_llm_recording,
+)
+from minitap.mobile_use.services.rate_limiter import RateLimiter, estimate_prompt_tokens
 
 logger = logging.getLogger(__name__)
 
-class CerebrasLLMWrap:
-    def __init__(self, api_key: str, model: str):
-        self.client = Cerebras(api_key=api_key)
-        self.model = model
-        self.is_cerebras = True  # Unique identifier for Cerebras
-    
-    def generate(self, messages: List[Dict[str, str]], response_format: Dict[str, str] = None):
-        """Generate response using Cerebras API - synchronous method to match agent expectations"""
-        kwargs = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False
-        }
-        
-        if response_format:
-            kwargs["response_format"] = response_format
-            
-        response = self.client.chat.completions.create(**kwargs)
-        
-        # Create a simple object that mimics LangChain's response structure
-        class CerebrasResponse:
-            def __init__(self, content: str):
-                self.content = content
-        
-        # Extract content from Cerebras response and wrap it
-        content = response.choices[0].message.content
-        return CerebrasResponse(content)
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+XAI_BASE_URL = "https://api.x.ai/v1"
+
+# Clients are reused across steps and tasks, so they keep their HTTP connections alive.
+# (provider, model, temperature, base_url, use_response_cache) -> client
+_llm_clients: dict[tuple[str, str, float, str | None, bool], BaseChatModel] = {}
+_llm_clients_lock = threading.Lock()
+# id(client) -> (provider, model), to find the rate limits of a pooled client
+_llm_client_models: dict[int, tuple[str, str]] = {}
+# Shared across tasks: limit name ("provider" or "provider/model") -> limiter
+_rate_limiters: dict[str, RateLimiter] = {}
+
 
 def get_cerebras_llm(
     model_name: str = "qwen-3-235b-a22b-instruct-2507",
     temperature: float = 0.7,
-    max_completion_tokens: int = 20000,
-) -> Any:
-    assert Cerebras is not None, "Cerebras SDK not installed!"
+) -> ChatCerebras:
     assert settings.CEREBRAS_API_KEY is not None
-    print(f"[DEBUG] CEREBRAS_API_KEY: {settings.CEREBRAS_API_KEY}")
-    api_key_str = settings.CEREBRAS_API_KEY.get_secret_value() if hasattr(settings.CEREBRAS_API_KEY, "get_secret_value") else str(settings.CEREBRAS_API_KEY)
-    return CerebrasLLMWrap(api_key_str, model_name)
+    client = ChatCerebras(
+        model=model_name,
+        api_key=settings.CEREBRAS_API_KEY,
+        temperature=temperature,
+    )
+    return client
 
 
 def get_google_llm(
@@ -127,7 +124,7 @@ def get_openrouter_llm(model_name: str, temperature: float = 1):
         model=model_name,
         temperature=temperature,
         api_key=settings.OPEN_ROUTER_API_KEY,
-        base_url="https://openrouter.ai/api/v1",
+        base_url=OPENROUTER_BASE_URL,
     )
     return client
 
@@ -138,11 +135,18 @@ def get_grok_llm(model_name: str, temperature: float = 1) -> ChatOpenAI:
         model=model_name,
         api_key=settings.XAI_API_KEY,
         temperature=temperature,
-        base_url="https://api.x.ai/v1",
+        base_url=XAI_BASE_URL,
     )
     return client
 
 
+def get_replay_llm() -> ReplayChatModel:
+    return ReplayChatModel(
+        recording=get_llm_recording(),
+        latency_seconds=settings.LLM_REPLAY_LATENCY_SECONDS,
+    )
+
+
 @overload
 def get_llm(
     ctx: MobileUseContext,
@@ -150,6 +154,7 @@ def get_llm(
     *,
     use_fallback: bool = False,
     temperature: float = 1,
+    use_response_cache: bool = False,
 ) -> BaseChatModel: ...
 
 
@@ -159,6 +164,7 @@ def get_llm(
     name: AgentNode,
     *,
     temperature: float = 1,
+    use_response_cache: bool = False,
 ) -> BaseChatModel: ...
 
 
@@ -169,6 +175,7 @@ def get_llm(
     *,
     is_utils: Literal[True],
     temperature: float = 1,
+    use_response_cache: bool = False,
 ) -> BaseChatModel: ...
 
 
@@ -178,7 +185,13 @@ def get_llm(
     is_utils: bool = False,
     use_fallback: bool = False,
     temperature: float = 1,
+    use_response_cache: bool = False,
 ) -> BaseChatModel:
+    """
+    The pooled client of the LLM configured for the agent.
+    `use_response_cache` is meant for deterministic calls: their responses are cached on disk
+    when the response cache is enabled (see `llm_cache`).
+    """
     llm = (
         ctx.llm_config.get_utils(name)  # type: ignore
         if is_utils
@@ -189,38 +202,278 @@ def get_llm(
             llm = llm.fallback
         else:
             raise ValueError("LLM has no fallback!")
-    if llm.provider == "openai":
-        return get_openai_llm(llm.model, temperature)
-    elif llm.provider == "google":
-        return get_google_llm(llm.model, temperature)
-    elif llm.provider == "vertexai":
-        return get_vertex_llm(llm.model, temperature)
-    elif llm.provider == "openrouter":
-        return get_openrouter_llm(llm.model, temperature)
-    elif llm.provider == "xai":
-        return get_grok_llm(llm.model, temperature)
-    elif llm.provider == "cerebras":
-        return get_cerebras_llm(llm.model, temperature)
-    elif llm.provider == "anthropic":
-        return get_anthropic_llm(llm.model, temperature)
+    return _get_pooled_llm(llm.provider, llm.model, temperature, use_response_cache)
+
+
+def _get_provider_base_url(provider: LLMProvider) -> str | None:
+    if provider == "openai":
+        return settings.OPENAI_BASE_URL
+    if provider == "openrouter":
+        return OPENROUTER_BASE_URL
+    if provider == "xai":
+        return XAI_BASE_URL
+    return None
+
+
+def _create_llm(provider: LLMProvider, model: str, temperature: float) -> BaseChatModel:
+    if provider == "openai":
+        return get_openai_llm(model, temperature)
+    elif provider == "google":
+        return get_google_llm(model, temperature)
+    elif provider == "vertexai":
+        return get_vertex_llm(model, temperature)
+    elif provider == "openrouter":
+        return get_openrouter_llm(model, temperature)
+    elif provider == "xai":
+        return get_grok_llm(model, temperature)
+    elif provider == "cerebras":
+        return get_cerebras_llm(model, temperature)
+    elif provider == "anthropic":
+        return get_anthropic_llm(model, temperature)
+    elif provider == "replay":
+        return get_replay_llm()
     else:
-        raise ValueError(f"Unsupported provider: {llm.provider}")
+        raise ValueError(f"Unsupported provider: {provider}")
+
+
+def _get_pooled_llm(
+    provider: LLMProvider, model: str, temperature: float, use_response_cache: bool = False
+) -> BaseChatModel:
+    response_cache = get_llm_response_cache() if use_response_cache else None
+    key = (
+        provider,
+        model,
+        temperature,
+        _get_provider_base_url(provider),
+        response_cache is not None,
+    )
+    with _llm_clients_lock:
+        client = _llm_clients.get(key)
+        if client is None:
+            client = _create_llm(provider, model, temperature)
+            if response_cache is not None:
+                client.cache = response_cache
+            if (recorder := get_llm_recorder()) is not None:
+                client.callbacks = [recorder]
+            _llm_clients[key] = client
+            _llm_client_models[id(client)] = (provider, model)
+    return client
+
+
+def clear_llm_clients():
+    with _llm_clients_lock:
+        _llm_clients.clear()
+        _llm_client_models.clear()
+
+
+def get_pooled_llm_model(llm: BaseChatModel) -> tuple[str, str] | None:
+    """The provider and model of a pooled client, None for other clients."""
+    return _llm_client_models.get(id(llm))
+
+
+def get_rate_limiters() -> dict[str, RateLimiter]:
+    return dict(_rate_limiters)
+
+
+def _get_rate_limiters(provider: str, model: str) -> list[RateLimiter]:
+    # Always the model before the provider, so that calls acquire them in the same order
+    limiters: list[RateLimiter] = []
+    for name in (f"{provider}/{model}", provider):
+        limit = settings.LLM_RATE_LIMITS.get(name)
+        if limit is None:
+            continue
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter(
+                name=name,
+                max_concurrency=limit.max_concurrency,
+                tokens_per_minute=limit.tokens_per_minute,
+            )
+            _rate_limiters[name] = limiter
+        limiters.append(limiter)
+    return limiters
+
+
+@asynccontextmanager
+async def rate_limited(llm: BaseChatModel, messages: list[BaseMessage]) -> AsyncIterator[None]:
+    """
+    Waits for the rate limits of the provider and model of a pooled client (see
+    `LLM_RATE_LIMITS`), and holds their slots for the duration of the call.
+    Calls queue in turns across tasks instead of bursting into the provider's 429s.
+    """
+    model = get_pooled_llm_model(llm)
+    limiters = _get_rate_limiters(*model) if model is not None else []
+    tokens = estimate_prompt_tokens(messages) if limiters else 0
+    acquired: list[RateLimiter] = []
+    try:
+        for limiter in limiters:
+            await limiter.acquire(tokens)
+            acquired.append(limiter)
+        yield
+    finally:
+        for limiter in acquired:
+            limiter.release()
+
+
+def _get_configured_llms(llm_config: LLMConfig) -> list[LLM]:
+    llms: list[LLM] = []
+    for llm in (
+        llm_config.planner,
+        llm_config.orchestrator,
+        llm_config.contextor,
+        llm_config.cortex,
+        llm_config.executor,
+        llm_config.utils.outputter,
+        llm_config.utils.hopper,
+    ):
+        llms.append(llm)
+        if isinstance(llm, LLMWithFallback):
+            llms.append(llm.fallback)
+    return llms
+
+
+def _can_open_connections(client: BaseChatModel) -> bool:
+    return isinstance(client, BaseChatOpenAI | ChatAnthropic)
+
+
+async def _open_connections(client: BaseChatModel):
+    # Any authenticated request works: listing the models is cheap and free
+    if isinstance(client, BaseChatOpenAI):
+        await client.root_async_client.models.list()
+    elif isinstance(client, ChatAnthropic):
+        await client._async_client.models.list(limit=1)
+
+
+async def warm_up_llm_clients(llm_config: LLMConfig):
+    """
+    Creates the clients of the configured providers and opens their connections
+    (TCP and TLS handshakes) ahead of the first inference.
+    Clients of a same provider and base URL share their connection pool, so only one request
+    is sent per provider and base URL.
+    """
+    clients: dict[tuple[str, str | None], BaseChatModel] = {}
+    for llm in _get_configured_llms(llm_config):
+        try:
+            client = _get_pooled_llm(llm.provider, llm.model, temperature=1)
+        except Exception as e:
+            logger.warning(f"Could not create the {llm.provider} client for {llm.model}: {e}")
+            continue
+        if not _can_open_connections(client):
+            logger.debug(f"The {llm.provider} client cannot open its connections ahead")
+            continue
+        clients.setdefault((llm.provider, _get_provider_base_url(llm.provider)), client)
+
+    results = await asyncio.gather(
+        *(_open_connections(client) for client in clients.values()), return_exceptions=True
+    )
+    warmed_up: list[str] = []
+    for (provider, _), result in zip(clients.keys(), results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not warm up the {provider} connection: {result}")
+        else:
+            warmed_up.append(provider)
+    if warmed_up:
+        logger.info(f"Warmed up LLM clients for {', '.join(warmed_up)}")
 
 
 T = TypeVar("T")
 
+_hedging_latencies: dict[str, HedgingLatencies] = {}
+
+
+def get_hedging_latencies() -> dict[str, HedgingLatencies]:
+    return _hedging_latencies
+
+
+def _is_usable(task: asyncio.Future, none_should_fallback: bool) -> bool:
+    if task.exception() is not None:
+        return False
+    return not (task.result() is None and none_should_fallback)
+
 
 async def with_fallback(
     main_call: Callable[[], Awaitable[T]],
     fallback_call: Callable[[], Awaitable[T]],
     none_should_fallback: bool = True,
+    name: str | None = None,
+    hedge_after: float | None = None,
+    ctx: MobileUseContext | None = None,
 ) -> T:
+    """
+    Runs the main call, falling back when it raises (or returns None).
+    When the main call is slower than `hedge_after` seconds (by default
+    `LLM_HEDGE_AFTER_SECONDS`, or else the rolling p90 of the `name` node), the fallback is
+    started in parallel: the first usable result wins and the other call is cancelled.
+    The outcome of the hedged fallbacks of the node is counted in the stats of the task.
+    """
+    latencies = _hedging_latencies.setdefault(name, HedgingLatencies()) if name else None
+    stats = ctx.hedging_stats.setdefault(name, HedgingStats()) if ctx and name else None
+    if hedge_after is None:
+        hedge_after = settings.LLM_HEDGE_AFTER_SECONDS
+    if hedge_after is None and latencies is not None:
+        hedge_after = latencies.get_threshold()
+    if stats is not None:
+        stats.calls += 1
+
+    start = time.perf_counter()
+    main_task = asyncio.ensure_future(main_call())
+    fallback_task: asyncio.Future[T] | None = None
     try:
-        result = await main_call()
-        if result is None and none_should_fallback:
-            logger.warning("Main LLM inference returned None. Falling back...")
+        await asyncio.wait({main_task}, timeout=hedge_after)
+        if main_task.done():
+            if _is_usable(main_task, none_should_fallback):
+                if latencies is not None:
+                    latencies.latencies.append(time.perf_counter() - start)
+                return main_task.result()
+            if main_task.exception() is not None:
+                logger.warning(
+                    f"❗ Main LLM inference failed: {main_task.exception()}. Falling back..."
+                )
+            else:
+                logger.warning("Main LLM inference returned None. Falling back...")
             return await fallback_call()
-        return result
-    except Exception as e:
-        logger.warning(f"❗ Main LLM inference failed: {e}. Falling back...")
-        return await fallback_call()
+
+        hedged_at = time.perf_counter() - start
+        logger.info(
+            f"⏱️ Main LLM inference slower than {hedge_after:.1f}s, hedging with the fallback"
+        )
+        if stats is not None:
+            stats.hedged += 1
+        fallback_task = asyncio.ensure_future(fallback_call())
+        main_failed_at: float | None = None
+        while True:
+            pending = {task for task in (main_task, fallback_task) if not task.done()}
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            elapsed = time.perf_counter() - start
+            if main_task.done() and main_failed_at is None:
+                if _is_usable(main_task, none_should_fallback):
+                    if latencies is not None:
+                        latencies.latencies.append(elapsed)
+                    return main_task.result()
+                main_failed_at = elapsed
+                logger.warning("❗ Main LLM inference failed, waiting for the hedged fallback")
+            if fallback_task.done():
+                is_fallback_usable = _is_usable(fallback_task, none_should_fallback)
+                if is_fallback_usable or main_task.done():
+                    if latencies is not None and not main_task.done():
+                        # Censored: the cancelled main call would have taken at least this long,
+                        # leaving it out would lower the threshold to the fast calls only
+                        latencies.latencies.append(elapsed)
+                    if stats is not None and is_fallback_usable:
+                        stats.won_by_fallback += 1
+                        # Without hedging, the fallback would have started after the main call
+                        stats.saved_seconds += (
+                            main_failed_at - hedged_at
+                            if main_failed_at is not None
+                            else latencies.estimate_remaining_latency(elapsed)  # type: ignore
+                        )
+                    return fallback_task.result()
+    finally:
+        for task in (main_task, fallback_task):
+            if task is None:
+                continue
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Retrieved, not to be reported as a never retrieved exception
+                task.exception()
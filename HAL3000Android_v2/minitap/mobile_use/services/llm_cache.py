@@ -0,0 +1,152 @@
+"""
+Opt-in, disk-backed cache of LLM responses, for the calls that are effectively deterministic
+(e.g. the Contextor screen analysis or the Hopper digging through the same package list).
+
+Enabled by setting `LLM_RESPONSE_CACHE_PATH`. Entries live in a SQLite database bounded to
+`LLM_RESPONSE_CACHE_MAX_SIZE_MB`, the least recently used ones being evicted first.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.load import dumps, loads
+
+from minitap.mobile_use.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def compute_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Content hash of a request.
+    `prompt` is the serialized messages: images are embedded as base64 data, so identical
+    screenshots produce identical keys. `llm_string` holds the model, its temperature and the
+    bound tools or output schema.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(prompt.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(llm_string.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain cache storing the generations in a size-bounded SQLite database (LRU)."""
+
+    def __init__(self, path: str | Path, max_size_bytes: int):
+        self.path = Path(path)
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+            )
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = compute_cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+            self.hits += 1
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", LangChainBetaWarning)
+                return loads(row[0])
+        except Exception as e:
+            logger.warning(f"Could not load cached LLM response: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = compute_cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        size = len(value.encode("utf-8"))
+        if size > self.max_size_bytes:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        total_size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+        rows = self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        evicted_keys = []
+        for key, size in rows:
+            if total_size <= self.max_size_bytes:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+        self.evictions += len(evicted_keys)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    # Not __len__: LangChain tests the truthiness of the cache, an empty one must stay enabled
+    def count_entries(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0
+        return (
+            f"{self.hits} hits, {self.misses} misses ({ratio:.0%} hit rate), "
+            f"{self.evictions} evictions"
+        )
+
+
+_llm_response_cache: SQLiteLLMCache | None = None
+_llm_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> SQLiteLLMCache | None:
+    """The shared response cache, or None when it is not enabled."""
+    global _llm_response_cache
+    if settings.LLM_RESPONSE_CACHE_PATH is None:
+        return None
+    path = Path(settings.LLM_RESPONSE_CACHE_PATH).expanduser()
+    with _llm_response_cache_lock:
+        if _llm_response_cache is None or _llm_response_cache.path != path:
+            _llm_response_cache = SQLiteLLMCache(
+                path=path,
+                max_size_bytes=settings.LLM_RESPONSE_CACHE_MAX_SIZE_MB * 1024 * 1024,
+            )
+            logger.info(f"LLM response cache enabled at {_llm_response_cache.path}")
+        return _llm_response_cache
@@ -0,0 +1,347 @@
+"""
+Record and replay of the LLM calls, to benchmark the framework without network access nor
+provider noise.
+
+Setting `LLM_RECORD_PATH` records every request/response pair of the pooled clients to a JSONL
+file. The `replay` provider serves the responses of the `LLM_REPLAY_PATH` recording back, either
+by request hash or in the recorded order of each agent, after a synthetic latency.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from typing import Any, Literal
+from uuid import UUID
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    BaseCallbackHandler,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, ConfigDict
+
+from minitap.mobile_use.config import settings
+from minitap.mobile_use.utils.llm_usage import get_agent_name
+
+logger = logging.getLogger(__name__)
+
+ReplayMatch = Literal["hash", "sequence"]
+
+
+class ReplayMissError(LookupError):
+    """The recording has no response for a request."""
+
+
+def _get_content_parts(content: str | list) -> Iterator[str]:
+    if isinstance(content, str):
+        yield content
+        return
+    for block in content:
+        if isinstance(block, str):
+            yield block
+        elif block.get("type") == "text":
+            yield block.get("text", "")
+        elif block.get("type") == "image_url":
+            image_url = block.get("image_url")
+            yield image_url.get("url", "") if isinstance(image_url, dict) else image_url or ""
+
+
+def compute_request_hash(messages: list[BaseMessage]) -> str:
+    """
+    Hash of the text and images of the messages. Provider specific annotations (e.g. cache
+    control blocks) and the random ids of the tool calls are left out, so that a recording made
+    with any provider replays the same requests.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    for message in messages:
+        digest.update(message.type.encode("utf-8"))
+        digest.update(b"\0")
+        for part in _get_content_parts(message.content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            digest.update(tool_call["name"].encode("utf-8"))
+            digest.update(json.dumps(tool_call["args"], sort_keys=True).encode("utf-8"))
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+
+class RecordedLLMCall(BaseModel):
+    agent: str
+    provider: str | None = None
+    model: str | None = None
+    request_hash: str
+    latency_seconds: float
+    request: list[dict[str, Any]]
+    response: dict[str, Any]
+
+    def get_response_message(self) -> AIMessage:
+        message = messages_from_dict([self.response])[0]
+        assert isinstance(message, AIMessage)
+        return message
+
+
+class LLMRecorder(BaseCallbackHandler):
+    """Appends the successful calls of the clients it is attached to to a JSONL file."""
+
+    run_inline = True
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.recorded = 0
+        self._runs: dict[UUID, tuple[float, dict[str, Any], list[BaseMessage]]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), metadata or {}, messages[0])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        ended_at = time.perf_counter()
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None or not response.generations or not response.generations[0]:
+            return
+        started_at, metadata, messages = run
+        generation = response.generations[0][0]
+        if not isinstance(generation, ChatGeneration):
+            return
+        message = generation.message
+        if isinstance(message, AIMessageChunk):
+            message = message_chunk_to_message(message)
+        # Parsed structured outputs are objects, they are parsed again from the message on replay
+        message = message.model_copy(
+            update={
+                "additional_kwargs": {
+                    key: value
+                    for key, value in message.additional_kwargs.items()
+                    if key != "parsed"
+                }
+            }
+        )
+        call = RecordedLLMCall(
+            agent=get_agent_name(metadata),
+            provider=metadata.get("ls_provider"),
+            model=metadata.get("ls_model_name"),
+            request_hash=compute_request_hash(messages),
+            latency_seconds=ended_at - started_at,
+            request=messages_to_dict(messages),
+            response=messages_to_dict([message])[0],
+        )
+        line = call.model_dump_json() + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def __str__(self) -> str:
+        return f"{self.recorded} calls recorded to {self.path}"
+
+
+class LLMRecording:
+    """
+    Recorded calls, served by request hash or in the recorded order of each agent.
+    Identical requests are served their recorded responses in order, the last one being kept
+    for any further repetition.
+    """
+
+    def __init__(self, path: Path, match: ReplayMatch = "hash"):
+        self.path = path
+        self.match = match
+        self.served = 0
+        self._by_hash: dict[str, deque[RecordedLLMCall]] = {}
+        self._by_agent: dict[str, deque[RecordedLLMCall]] = {}
+        self._lock = threading.Lock()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                call = RecordedLLMCall.model_validate_json(line)
+                self._by_hash.setdefault(call.request_hash, deque()).append(call)
+                self._by_agent.setdefault(call.agent, deque()).append(call)
+
+    def get_call(self, messages: list[BaseMessage], agent: str) -> RecordedLLMCall:
+        with self._lock:
+            if self.match == "hash":
+                calls = self._by_hash.get(compute_request_hash(messages))
+                if not calls:
+                    raise ReplayMissError(f"No recorded response for this {agent} request")
+                call = calls.popleft() if len(calls) > 1 else calls[0]
+            else:
+                calls = self._by_agent.get(agent)
+                if not calls:
+                    raise ReplayMissError(f"No recorded {agent} call left to replay")
+                call = calls.popleft()
+            self.served += 1
+            return call
+
+
+def _parse_structured_output(schema: Any, message: AIMessage) -> Any:
+    if message.tool_calls:
+        data = message.tool_calls[0]["args"]
+    else:
+        data = json.loads(message.text())
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_validate(data)
+    return data
+
+
+def _parse_structured_output_with_raw(schema: Any, message: AIMessage) -> dict:
+    """The recorded message along with its parsed output, as LangChain's `include_raw=True`."""
+    try:
+        parsed = _parse_structured_output(schema, message)
+    except Exception as e:
+        return {"raw": message, "parsed": None, "parsing_error": e}
+    return {"raw": message, "parsed": parsed, "parsing_error": None}
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Serves recorded responses. Tools and output schemas are not sent anywhere: the recorded
+    tool calls are returned as is, and structured outputs are parsed from the recorded message.
+    `latency_seconds` is the synthetic latency of each call, None to replay the recorded one.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    recording: LLMRecording
+    latency_seconds: float | None = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        if include_raw:
+            return self | RunnableLambda(
+                lambda message: _parse_structured_output_with_raw(schema, message)
+            )
+        return self | RunnableLambda(lambda message: _parse_structured_output(schema, message))
+
+    def _get_call(
+        self,
+        messages: list[BaseMessage],
+        run_manager: CallbackManagerForLLMRun | AsyncCallbackManagerForLLMRun | None,
+    ) -> tuple[RecordedLLMCall, float]:
+        agent = get_agent_name(run_manager.metadata if run_manager is not None else None)
+        call = self.recording.get_call(messages, agent)
+        latency = call.latency_seconds if self.latency_seconds is None else self.latency_seconds
+        return call, latency
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        call, latency = self._get_call(messages, run_manager)
+        time.sleep(latency)
+        return ChatResult(generations=[ChatGeneration(message=call.get_response_message())])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        call, latency = self._get_call(messages, run_manager)
+        await asyncio.sleep(latency)
+        return ChatResult(generations=[ChatGeneration(message=call.get_response_message())])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        call, latency = self._get_call(messages, run_manager)
+        await asyncio.sleep(latency)
+        message = call.get_response_message()
+        # The whole response in a single chunk, tool calls included
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=message.content,
+                additional_kwargs=message.additional_kwargs,
+                response_metadata=message.response_metadata,
+                usage_metadata=message.usage_metadata,
+                tool_call_chunks=[
+                    {
+                        "name": tool_call["name"],
+                        "args": json.dumps(tool_call["args"]),
+                        "id": tool_call["id"],
+                        "index": index,
+                    }
+                    for index, tool_call in enumerate(message.tool_calls)
+                ],
+            )
+        )
+
+
+_llm_recorder: LLMRecorder | None = None
+_llm_recording: LLMRecording | None = None
+_llm_replay_lock = threading.Lock()
+
+
+def get_llm_recorder() -> LLMRecorder | None:
+    """The shared recorder, or None when recording is not enabled."""
+    global _llm_recorder
+    if settings.LLM_RECORD_PATH is None:
+        return None
+    path = Path(settings.LLM_RECORD_PATH).expanduser()
+    with _llm_replay_lock:
+        if _llm_recorder is None or _llm_recorder.path != path:
+            _llm_recorder = LLMRecorder(path)
+            logger.info(f"Recording LLM calls to {path}")
+        return _llm_recorder
+
+
+def get_llm_recording() -> LLMRecording:
+    global _llm_recording
+    if settings.LLM_REPLAY_PATH is None:
+        raise ValueError("The replay provider requires LLM_REPLAY_PATH")
+    path = Path(settings.LLM_REPLAY_PATH).expanduser()
+    with _llm_replay_lock:
+        if (
+            _llm_recording is None
+            or _llm_recording.path != path
+            or _llm_recording.match != settings.LLM_REPLAY_MATCH
+        ):
+            _llm_recording = LLMRecording(path, match=settings.LLM_REPLAY_MATCH)
+            logger.info(f"Replaying LLM calls from {path} by {settings.LLM_REPLAY_MATCH}")
+        return _llm_recording
@@ -0,0 +1,264 @@
+"""
+Opt-in, disk-backed cache of the plans of past successful goals, to skip the Planner LLM for
+goals repeated with small variations ("send X to Y on WhatsApp").
+
+Goals are normalized into templates: their parameters (quoted texts, URLs, emails, numbers and
+names following words like "to" or "named") are replaced with placeholders, in the goal and in
+the subgoals of its plan. A new goal only matches the templates of its platform made of the
+same words, stopwords aside, since a single other word ("turn on" and "turn off") can ask for
+the opposite action. The plan of the most similar one is filled with the parameters of the goal.
+
+Enabled by setting `PLAN_CACHE_PATH`. Entries are evicted when they fail too often, and the
+least recently used ones once there are more than `PLAN_CACHE_MAX_ENTRIES`.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from minitap.mobile_use.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A cached plan is evicted once it was used this many times with less than this success rate
+PLAN_EVICTION_MIN_USES = 3
+PLAN_EVICTION_MIN_SUCCESS_RATE = 0.5
+
+# Words ignored when matching goal templates, none of them changing what the goal asks for
+_TEMPLATE_STOPWORDS = {"a", "an", "the", "my", "please", "then", "and"}
+_TEMPLATE_WORD_PATTERN = re.compile(r"\{\{\d+\}\}|[\w']+")
+
+# The parameter of each match is its "parameter" group
+_PARAMETER_PATTERNS = [
+    re.compile(r'(?P<parameter>"[^"]+"|“[^”]+”|\'[^\']+\')'),
+    re.compile(r"(?P<parameter>\bhttps?://\S+)"),
+    re.compile(r"(?P<parameter>\b[\w.+-]+@[\w-]+\.[\w.]+\b)"),
+    re.compile(r"(?P<parameter>\+?\d[\d\s().-]{5,}\d|\b\d+(?:[.,:]\d+)*\b)"),
+    # Names: capitalized words following a word introducing them
+    re.compile(
+        r"\b(?:to|from|for|with|named|called|contact|message|text|call) "
+        r"(?P<parameter>[A-Z][\w'-]*(?: [A-Z][\w'-]*)*)"
+    ),
+]
+
+
+def _get_placeholder(index: int) -> str:
+    return f"{{{{{index}}}}}"
+
+
+class GoalTemplate(BaseModel):
+    template: str
+    parameters: list[str]
+
+
+def extract_goal_template(goal: str) -> GoalTemplate:
+    """The template of the goal, its parameters being replaced by numbered placeholders."""
+    spans: list[tuple[int, int]] = []
+    for pattern in _PARAMETER_PATTERNS:
+        for match in pattern.finditer(goal):
+            start, end = match.span("parameter")
+            if all(end <= other_start or start >= other_end for other_start, other_end in spans):
+                spans.append((start, end))
+    spans.sort()
+
+    parts: list[str] = []
+    parameters: list[str] = []
+    position = 0
+    for start, end in spans:
+        parts.append(goal[position:start].lower())
+        parts.append(_get_placeholder(len(parameters)))
+        parameters.append(goal[start:end])
+        position = end
+    parts.append(goal[position:].lower())
+    template = " ".join("".join(parts).split()).rstrip(".!")
+    return GoalTemplate(template=template, parameters=parameters)
+
+
+def to_template_text(text: str, parameters: list[str]) -> str:
+    """The text with the parameters it contains replaced by their placeholders."""
+    # Longest first, so that a parameter containing another one is replaced whole
+    for index in sorted(range(len(parameters)), key=lambda i: -len(parameters[i])):
+        for parameter in {parameters[index], parameters[index].strip("\"'“”")}:
+            text = re.sub(rf"(?<!\w){re.escape(parameter)}(?!\w)", _get_placeholder(index), text)
+    return text
+
+
+def from_template_text(text: str, parameters: list[str]) -> str:
+    for index, parameter in enumerate(parameters):
+        text = text.replace(_get_placeholder(index), parameter.strip("\"'“”"))
+    return text
+
+
+def get_template_similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, a.split(), b.split()).ratio()
+
+
+def get_template_words(template: str) -> list[str]:
+    """The words and placeholders of the template, in order, its stopwords aside."""
+    return [
+        word for word in _TEMPLATE_WORD_PATTERN.findall(template) if word not in _TEMPLATE_STOPWORDS
+    ]
+
+
+class CachedSubgoal(BaseModel):
+    id: str | None
+    description: str
+
+
+class CachedPlan(BaseModel):
+    entry_id: int
+    similarity: float
+    subgoals: list[CachedSubgoal]
+
+
+class PlanCache:
+    """Plans of successful goals, per platform and goal template, in a SQLite database."""
+
+    def __init__(self, path: str | Path, max_entries: int):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "id INTEGER PRIMARY KEY, platform TEXT NOT NULL, template TEXT NOT NULL, "
+                "parameter_count INTEGER NOT NULL, subgoals TEXT NOT NULL, "
+                "successes INTEGER NOT NULL, failures INTEGER NOT NULL, "
+                "last_access REAL NOT NULL, UNIQUE (platform, template))"
+            )
+
+    def lookup(self, goal: str, platform: str) -> CachedPlan | None:
+        """
+        The plan of the most similar template made of the same words as the goal, filled with
+        the parameters of the goal.
+        """
+        goal_template = extract_goal_template(goal)
+        goal_words = get_template_words(goal_template.template)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, template, subgoals FROM plans "
+                "WHERE platform = ? AND parameter_count = ?",
+                (platform, len(goal_template.parameters)),
+            ).fetchall()
+            best: tuple[float, int, str] | None = None
+            for entry_id, template, subgoals in rows:
+                if get_template_words(template) != goal_words:
+                    continue
+                similarity = get_template_similarity(goal_template.template, template)
+                if best is None or similarity > best[0]:
+                    best = (similarity, entry_id, subgoals)
+            if best is None:
+                self.misses += 1
+                return None
+            similarity, entry_id, subgoals = best
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE plans SET last_access = ? WHERE id = ?", (time.time(), entry_id)
+                )
+            self.hits += 1
+        return CachedPlan(
+            entry_id=entry_id,
+            similarity=similarity,
+            subgoals=[
+                CachedSubgoal(
+                    id=subgoal["id"],
+                    description=from_template_text(
+                        subgoal["description"], goal_template.parameters
+                    ),
+                )
+                for subgoal in json.loads(subgoals)
+            ],
+        )
+
+    def add(self, goal: str, platform: str, subgoals: list[CachedSubgoal]):
+        """Caches the plan of a successful goal, replacing the one of the same template."""
+        goal_template = extract_goal_template(goal)
+        templated_subgoals = [
+            {
+                "id": subgoal.id,
+                "description": to_template_text(subgoal.description, goal_template.parameters),
+            }
+            for subgoal in subgoals
+        ]
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO plans (platform, template, parameter_count, subgoals, "
+                "successes, failures, last_access) VALUES (?, ?, ?, ?, 1, 0, ?)",
+                (
+                    platform,
+                    goal_template.template,
+                    len(goal_template.parameters),
+                    json.dumps(templated_subgoals),
+                    time.time(),
+                ),
+            )
+            self._evict_least_recently_used()
+
+    def record_outcome(self, entry_id: int, success: bool):
+        """Records whether a cached plan led its goal to success, evicting unreliable plans."""
+        column = "successes" if success else "failures"
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"UPDATE plans SET {column} = {column} + 1 WHERE id = ?", (entry_id,)
+            )
+            row = self._connection.execute(
+                "SELECT successes, failures FROM plans WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                return
+            successes, failures = row
+            uses = successes + failures
+            if uses >= PLAN_EVICTION_MIN_USES and successes / uses < PLAN_EVICTION_MIN_SUCCESS_RATE:
+                self._connection.execute("DELETE FROM plans WHERE id = ?", (entry_id,))
+                self.evictions += 1
+
+    def _evict_least_recently_used(self):
+        count = self._connection.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        cursor = self._connection.execute(
+            "DELETE FROM plans WHERE id IN (SELECT id FROM plans ORDER BY last_access ASC LIMIT ?)",
+            (count - self.max_entries,),
+        )
+        self.evictions += cursor.rowcount
+
+    def count_entries(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0
+        return (
+            f"{self.hits} hits, {self.misses} misses ({ratio:.0%} hit rate), "
+            f"{self.evictions} evictions"
+        )
+
+
+_plan_cache: PlanCache | None = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache | None:
+    """The shared plan cache, or None when it is not enabled."""
+    global _plan_cache
+    if settings.PLAN_CACHE_PATH is None:
+        return None
+    path = Path(settings.PLAN_CACHE_PATH).expanduser()
+    with _plan_cache_lock:
+        if _plan_cache is None or _plan_cache.path != path:
+            _plan_cache = PlanCache(path=path, max_entries=settings.PLAN_CACHE_MAX_ENTRIES)
+            logger.info(f"Plan cache enabled at {_plan_cache.path}")
+        return _plan_cache
@@ -0,0 +1,158 @@
+"""
+Client-side rate limiting of the LLM calls, shared by all the tasks of the process.
+
+A limiter caps the number of concurrent calls and the estimated prompt tokens per minute of a
+provider or of a model. Calls waiting for a limiter are served in turns across tasks, so a
+task bursting calls does not starve the others.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+
+from langchain_core.messages import BaseMessage
+
+# Rough cost of an image, most providers bill a screenshot between 500 and 1500 tokens
+IMAGE_TOKENS_ESTIMATE = 1000
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+# Identifies the task an LLM call is made for, to queue the calls fairly across tasks
+llm_caller_id: ContextVar[str] = ContextVar("llm_caller_id", default="default")
+
+
+def estimate_prompt_tokens(messages: list[BaseMessage]) -> int:
+    chars, images = 0, 0
+    for message in messages:
+        if isinstance(message.content, str):
+            chars += len(message.content)
+            continue
+        for block in message.content:
+            if isinstance(block, str):
+                chars += len(block)
+            elif block.get("type") in ("image_url", "image"):
+                images += 1
+            else:
+                chars += len(str(block.get("text", "")))
+    return chars // CHARS_PER_TOKEN_ESTIMATE + images * IMAGE_TOKENS_ESTIMATE
+
+
+class _Waiter:
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+
+class RateLimiter:
+    """Concurrency cap and token bucket (refilled continuously) of a provider or a model."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int | None = None,
+        tokens_per_minute: int | None = None,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.acquisitions = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._in_flight = 0
+        self._tokens = float(tokens_per_minute or 0)
+        self._refilled_at = time.monotonic()
+        # Waiting calls of each task, the task served next being the first one
+        self._queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self._refill_timer: asyncio.TimerHandle | None = None
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.tokens_per_minute is not None:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60,
+            )
+        self._refilled_at = now
+
+    def _get_missing_tokens(self, tokens: int) -> float:
+        if self.tokens_per_minute is None:
+            return 0
+        # Prompts larger than the bucket only wait for it to be full
+        return max(0, min(tokens, self.tokens_per_minute) - self._tokens)
+
+    def _is_full(self) -> bool:
+        return self.max_concurrency is not None and self._in_flight >= self.max_concurrency
+
+    def _try_admit(self, waiter: _Waiter) -> bool:
+        if self._is_full():
+            return False
+        self._refill()
+        if self._get_missing_tokens(waiter.tokens) > 0:
+            return False
+        self._in_flight += 1
+        if self.tokens_per_minute is not None:
+            self._tokens -= min(waiter.tokens, self.tokens_per_minute)
+        return True
+
+    def _dispatch(self):
+        self._refill_timer = None
+        while self._queues:
+            caller_id, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            if waiter.future.done():  # Cancelled while waiting
+                queue.popleft()
+            elif self._try_admit(waiter):
+                queue.popleft()
+                waiter.future.set_result(None)
+                # Round-robin: the next call of this task goes after the other tasks
+                self._queues.move_to_end(caller_id)
+            else:
+                # A full limiter is dispatched again on release, a short bucket once refilled
+                missing_tokens = self._get_missing_tokens(waiter.tokens)
+                if not self._is_full() and missing_tokens > 0:
+                    assert self.tokens_per_minute is not None
+                    delay = missing_tokens * 60 / self.tokens_per_minute
+                    self._refill_timer = asyncio.get_running_loop().call_later(
+                        delay, self._dispatch
+                    )
+                return
+            if not queue:
+                del self._queues[caller_id]
+
+    async def acquire(self, tokens: int) -> float:
+        """Waits for a slot and for the tokens of the call. Returns the time spent waiting."""
+        self.acquisitions += 1
+        waiter = _Waiter(tokens)
+        if not self._queues and self._try_admit(waiter):
+            return 0
+        self._queues.setdefault(llm_caller_id.get(), deque()).append(waiter)
+        if self._refill_timer is None:
+            self._dispatch()
+
+        start = time.monotonic()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted right before being cancelled
+                self.release()
+            raise
+        waited = time.monotonic() - start
+        self.waits += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def release(self):
+        self._in_flight -= 1
+        if self._refill_timer is not None:
+            self._refill_timer.cancel()
+        self._dispatch()
+
+    def __str__(self) -> str:
+        mean_wait = self.wait_seconds / self.acquisitions if self.acquisitions else 0
+        return (
+            f"{self.waits}/{self.acquisitions} calls queued, {mean_wait:.2f}s mean wait, "
+            f"{self.max_wait_seconds:.2f}s max wait"
+        )
@@ -0,0 +1,62 @@
+from pathlib import Path
+from xml.etree.ElementTree import ParseError
+
+import pytest
+
+from minitap.mobile_use.services.accessibility import UiDumpParser, parse_ui_dump
+
+UI_DUMP = (
+    b"<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+    b'<hierarchy rotation="0">'
+    b'<node index="0" text="" resource-id="" class="android.widget.FrameLayout" '
+    b'content-desc="" clickable="false" focused="false" bounds="[0,0][1080,2290]">'
+    b'<node index="0" text="Search" resource-id="com.example:id/search" '
+    b'class="android.widget.EditText" content-desc="" clickable="true" focused="true" '
+    b'bounds="[40,100][1040,220]" />'
+    b"</node>"
+    b"</hierarchy>"
+)
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_parse_ui_dump_in_chunks(chunk_size: int):
+    output = b"WARNING: linker\n" + UI_DUMP + b"UI hierchary dumped to: /dev/tty\n"
+
+    hierarchy = parse_ui_dump(_chunks(output, chunk_size))
+
+    assert len(hierarchy.elements) == 2
+    search = hierarchy.find_by_resource_id("com.example:id/search")[0]
+    assert search == {
+        "text": "Search",
+        "resourceId": "com.example:id/search",
+        "accessibilityText": "",
+        "className": "android.widget.EditText",
+        "clickable": "true",
+        "focused": "true",
+        "bounds": {"x": 40, "y": 100, "width": 1000, "height": 120},
+    }
+    assert hierarchy.find_by_text("Search") == [search]
+    assert hierarchy.element_at(500, 150) is search
+    assert (hierarchy.width, hierarchy.height) == (1080, 2290)
+
+
+def test_parse_checked_in_ui_dump():
+    ui_dump = Path(__file__).parents[3] / "ui_dump.xml"
+
+    hierarchy = parse_ui_dump([ui_dump.read_bytes()])
+
+    assert hierarchy.elements[0]["packageName"] == "com.android.launcher3"
+    assert len(hierarchy.elements) == ui_dump.read_text().count("<node ")
+
+
+def test_ui_dump_parser_rejects_truncated_dump():
+    parser = UiDumpParser()
+    parser.feed(UI_DUMP[:-30])
+
+    assert not parser.done
+    with pytest.raises(ParseError):
+        parser.close()
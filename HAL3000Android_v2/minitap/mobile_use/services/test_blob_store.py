@@ -0,0 +1,85 @@
+import pytest
+
+from minitap.mobile_use.graph.state import State
+from minitap.mobile_use.services.blob_store import BlobStore, get_blob_store
+
+HIERARCHY = [{"text": "Settings", "bounds": {"x": 0, "y": 0, "width": 10, "height": 10}}]
+
+
+def test_references_resolve_to_the_stored_blobs():
+    store = BlobStore()
+    try:
+        screenshot = store.put_text("iVBORw0KGgo=")
+        hierarchy = store.put_json(HIERARCHY)
+
+        assert screenshot.load_text() == "iVBORw0KGgo="
+        assert hierarchy.load_json() == HIERARCHY
+        assert hierarchy.load_json() is hierarchy.load_json()
+    finally:
+        store.close()
+
+
+def test_identical_blobs_are_stored_once():
+    store = BlobStore()
+    try:
+        first = store.put_json(HIERARCHY)
+        second = store.put_json(HIERARCHY)
+
+        assert first == second
+        assert store.deduplicated == 1
+    finally:
+        store.close()
+
+
+def test_least_recently_used_blobs_are_spilled_to_disk():
+    store = BlobStore(max_memory_bytes=1000)
+    try:
+        refs = [store.put(bytes([i]) * 400) for i in range(5)]
+
+        assert store.spills == 3
+        assert [ref.load_bytes() for ref in refs] == [bytes([i]) * 400 for i in range(5)]
+        directory = store.directory
+        assert directory is not None and directory.exists()
+    finally:
+        store.close()
+    assert not directory.exists()
+
+
+def test_persistent_stores_are_resolved_after_being_reopened(tmp_path):
+    store = BlobStore(store_id="task", directory=tmp_path)
+    ref = store.put_text("screenshot")
+    store.close()
+    with pytest.raises(KeyError):
+        get_blob_store("task")
+
+    reopened = BlobStore(store_id="task", directory=tmp_path)
+    try:
+        assert ref.load_text() == "screenshot"
+    finally:
+        reopened.close()
+
+
+def test_state_only_holds_references():
+    store = BlobStore()
+    try:
+        state = State(
+            messages=[],
+            initial_goal="Open the settings",
+            subgoal_plan=[],
+            latest_ui_hierarchy=store.put_json(HIERARCHY),
+            latest_screenshot_base64=store.put_text("a" * 1_000_000),
+            focused_app_info=None,
+            device_date=None,
+            structured_decisions=None,
+            complete_subgoals_by_ids=[],
+            agents_thoughts=[],
+            remaining_steps=10,
+            executor_messages=[],
+            cortex_last_thought=None,
+        )
+
+        assert len(state.model_dump_json()) < 2000
+        assert state.get_latest_ui_hierarchy() == HIERARCHY
+        assert state.get_latest_screenshot_base64() == "a" * 1_000_000
+    finally:
+        store.close()
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections.abc import Iterator
+
+from adbutils import AdbClient, AdbDevice
+
+from minitap.mobile_use.services.foreground_app import (
+    _PROBE_END_MARKER,
+    ForegroundAppWatcher,
+    parse_focused_app_info,
+)
+
+SETTINGS = (
+    "  mCurrentFocus=Window{8a1 u0 com.android.settings/com.android.settings.Settings}\n"
+    "  mFocusedApp=ActivityRecord{2f1c u0 com.android.settings/.Settings t12}"
+)
+KEYBOARD_OVER_CHROME = (
+    "  mCurrentFocus=Window{3b2 u0 InputMethod}\n"
+    "  mFocusedApp=ActivityRecord{9d0 u0 com.android.chrome/com.google.android.apps.chrome.Main t7}"
+)
+
+
+class ScriptedWatcher(ForegroundAppWatcher):
+    """Replays probe outputs, then stops."""
+
+    def __init__(self, probes: list[str]):
+        super().__init__(AdbDevice(AdbClient(), serial="emulator-5554"), interval_seconds=0.5)
+        self.probes = probes
+        self.timestamps: list[float] = []
+
+    def _read_probe_lines(self) -> Iterator[str]:
+        for probe in self.probes:
+            yield from (line + "\n" for line in probe.splitlines())
+            yield _PROBE_END_MARKER + "\n"
+            self.timestamps.append(time.time())
+            time.sleep(0.01)
+        self._stopped.set()
+
+
+def test_focused_app_is_read_from_the_focused_activity():
+    assert parse_focused_app_info(SETTINGS) == (
+        "com.android.settings",
+        "com.android.settings.Settings",
+    )
+    assert parse_focused_app_info(KEYBOARD_OVER_CHROME) == (
+        "com.android.chrome",
+        "com.google.android.apps.chrome.Main",
+    )
+    assert parse_focused_app_info("") == (None, None)
+
+
+def test_watcher_only_records_transitions():
+    watcher = ScriptedWatcher([SETTINGS, SETTINGS, KEYBOARD_OVER_CHROME, KEYBOARD_OVER_CHROME])
+
+    watcher._run()
+
+    current = watcher.get_current()
+    assert current is not None
+    assert current.package == "com.android.chrome"
+    assert current.focused_app_info == KEYBOARD_OVER_CHROME
+    assert watcher.changes == 1
+    assert watcher.has_changed_since(watcher.timestamps[1])
+    assert not watcher.has_changed_since(watcher.timestamps[2])
+
+
+def test_lookups_wait_for_a_probe_newer_than_the_capture():
+    watcher = ScriptedWatcher([SETTINGS])
+    watcher._update(SETTINGS)
+    captured_at = time.time()
+    # Without a newer probe, the latest one is returned once the timeout is over
+    stale = watcher.wait_for_probe(after=captured_at, timeout=0.01)
+    assert stale is not None and stale.package == "com.android.settings"
+
+    threading.Timer(0.05, watcher._update, args=(KEYBOARD_OVER_CHROME,)).start()
+    current = watcher.wait_for_probe(after=captured_at, timeout=1)
+
+    assert current is not None
+    assert current.package == "com.android.chrome"
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import HumanMessage
+from pydantic import SecretStr
+
+from minitap.mobile_use.config import (
+    LLM,
+    LLMConfig,
+    LLMConfigUtils,
+    LLMRateLimit,
+    LLMWithFallback,
+    settings,
+)
+from minitap.mobile_use.context import MobileUseContext
+from minitap.mobile_use.services import llm as llm_service
+from minitap.mobile_use.services.hedging import HedgingLatencies
+from minitap.mobile_use.services.llm import (
+    clear_llm_clients,
+    get_cerebras_llm,
+    get_hedging_latencies,
+    get_llm,
+    get_rate_limiters,
+    rate_limited,
+    warm_up_llm_clients,
+    with_fallback,
+)
+from minitap.mobile_use.services.llm_cache import SQLiteLLMCache
+from minitap.mobile_use.services.llm_replay import ReplayChatModel
+
+
+def _get_ctx() -> MobileUseContext:
+    llm = LLM(provider="openai", model="gpt-5-nano")
+    llm_with_fallback = LLMWithFallback(
+        provider="openai", model="gpt-5-nano", fallback=LLM(provider="openai", model="gpt-5-mini")
+    )
+    llm_config = LLMConfig(
+        planner=llm,
+        orchestrator=llm,
+        contextor=llm_with_fallback,
+        cortex=llm_with_fallback,
+        executor=llm,
+        utils=LLMConfigUtils(outputter=llm, hopper=llm),
+    )
+    return MobileUseContext.model_construct(llm_config=llm_config, hedging_stats={})
+
+
+def test_get_llm_reuses_clients(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", SecretStr("key"))
+    clear_llm_clients()
+    ctx = _get_ctx()
+
+    cortex = get_llm(ctx=ctx, name="cortex", temperature=1)
+
+    assert get_llm(ctx=ctx, name="cortex", temperature=1) is cortex
+    assert get_llm(ctx=ctx, name="planner", temperature=1) is cortex
+    assert get_llm(ctx=ctx, name="cortex", temperature=0) is not cortex
+    assert get_llm(ctx=ctx, name="cortex", use_fallback=True, temperature=1) is not cortex
+    clear_llm_clients()
+
+
+def test_cerebras_client_is_a_chat_model(monkeypatch):
+    monkeypatch.setattr(settings, "CEREBRAS_API_KEY", SecretStr("key"))
+
+    llm = get_cerebras_llm("qwen-3-235b-a22b-instruct-2507", temperature=0)
+
+    assert isinstance(llm, BaseChatModel)
+    assert llm.with_structured_output(LLM) is not None
+
+
+def test_get_llm_response_cache_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", SecretStr("key"))
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    clear_llm_clients()
+    ctx = _get_ctx()
+
+    cached = get_llm(ctx=ctx, name="planner", temperature=0, use_response_cache=True)
+    uncached = get_llm(ctx=ctx, name="planner", temperature=0)
+
+    assert isinstance(cached.cache, SQLiteLLMCache)
+    assert uncached.cache is None
+    clear_llm_clients()
+
+
+def test_replay_provider_serves_the_recording(monkeypatch, tmp_path):
+    path = tmp_path / "recording.jsonl"
+    path.write_text("")
+    monkeypatch.setattr(settings, "LLM_REPLAY_PATH", str(path))
+    monkeypatch.setattr(settings, "LLM_REPLAY_LATENCY_SECONDS", 0.5)
+    clear_llm_clients()
+    llm = LLM(provider="replay", model="recording")
+    ctx = MobileUseContext.model_construct(
+        llm_config=LLMConfig(
+            planner=llm,
+            orchestrator=llm,
+            contextor=LLMWithFallback(provider="replay", model="recording", fallback=llm),
+            cortex=LLMWithFallback(provider="replay", model="recording", fallback=llm),
+            executor=llm,
+            utils=LLMConfigUtils(outputter=llm, hopper=llm),
+        )
+    )
+
+    client = get_llm(ctx=ctx, name="cortex")
+
+    assert isinstance(client, ReplayChatModel)
+    assert client.latency_seconds == 0.5
+    clear_llm_clients()
+
+
+def test_warm_up_only_reports_the_clients_that_opened_connections(monkeypatch, caplog):
+    monkeypatch.setattr(
+        llm_service,
+        "_get_pooled_llm",
+        lambda *args, **kwargs: FakeMessagesListChatModel(responses=[]),
+    )
+
+    with caplog.at_level(logging.INFO, logger=llm_service.__name__):
+        asyncio.run(warm_up_llm_clients(_get_ctx().llm_config))
+
+    assert "Warmed up" not in caplog.text
+
+
+def test_rate_limited_holds_the_provider_and_model_slots(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", SecretStr("key"))
+    monkeypatch.setattr(
+        settings,
+        "LLM_RATE_LIMITS",
+        {"openai/gpt-5-nano": LLMRateLimit(max_concurrency=1), "openai": LLMRateLimit()},
+    )
+    clear_llm_clients()
+    llm = get_llm(ctx=_get_ctx(), name="planner", temperature=1)
+    messages = [HumanMessage(content="Open the settings")]
+    order: list[str] = []
+
+    async def call(name: str):
+        async with rate_limited(llm, messages):
+            order.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            order.append(f"end {name}")
+
+    async def run():
+        await asyncio.gather(call("a"), call("b"))
+
+    asyncio.run(run())
+
+    assert order == ["start a", "end a", "start b", "end b"]
+    limiters = get_rate_limiters()
+    assert limiters["openai/gpt-5-nano"].waits == 1
+    assert limiters["openai"].acquisitions == 2
+    clear_llm_clients()
+
+
+def _delayed(value, delay: float, calls: list[str] | None = None):
+    async def call():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append(f"cancelled {value}")
+            raise
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return call
+
+
+def test_with_fallback_hedges_slow_main_calls():
+    calls: list[str] = []
+
+    result = asyncio.run(
+        with_fallback(
+            main_call=_delayed("main", 1, calls),
+            fallback_call=_delayed("fallback", 0.01, calls),
+            hedge_after=0.05,
+        )
+    )
+
+    assert result == "fallback"
+    assert calls == ["cancelled main"]
+
+
+def test_with_fallback_keeps_the_main_result_when_it_comes_first():
+    calls: list[str] = []
+
+    result = asyncio.run(
+        with_fallback(
+            main_call=_delayed("main", 0.1, calls),
+            fallback_call=_delayed("fallback", 1, calls),
+            hedge_after=0.05,
+        )
+    )
+
+    assert result == "main"
+    assert calls == ["cancelled fallback"]
+
+
+def test_with_fallback_hedging_threshold_is_the_rolling_p90_of_the_node():
+    latencies = get_hedging_latencies().setdefault("test_node", HedgingLatencies())
+    latencies.latencies.extend([0.01] * 9 + [0.02])
+    assert latencies.get_threshold() == 0.01
+    ctx = _get_ctx()
+
+    result = asyncio.run(
+        with_fallback(
+            main_call=_delayed(ValueError("main failed"), 0.1),
+            fallback_call=_delayed("fallback", 0.2),
+            name="test_node",
+            ctx=ctx,
+        )
+    )
+
+    assert result == "fallback"
+    stats = ctx.hedging_stats["test_node"]
+    assert (stats.calls, stats.hedged, stats.won_by_fallback) == (1, 1, 1)
+    # The fallback started 0.09s before the main call failed
+    assert 0.05 < stats.saved_seconds < 0.2
+    get_hedging_latencies().pop("test_node")
+
+
+def test_with_fallback_hedging_threshold_counts_the_main_calls_lost_to_the_fallback():
+    latencies = get_hedging_latencies().setdefault("test_node", HedgingLatencies())
+    latencies.latencies.extend([0.02] * 10)
+    ctx = _get_ctx()
+
+    async def run():
+        # 40% of the main calls are slow, and always lost to the hedged fallback
+        for _ in range(25):
+            for delay in (0.001, 0.001, 0.001, 1, 1):
+                await with_fallback(
+                    main_call=_delayed("main", delay),
+                    fallback_call=_delayed("fallback", 0.005),
+                    name="test_node",
+                    ctx=ctx,
+                )
+
+    asyncio.run(run())
+
+    assert ctx.hedging_stats["test_node"].won_by_fallback == 50
+    threshold = latencies.get_threshold()
+    assert threshold is not None and threshold >= 0.02
+    get_hedging_latencies().pop("test_node")
+
+
+def test_with_fallback_hedging_stats_are_counted_per_task():
+    get_hedging_latencies().setdefault("test_node", HedgingLatencies()).latencies.extend(
+        [0.01] * 10
+    )
+    first_task_ctx, second_task_ctx = _get_ctx(), _get_ctx()
+
+    async def run(ctx: MobileUseContext):
+        await with_fallback(
+            main_call=_delayed("main", 1),
+            fallback_call=_delayed("fallback", 0.01),
+            name="test_node",
+            ctx=ctx,
+        )
+
+    asyncio.run(run(first_task_ctx))
+    asyncio.run(run(second_task_ctx))
+
+    assert first_task_ctx.hedging_stats["test_node"].won_by_fallback == 1
+    assert second_task_ctx.hedging_stats["test_node"].won_by_fallback == 1
+    get_hedging_latencies().pop("test_node")
@@ -0,0 +1,77 @@
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from minitap.mobile_use.services.llm_cache import SQLiteLLMCache, compute_cache_key
+
+
+class _FakeChatModel(FakeMessagesListChatModel):
+    @property
+    def _identifying_params(self) -> dict:
+        # The fake model counts its calls in its parameters: keep them stable
+        return {"model": "fake"}
+
+
+def _generations(text: str) -> list[ChatGeneration]:
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_lookup_returns_the_cached_generations(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite", max_size_bytes=1024 * 1024)
+
+    assert cache.lookup("prompt", "model") is None
+    cache.update("prompt", "model", _generations("answer"))
+
+    cached = cache.lookup("prompt", "model")
+    assert cached is not None
+    assert cached[0].message.content == "answer"
+    assert cache.lookup("prompt", "other model") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_is_persisted(tmp_path):
+    SQLiteLLMCache(tmp_path / "cache.sqlite", max_size_bytes=1024 * 1024).update(
+        "prompt", "model", _generations("answer")
+    )
+
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite", max_size_bytes=1024 * 1024)
+
+    assert cache.lookup("prompt", "model") is not None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite", max_size_bytes=1024 * 1024)
+    cache.update("probe", "model", _generations("x" * 100))
+    entry_size = cache._connection.execute("SELECT size FROM responses").fetchone()[0]
+    cache.clear()
+    cache.max_size_bytes = entry_size * 2
+
+    cache.update("first", "model", _generations("x" * 100))
+    cache.update("second", "model", _generations("x" * 100))
+    cache.lookup("first", "model")
+    cache.update("third", "model", _generations("x" * 100))
+
+    assert cache.count_entries() == 2
+    assert cache.lookup("second", "model") is None
+    assert cache.lookup("first", "model") is not None
+    assert cache.evictions == 1
+
+
+def test_chat_model_calls_are_served_from_the_cache(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite", max_size_bytes=1024 * 1024)
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}
+    messages = [HumanMessage(content=[{"type": "text", "text": "Describe"}, image])]
+    llm = _FakeChatModel(
+        responses=[AIMessage(content="home screen"), AIMessage(content="other")], cache=cache
+    )
+
+    first = llm.invoke(messages)
+    second = llm.invoke(messages)
+
+    assert first.content == second.content == "home screen"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_key_depends_on_prompt_and_llm():
+    assert compute_cache_key("a", "b") == compute_cache_key("a", "b")
+    assert compute_cache_key("a", "b") != compute_cache_key("ab", "")
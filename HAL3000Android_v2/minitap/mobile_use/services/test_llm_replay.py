@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from minitap.mobile_use.agents.cortex.streaming import CortexStream
+from minitap.mobile_use.services.llm_replay import (
+    LLMRecorder,
+    LLMRecording,
+    ReplayChatModel,
+    ReplayMissError,
+    compute_request_hash,
+)
+from minitap.mobile_use.utils.llm_usage import get_agent_run_config
+
+
+class Plan(BaseModel):
+    subgoals: list[str]
+
+
+MESSAGES = [SystemMessage(content="You are a planner"), HumanMessage(content="Open the settings")]
+PLAN_MESSAGE = AIMessage(
+    content="",
+    tool_calls=[{"name": "Plan", "args": {"subgoals": ["Open settings"]}, "id": "call_0"}],
+)
+
+
+def _record(path, responses: list[AIMessage], agent: str = "planner") -> None:
+    recorder = LLMRecorder(path)
+    llm = FakeMessagesListChatModel(responses=responses, callbacks=[recorder])
+    for _ in responses:
+        llm.invoke(MESSAGES, config=get_agent_run_config(agent))
+
+
+def test_replayed_tool_calls_are_parsed_as_structured_outputs(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    _record(path, [PLAN_MESSAGE])
+
+    llm = ReplayChatModel(recording=LLMRecording(path))
+    plan = llm.with_structured_output(Plan).invoke(MESSAGES)
+
+    assert plan == Plan(subgoals=["Open settings"])
+
+
+def test_replayed_structured_outputs_include_the_raw_message(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    _record(path, [PLAN_MESSAGE, AIMessage(content="Not a plan")])
+
+    llm = ReplayChatModel(recording=LLMRecording(path), latency_seconds=0)
+    structured_llm = llm.with_structured_output(Plan, include_raw=True)
+    result = structured_llm.invoke(MESSAGES)
+    invalid_result = structured_llm.invoke(MESSAGES)
+
+    assert result["parsed"] == Plan(subgoals=["Open settings"])
+    assert result["raw"].tool_calls == PLAN_MESSAGE.tool_calls
+    assert result["parsing_error"] is None
+    assert invalid_result["raw"].content == "Not a plan"
+    assert invalid_result["parsed"] is None
+    assert invalid_result["parsing_error"] is not None
+
+
+def test_request_hash_ignores_cache_control_blocks():
+    annotated = [
+        SystemMessage(
+            content=[
+                {
+                    "type": "text",
+                    "text": "You are a planner",
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        ),
+        HumanMessage(content="Open the settings"),
+    ]
+
+    assert compute_request_hash(annotated) == compute_request_hash(MESSAGES)
+    assert compute_request_hash(MESSAGES[:1]) != compute_request_hash(MESSAGES)
+
+
+def test_unknown_requests_are_misses(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    _record(path, [PLAN_MESSAGE])
+    llm = ReplayChatModel(recording=LLMRecording(path))
+
+    with pytest.raises(ReplayMissError):
+        llm.invoke([HumanMessage(content="Open the camera")])
+
+
+def test_sequence_replay_serves_each_agent_in_recorded_order(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    _record(path, [AIMessage(content="first"), AIMessage(content="second")])
+    llm = ReplayChatModel(recording=LLMRecording(path, match="sequence"))
+    config = get_agent_run_config("planner")
+
+    # The requests do not matter, only the order of the calls of the agent
+    assert llm.invoke("anything", config=config).content == "first"
+    assert llm.invoke("anything", config=config).content == "second"
+    with pytest.raises(ReplayMissError):
+        llm.invoke("anything", config=get_agent_run_config("cortex"))
+
+
+def test_replayed_streams_carry_the_tool_calls(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    args = {
+        "decisions": json.dumps({"action": "tap"}),
+        "agent_thought": "Tapping",
+        "complete_subgoals_by_ids": [],
+    }
+    _record(
+        path,
+        [AIMessage(content="", tool_calls=[{"name": "CortexOutput", "args": args, "id": "c"}])],
+    )
+    llm = ReplayChatModel(recording=LLMRecording(path), latency_seconds=0.01)
+
+    async def run():
+        stream = CortexStream(llm, MESSAGES)
+        return await stream.output
+
+    output = asyncio.run(run())
+
+    assert output.decisions == args["decisions"]
+    assert output.agent_thought == "Tapping"
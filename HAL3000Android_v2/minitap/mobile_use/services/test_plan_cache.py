@@ -0,0 +1,89 @@
+from minitap.mobile_use.services.plan_cache import (
+    PLAN_EVICTION_MIN_USES,
+    CachedSubgoal,
+    PlanCache,
+    extract_goal_template,
+)
+
+GOAL = 'Send "See you tomorrow" to John Smith on WhatsApp'
+PLAN = [
+    CachedSubgoal(id="1", description="Open WhatsApp"),
+    CachedSubgoal(id="2", description="Open the conversation with John Smith"),
+    CachedSubgoal(id="3", description="Send the message 'See you tomorrow'"),
+]
+
+
+def _get_cache(tmp_path, max_entries: int = 10) -> PlanCache:
+    return PlanCache(tmp_path / "plans.sqlite", max_entries=max_entries)
+
+
+def test_parameters_are_extracted_from_the_goal():
+    goal_template = extract_goal_template(GOAL)
+
+    assert goal_template.template == "send {{0}} to {{1}} on whatsapp"
+    assert goal_template.parameters == ['"See you tomorrow"', "John Smith"]
+    assert extract_goal_template("Set an alarm at 7:30").template == "set an alarm at {{0}}"
+
+
+def test_lookup_fills_the_plan_of_a_similar_goal_with_its_parameters(tmp_path):
+    cache = _get_cache(tmp_path)
+    cache.add(goal=GOAL, platform="android", subgoals=PLAN)
+
+    cached_plan = cache.lookup('send "Running late" to Alice on WhatsApp.', platform="android")
+
+    assert cached_plan is not None
+    assert [subgoal.description for subgoal in cached_plan.subgoals] == [
+        "Open WhatsApp",
+        "Open the conversation with Alice",
+        "Send the message 'Running late'",
+    ]
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_lookup_misses_different_goals_and_platforms(tmp_path):
+    cache = _get_cache(tmp_path)
+    cache.add(goal=GOAL, platform="android", subgoals=PLAN)
+
+    assert cache.lookup(GOAL, platform="ios") is None
+    assert cache.lookup('Send "See you tomorrow" on WhatsApp', platform="android") is None
+    assert cache.lookup('Call John Smith and say "See you tomorrow"', platform="android") is None
+    assert cache.misses == 3
+
+
+def test_lookup_misses_goals_differing_by_a_single_word(tmp_path):
+    cache = _get_cache(tmp_path)
+    goal = "Open the settings app and turn on the bluetooth toggle in quick settings"
+    cache.add(
+        goal=goal,
+        platform="android",
+        subgoals=[CachedSubgoal(id="1", description="Turn on bluetooth")],
+    )
+
+    assert cache.lookup(goal.replace(" on ", " off "), platform="android") is None
+    assert cache.lookup(goal.replace("the settings", "settings"), platform="android") is not None
+
+
+def test_unreliable_plans_are_evicted(tmp_path):
+    cache = _get_cache(tmp_path)
+    cache.add(goal=GOAL, platform="android", subgoals=PLAN)
+    cached_plan = cache.lookup(GOAL, platform="android")
+    assert cached_plan is not None
+
+    for _ in range(PLAN_EVICTION_MIN_USES - 1):
+        cache.record_outcome(cached_plan.entry_id, success=False)
+
+    assert cache.count_entries() == 0
+    assert cache.evictions == 1
+
+
+def test_least_recently_used_plans_are_evicted(tmp_path):
+    cache = _get_cache(tmp_path, max_entries=2)
+    cache.add(goal="Open the settings", platform="android", subgoals=PLAN)
+    cache.add(goal="Open the camera", platform="android", subgoals=PLAN)
+    assert cache.lookup("Open the settings", platform="android") is not None
+
+    cache.add(goal="Open the calendar", platform="android", subgoals=PLAN)
+
+    assert cache.count_entries() == 2
+    assert cache.lookup("Open the settings", platform="android") is not None
+    assert cache.lookup("Open the camera", platform="android") is None
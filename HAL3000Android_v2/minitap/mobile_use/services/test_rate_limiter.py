@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from langchain_core.messages import HumanMessage
+
+from minitap.mobile_use.services.rate_limiter import (
+    IMAGE_TOKENS_ESTIMATE,
+    RateLimiter,
+    estimate_prompt_tokens,
+    llm_caller_id,
+)
+
+
+def test_estimate_prompt_tokens_counts_text_and_images():
+    messages = [
+        HumanMessage(content="a" * 400),
+        HumanMessage(
+            content=[
+                {"type": "text", "text": "b" * 40},
+                {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+            ]
+        ),
+    ]
+
+    assert estimate_prompt_tokens(messages) == 110 + IMAGE_TOKENS_ESTIMATE
+
+
+def test_concurrency_is_capped():
+    async def run():
+        limiter = RateLimiter("openai", max_concurrency=2)
+        in_flight, max_in_flight = 0, 0
+
+        async def call():
+            nonlocal in_flight, max_in_flight
+            await limiter.acquire(tokens=10)
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            limiter.release()
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        return limiter, max_in_flight
+
+    limiter, max_in_flight = asyncio.run(run())
+
+    assert max_in_flight == 2
+    assert limiter.acquisitions == 6
+    assert limiter.waits == 4
+    assert limiter.max_wait_seconds > 0
+
+
+def test_waiting_calls_are_served_in_turns_across_tasks():
+    async def run():
+        limiter = RateLimiter("openai", max_concurrency=1)
+        served: list[str] = []
+        await limiter.acquire(tokens=10)
+
+        async def call(caller: str):
+            llm_caller_id.set(caller)
+            await limiter.acquire(tokens=10)
+            served.append(caller)
+            await asyncio.sleep(0)
+            limiter.release()
+
+        # The first task bursts its calls before the second one queues any
+        calls = [asyncio.create_task(call("a")) for _ in range(3)]
+        await asyncio.sleep(0)
+        calls += [asyncio.create_task(call("b")) for _ in range(2)]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*calls)
+        return served
+
+    assert asyncio.run(run()) == ["a", "b", "a", "b", "a"]
+
+
+def test_token_bucket_delays_calls_until_refilled():
+    async def run():
+        limiter = RateLimiter("openai/gpt-4.1", tokens_per_minute=6000)
+        await limiter.acquire(tokens=6000)
+        limiter.release()
+
+        start = time.monotonic()
+        # 10 tokens are refilled in 0.1s
+        await limiter.acquire(tokens=10)
+        limiter.release()
+        return time.monotonic() - start
+
+    assert 0.08 < asyncio.run(run()) < 0.5
+
+
+def test_cancelled_waiters_do_not_hold_a_slot():
+    async def run():
+        limiter = RateLimiter("openai", max_concurrency=1)
+        await limiter.acquire(tokens=10)
+        waiter = asyncio.create_task(limiter.acquire(tokens=10))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+
+        await asyncio.wait_for(limiter.acquire(tokens=10), timeout=1)
+        limiter.release()
+
+    asyncio.run(run())
@@ -0,0 +1,81 @@
+import base64
+from io import BytesIO
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+from PIL import Image, ImageDraw
+
+from minitap.mobile_use.config import ImagePolicy, settings
+from minitap.mobile_use.services.vision import (
+    NAVIGATION_BAR_HEIGHT_DP,
+    STATUS_BAR_HEIGHT_DP,
+    TYPICAL_SCREEN_WIDTH_DP,
+    encode_image_data_url,
+    optimize_images,
+)
+from minitap.mobile_use.utils.conversations import get_screenshot_message_for_llm
+
+
+def _screenshot(width: int = 1080, height: int = 2400, format: str = "PNG") -> str:
+    image = Image.new("RGB", (width, height), "white")
+    # A photo-like area (e.g. a wallpaper), that PNG does not compress well
+    image.paste(Image.effect_noise((width, height // 3), 40).convert("RGB"))
+    draw = ImageDraw.Draw(image)
+    for row in range(0, height, 120):
+        draw.rectangle((40, row + 20, width - 40, row + 100), fill=(row % 255, 90, 200))
+        draw.text((60, row + 50), f"Row {row}", fill="black")
+    output = BytesIO()
+    image.save(output, format=format)
+    mime = format.lower()
+    return f"data:image/{mime};base64,{base64.b64encode(output.getvalue()).decode()}"
+
+
+def _decode(data_url: str) -> Image.Image:
+    return Image.open(BytesIO(base64.b64decode(data_url.partition(",")[2])))
+
+
+def test_screenshots_are_downscaled_and_reencoded():
+    screenshot = _screenshot()
+
+    encoded = encode_image_data_url(screenshot, ImagePolicy(max_dimension=1000, quality=70))
+
+    assert encoded.startswith("data:image/jpeg;base64,")
+    assert _decode(encoded).size == (450, 1000)
+    assert len(encoded) < len(screenshot)
+
+
+def test_system_bars_are_cropped_and_grayscale_is_applied():
+    policy = ImagePolicy(max_dimension=None, crop_system_bars=True, grayscale=True)
+
+    image = _decode(encode_image_data_url(_screenshot(), policy))
+
+    bars_height = round(STATUS_BAR_HEIGHT_DP * 1080 / TYPICAL_SCREEN_WIDTH_DP) + round(
+        NAVIGATION_BAR_HEIGHT_DP * 1080 / TYPICAL_SCREEN_WIDTH_DP
+    )
+    assert image.size == (1080, 2400 - bars_height)
+    assert image.mode == "L"
+
+
+def test_smaller_originals_are_kept():
+    screenshot = _screenshot(width=540, height=1200, format="JPEG")
+
+    assert encode_image_data_url(screenshot, ImagePolicy(quality=100)) == screenshot
+
+
+def test_frames_are_encoded_once_per_policy(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_IMAGE_POLICIES", {"default": ImagePolicy(quality=60)})
+    llm = FakeListChatModel(responses=["ok"])
+    messages = [
+        HumanMessage(content="Here is the screen"),
+        get_screenshot_message_for_llm(_screenshot()),
+    ]
+    encode_image_data_url.cache_clear()
+
+    first = optimize_images(llm, messages)
+    second = optimize_images(llm, messages)
+
+    assert first[0] is messages[0]
+    assert first[1].content[0]["image_url"]["url"].startswith("data:image/jpeg;base64,")
+    assert first[1].content == second[1].content
+    assert encode_image_data_url.cache_info().misses == 1
+    assert encode_image_data_url.cache_info().hits == 1
@@ -0,0 +1,118 @@
+"""
+Per-model encoding of the screenshots sent to the LLMs.
+
+Screenshots come from the device at full resolution (often a 1080x2400 PNG), which is costly to
+upload and to process. The image policy of a model (see `LLM_IMAGE_POLICIES`) bounds their size,
+re-encodes them, and can turn them to grayscale or crop out the system bars. Each frame is only
+encoded once per policy, and shared by all the agents sending it.
+"""
+
+import base64
+import binascii
+from functools import lru_cache
+from io import BytesIO
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from PIL import Image
+
+from minitap.mobile_use.config import ImagePolicy, settings
+from minitap.mobile_use.services.llm import get_pooled_llm_model
+from minitap.mobile_use.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Android system bars, in dp, converted to pixels with the density of a typical phone width
+STATUS_BAR_HEIGHT_DP = 24
+NAVIGATION_BAR_HEIGHT_DP = 48
+TYPICAL_SCREEN_WIDTH_DP = 411
+
+# Frames are shared by the agents of a step, and by their main and fallback models
+ENCODED_FRAMES_CACHE_SIZE = 16
+
+_PIL_FORMATS = {"jpeg": "JPEG", "webp": "WEBP", "png": "PNG"}
+
+
+def get_image_policy(llm: BaseChatModel) -> ImagePolicy:
+    """The policy of the model of a pooled client: its own, its provider's, or the default."""
+    model = get_pooled_llm_model(llm)
+    if model is not None:
+        provider, model_name = model
+        for name in (f"{provider}/{model_name}", provider):
+            if name in settings.LLM_IMAGE_POLICIES:
+                return settings.LLM_IMAGE_POLICIES[name]
+    return settings.LLM_IMAGE_POLICIES.get("default", ImagePolicy())
+
+
+def _crop_system_bars(image: Image.Image) -> Image.Image:
+    density = image.width / TYPICAL_SCREEN_WIDTH_DP
+    top = round(STATUS_BAR_HEIGHT_DP * density)
+    bottom = image.height - round(NAVIGATION_BAR_HEIGHT_DP * density)
+    if bottom <= top:
+        return image
+    return image.crop((0, top, image.width, bottom))
+
+
+@lru_cache(maxsize=ENCODED_FRAMES_CACHE_SIZE)
+def encode_image_data_url(data_url: str, policy: ImagePolicy) -> str:
+    """
+    Encodes a base64 image data URL with the policy.
+    The original is kept when it is already smaller than its re-encoding at the same size.
+    """
+    data = data_url.partition(",")[2]
+    try:
+        original = base64.b64decode(data)
+        image = Image.open(BytesIO(original))
+        image.load()
+    except (binascii.Error, OSError) as e:
+        logger.warning(f"Could not decode a screenshot, it is sent as is: {e}")
+        return data_url
+
+    size = image.size
+    if policy.crop_system_bars:
+        image = _crop_system_bars(image)
+    if policy.max_dimension is not None and max(image.size) > policy.max_dimension:
+        image.thumbnail((policy.max_dimension, policy.max_dimension), Image.Resampling.LANCZOS)
+    if policy.grayscale:
+        image = image.convert("L")
+    elif policy.format == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    output = BytesIO()
+    image.save(output, format=_PIL_FORMATS[policy.format], quality=policy.quality, optimize=True)
+    encoded = output.getvalue()
+    if image.size == size and image.mode != "L" and len(encoded) >= len(original):
+        return data_url
+    return f"data:image/{policy.format};base64,{base64.b64encode(encoded).decode('utf-8')}"
+
+
+def _optimize_block(block, policy: ImagePolicy):
+    if not isinstance(block, dict) or block.get("type") != "image_url":
+        return block
+    image_url = block["image_url"]
+    url = image_url.get("url", "") if isinstance(image_url, dict) else image_url
+    if not url.startswith("data:image"):
+        return block
+    encoded_url = encode_image_data_url(url, policy)
+    if encoded_url == url:
+        return block
+    new_image_url = (
+        {**image_url, "url": encoded_url} if isinstance(image_url, dict) else encoded_url
+    )
+    return {**block, "image_url": new_image_url}
+
+
+def optimize_images(llm: BaseChatModel, messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Copy of the messages with their images encoded with the image policy of the model."""
+    policy = get_image_policy(llm)
+    optimized: list[BaseMessage] = []
+    for message in messages:
+        if isinstance(message.content, str):
+            optimized.append(message)
+            continue
+        content = [_optimize_block(block, policy) for block in message.content]
+        if all(new is old for new, old in zip(content, message.content)):
+            optimized.append(message)
+        else:
+            optimized.append(message.model_copy(update={"content": content}))
+    return optimized
@@ -0,0 +1,17 @@
+from typing import get_args
+
+from typer.testing import CliRunner
+
+from minitap.mobile_use.config import GraphMode
+from minitap.mobile_use.main import GraphModeOption, app
+
+
+def test_graph_mode_option_offers_every_graph_mode():
+    assert [option.value for option in GraphModeOption] == list(get_args(GraphMode))
+
+
+def test_invalid_graph_modes_are_rejected_by_the_cli():
+    result = CliRunner().invoke(app, ["Open the settings", "--graph-mode", "slow"])
+
+    assert result.exit_code == 2
+    assert "slow" in result.output
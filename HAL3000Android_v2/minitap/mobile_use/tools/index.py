@@ -1,4 +1,7 @@
+import json
+
 from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 
 from minitap.mobile_use.context import MobileUseContext
 from minitap.mobile_use.tools.mobile.back import back_wrapper
@@ -62,3 +65,29 @@ def get_tools_from_wrappers(
 
 def format_tools_list(ctx: MobileUseContext, wrappers: list[ToolWrapper]) -> str:
     return ", ".join([tool.name for tool in get_tools_from_wrappers(ctx, wrappers)])
+
+
+def _compact_schema(schema):
+    if isinstance(schema, list):
+        return [_compact_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    return {
+        key: _compact_schema(value)
+        for key, value in schema.items()
+        if key not in ("title", "description", "additionalProperties")
+    }
+
+
+def format_tools_arguments(ctx: MobileUseContext, wrappers: list[ToolWrapper]) -> str:
+    """One line per tool: its name and the JSON schema of its arguments, `agent_thought` aside."""
+    lines = []
+    for tool in get_tools_from_wrappers(ctx, wrappers):
+        parameters = convert_to_openai_tool(tool)["function"]["parameters"]
+        parameters["properties"].pop("agent_thought", None)
+        parameters["required"] = [
+            name for name in parameters.get("required", []) if name != "agent_thought"
+        ]
+        arguments = json.dumps(_compact_schema(parameters), separators=(",", ":"))
+        lines.append(f"- `{tool.name}`: {arguments}")
+    return "\n".join(lines)
@@ -44,21 +44,21 @@ class ClearTextResult(BaseModel):
 class TextClearer:
     def __init__(self, ctx: MobileUseContext, state: State):
         self.ctx = ctx
-        self.state = state
+        self.ui_hierarchy = state.get_latest_ui_hierarchy()
 
     def _refresh_ui_hierarchy(self) -> None:
         screen_data = get_screen_data(screen_api_client=self.ctx.screen_api_client)
-        self.state.latest_ui_hierarchy = screen_data.elements
+        self.ui_hierarchy = screen_data.elements
 
     def _get_element_info(self, resource_id: str) -> tuple[object | None, str | None, str | None]:
-        if not self.state.latest_ui_hierarchy:
+        if not self.ui_hierarchy:
             self._refresh_ui_hierarchy()
 
-        if not self.state.latest_ui_hierarchy:
+        if not self.ui_hierarchy:
             return None, None, None
 
         element = find_element_by_resource_id(
-            ui_hierarchy=self.state.latest_ui_hierarchy, resource_id=resource_id
+            ui_hierarchy=self.ui_hierarchy, resource_id=resource_id
         )
 
         if not element:
@@ -87,7 +87,9 @@ class TextClearer:
         if not focus_element_if_needed(ctx=self.ctx, resource_id=resource_id):
             return False
 
-        move_cursor_to_end_if_bounds(ctx=self.ctx, state=self.state, resource_id=resource_id)
+        move_cursor_to_end_if_bounds(
+            ctx=self.ctx, ui_hierarchy=self.ui_hierarchy, resource_id=resource_id
+        )
         return True
 
     def _erase_text_attempt(self, text_length: int) -> str | None:
@@ -119,7 +121,7 @@ class TextClearer:
 
             self._refresh_ui_hierarchy()
             elt = find_element_by_resource_id(
-                ui_hierarchy=self.state.latest_ui_hierarchy or [],
+                ui_hierarchy=self.ui_hierarchy or [],
                 resource_id=resource_id,
             )
             if elt:
@@ -129,7 +131,7 @@ class TextClearer:
                     break
 
             move_cursor_to_end_if_bounds(
-                ctx=self.ctx, state=self.state, resource_id=resource_id, elt=elt
+                ctx=self.ctx, ui_hierarchy=self.ui_hierarchy, resource_id=resource_id, elt=elt
             )
 
         return True, current_text, erased_chars
@@ -42,9 +42,11 @@ def get_copy_text_from_tool(ctx: MobileUseContext):
         """
         output = copy_text_from_controller(ctx=ctx, selector_request=selector_request)
         has_failed = output is not None
+        # Selector resolution errors list candidates the executor can retry with
+        error_details = f" {output['error']}" if has_failed and "error" in output else ""
         tool_message = ToolMessage(
             tool_call_id=tool_call_id,
-            content=copy_text_from_wrapper.on_failure_fn(selector_request)
+            content=copy_text_from_wrapper.on_failure_fn(selector_request) + error_details
             if has_failed
             else copy_text_from_wrapper.on_success_fn(selector_request),
             additional_kwargs={"error": output} if has_failed else {},
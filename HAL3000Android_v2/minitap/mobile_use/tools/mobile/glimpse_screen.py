@@ -50,7 +50,7 @@ def get_glimpse_screen_tool(ctx: MobileUseContext):
             EXECUTOR_MESSAGES_KEY: [tool_message],
         }
         if compressed_image_base64:
-            updates["latest_screenshot_base64"] = compressed_image_base64
+            updates["latest_screenshot_base64"] = ctx.blob_store.put_text(compressed_image_base64)
         return Command(
             update=state.sanitize_update(
                 ctx=ctx,
@@ -61,7 +61,11 @@ def get_input_text_tool(ctx: MobileUseContext):
         """
         focused = focus_element_if_needed(ctx=ctx, resource_id=text_input_resource_id)
         if focused:
-            move_cursor_to_end_if_bounds(ctx=ctx, state=state, resource_id=text_input_resource_id)
+            move_cursor_to_end_if_bounds(
+                ctx=ctx,
+                ui_hierarchy=state.get_latest_ui_hierarchy(),
+                resource_id=text_input_resource_id,
+            )
 
         result = _controller_input_text(ctx=ctx, text=text)
 
@@ -70,10 +74,8 @@ def get_input_text_tool(ctx: MobileUseContext):
         text_input_content = ""
         if status == "success":
             screen_data = get_screen_data(screen_api_client=ctx.screen_api_client)
-            state.latest_ui_hierarchy = screen_data.elements
-
             element = find_element_by_resource_id(
-                ui_hierarchy=state.latest_ui_hierarchy, resource_id=text_input_resource_id
+                ui_hierarchy=screen_data.elements, resource_id=text_input_resource_id
             )
 
             if not element:
@@ -29,9 +29,11 @@ def get_long_press_on_tool(ctx: MobileUseContext):
         """
         output = long_press_on_controller(ctx=ctx, selector_request=selector_request, index=index)
         has_failed = output is not None
+        # Selector resolution errors list candidates the executor can retry with
+        error_details = f" {output['error']}" if has_failed and "error" in output else ""
         tool_message = ToolMessage(
             tool_call_id=tool_call_id,
-            content=long_press_on_wrapper.on_failure_fn()
+            content=long_press_on_wrapper.on_failure_fn() + error_details
             if has_failed
             else long_press_on_wrapper.on_success_fn(),
             additional_kwargs={"error": output} if has_failed else {},
@@ -42,10 +42,8 @@ def get_paste_text_tool(ctx: MobileUseContext):
 
         text_input_content = ""
         screen_data = get_screen_data(screen_api_client=ctx.screen_api_client)
-        state.latest_ui_hierarchy = screen_data.elements
-
         element = find_element_by_resource_id(
-            ui_hierarchy=state.latest_ui_hierarchy, resource_id=focused_element_resource_id
+            ui_hierarchy=screen_data.elements, resource_id=focused_element_resource_id
         )
 
         if element:
@@ -27,9 +27,11 @@ def get_tap_tool(ctx: MobileUseContext):
         """
         output = tap_controller(ctx=ctx, selector_request=selector_request, index=index)
         has_failed = output is not None
+        # Selector resolution errors list candidates the executor can retry with
+        error_details = f" {output['error']}" if has_failed and "error" in output else ""
         tool_message = ToolMessage(
             tool_call_id=tool_call_id,
-            content=tap_wrapper.on_failure_fn(selector_request, index)
+            content=tap_wrapper.on_failure_fn(selector_request, index) + error_details
             if has_failed
             else tap_wrapper.on_success_fn(selector_request, index),
             additional_kwargs={"error": output} if has_failed else {},
@@ -7,7 +7,6 @@ from minitap.mobile_use.controllers.mobile_command_controller import (
     SelectorRequestWithCoordinates,
     tap,
 )
-from minitap.mobile_use.graph.state import State
 from minitap.mobile_use.utils.logger import get_logger
 from minitap.mobile_use.utils.ui_hierarchy import (
     Point,
@@ -21,7 +20,7 @@ logger = get_logger(__name__)
 
 def move_cursor_to_end_if_bounds(
     ctx: MobileUseContext,
-    state: State,
+    ui_hierarchy: list[dict] | None,
     resource_id: str,
     elt: dict | None = None,
 ) -> dict | None:
@@ -31,7 +30,7 @@ def move_cursor_to_end_if_bounds(
     """
     if not elt:
         elt = find_element_by_resource_id(
-            ui_hierarchy=state.latest_ui_hierarchy or [],
+            ui_hierarchy=ui_hierarchy or [],
             resource_id=resource_id,
         )
     if not elt:
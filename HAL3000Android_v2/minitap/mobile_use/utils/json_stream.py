@@ -0,0 +1,88 @@
+"""
+Incremental parsing of a streamed JSON object, to act on its fields before the whole object
+has been received.
+"""
+
+import json
+from typing import Any
+
+
+class IncrementalJsonObjectParser:
+    """
+    Scans the text of a JSON object chunk by chunk, each character being read once.
+    A top-level field is reported as soon as its value is complete; nested values are decoded
+    as a whole.
+    """
+
+    def __init__(self):
+        self.fields: dict[str, Any] = {}
+        self.is_complete = False
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._is_escaped = False
+        self._key_start: int | None = None
+        self._key: str | None = None
+        self._value_start: int | None = None
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consumes a chunk and returns the top-level fields it completed, in order."""
+        completed: list[tuple[str, Any]] = []
+        self._text += chunk
+        text = self._text
+        while self._position < len(text) and not self.is_complete:
+            char = text[self._position]
+            if self._in_string:
+                if self._is_escaped:
+                    self._is_escaped = False
+                elif char == "\\":
+                    self._is_escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string_end(completed)
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._key is None:
+                        self._key_start = self._position
+                    elif self._value_start is None:
+                        self._value_start = self._position
+            elif char in "{[":
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = self._position
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._complete_field(completed, end=self._position + 1)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._complete_field(completed, end=self._position)
+                    self.is_complete = True
+            elif self._depth == 1:
+                if char == ",":
+                    if self._value_start is not None:
+                        self._complete_field(completed, end=self._position)
+                elif char not in ": \t\r\n" and self._key is not None and self._value_start is None:
+                    # Number, boolean or null: complete at the next separator
+                    self._value_start = self._position
+            self._position += 1
+        return completed
+
+    def _on_string_end(self, completed: list[tuple[str, Any]]):
+        if self._depth != 1:
+            return
+        if self._key is None and self._key_start is not None:
+            self._key = json.loads(self._text[self._key_start : self._position + 1])
+            self._key_start = None
+        elif self._value_start is not None and self._text[self._value_start] == '"':
+            self._complete_field(completed, end=self._position + 1)
+
+    def _complete_field(self, completed: list[tuple[str, Any]], end: int):
+        assert self._key is not None and self._value_start is not None
+        value = json.loads(self._text[self._value_start : end])
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+        self._key = None
+        self._value_start = None
@@ -3,36 +3,34 @@ Knowledge Base Integration for HAL3000Android
 Provides context injection for all AI calls
 """
 
-import json
-import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 from ..utils.logger import get_logger
+from minitap.mobile_use.utils.prompts import PromptRegistry, get_prompt_registry
 
 logger = get_logger(__name__)
 
 
-def load_knowledge_base() -> Optional[Dict[str, Any]]:
-    """Load knowledge base from knowledgebase.json"""
+# Look for knowledgebase.json in project root
+KNOWLEDGE_BASE_PATH = Path(__file__).parent.parent.parent.parent / "knowledgebase.json"
+
+
+def load_knowledge_base(registry: PromptRegistry | None = None) -> Optional[Dict[str, Any]]:
+    """Load knowledge base from knowledgebase.json, parsed once by the prompt registry"""
     try:
-        # Look for knowledgebase.json in project root
-        root_dir = Path(__file__).parent.parent.parent.parent
-        kb_file = root_dir / "knowledgebase.json"
-        
-        if kb_file.exists():
-            with open(kb_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
+        kb = (registry or get_prompt_registry()).load_json(KNOWLEDGE_BASE_PATH)
+        if kb is None:
             logger.debug("No knowledgebase.json found")
-            return None
+        return kb
     except Exception as e:
         logger.error(f"Failed to load knowledge base: {e}")
         return None
 
 
-def format_knowledge_context() -> str:
+def format_knowledge_context(kb: dict[str, Any] | None = None) -> str:
     """Format knowledge base content for AI context injection"""
-    kb = load_knowledge_base()
+    if kb is None:
+        kb = load_knowledge_base()
     if not kb:
         return ""
     
@@ -72,9 +70,12 @@ def enhance_system_message(original_message: str) -> str:
     return enhanced
 
 
-def enhance_agent_prompt(agent_name: str, original_prompt: str) -> str:
+def enhance_agent_prompt(
+    agent_name: str, original_prompt: str, kb: dict[str, Any] | None = None
+) -> str:
     """Enhance agent-specific prompt with knowledge base context"""
-    kb = load_knowledge_base()
+    if kb is None:
+        kb = load_knowledge_base()
     if not kb:
         return original_prompt
     
@@ -83,7 +84,7 @@ def enhance_agent_prompt(agent_name: str, original_prompt: str) -> str:
     if f"{agent_name}_context" in kb:
         agent_context = f"\n\n## {agent_name.title()} Specific Context\n{kb[f'{agent_name}_context']}"
     
-    general_context = format_knowledge_context()
+    general_context = format_knowledge_context(kb)
     if general_context:
         general_context = f"\n\n## HAL3000Android Context\n{general_context}"
     
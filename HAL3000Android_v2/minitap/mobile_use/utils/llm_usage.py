@@ -0,0 +1,174 @@
+"""
+Per-agent accounting of the LLM calls of a task: tokens, images, wall time and time to first
+token, to see which agent dominates cost and latency.
+"""
+
+import threading
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel, computed_field
+
+# Metadata key naming the agent of LLM calls made outside of their own graph node
+AGENT_METADATA_KEY = "mobile_use_agent"
+
+
+def get_agent_run_config(agent: str) -> RunnableConfig:
+    """Config attributing the LLM calls of an invocation to `agent`."""
+    return {"metadata": {AGENT_METADATA_KEY: agent}}
+
+
+def get_agent_name(metadata: dict[str, Any] | None) -> str:
+    """The agent of an LLM call: the one named in its metadata, or else its graph node."""
+    metadata = metadata or {}
+    return metadata.get(AGENT_METADATA_KEY) or metadata.get("langgraph_node") or "unknown"
+
+
+class LLMNodeUsage(BaseModel):
+    """LLM usage of an agent, summed over its calls."""
+
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    images: int = 0
+    image_bytes: int = 0
+    wall_time_seconds: float = 0
+    time_to_first_token_seconds: float = 0
+
+    @computed_field
+    @property
+    def mean_wall_time_seconds(self) -> float:
+        return self.wall_time_seconds / self.calls if self.calls else 0
+
+    @computed_field
+    @property
+    def mean_time_to_first_token_seconds(self) -> float:
+        return self.time_to_first_token_seconds / self.calls if self.calls else 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.calls} calls, {self.prompt_tokens} prompt + {self.completion_tokens} "
+            f"completion tokens, {self.images} images ({self.image_bytes / 1024:.0f} KiB), "
+            f"{self.mean_wall_time_seconds:.2f}s per call "
+            f"({self.mean_time_to_first_token_seconds:.2f}s to first token)"
+        )
+
+
+def _get_image_bytes(block: Any) -> int | None:
+    """Decoded size of an image content block, None if the block is not an image."""
+    if not isinstance(block, dict):
+        return None
+    if block.get("type") == "image_url":
+        image_url = block.get("image_url")
+        url = image_url.get("url", "") if isinstance(image_url, dict) else image_url or ""
+        data = url.partition("base64,")[2]
+    elif block.get("type") == "image":
+        data = block.get("data") or block.get("base64") or ""
+        if isinstance(block.get("source"), dict):
+            data = block["source"].get("data", "")
+    else:
+        return None
+    return len(data) * 3 // 4 - data.count("=", -2)
+
+
+def count_images(messages: list[BaseMessage]) -> tuple[int, int]:
+    """Number and decoded size (in bytes) of the images sent in the messages."""
+    count, size = 0, 0
+    for message in messages:
+        if isinstance(message.content, str):
+            continue
+        for block in message.content:
+            image_bytes = _get_image_bytes(block)
+            if image_bytes is not None:
+                count += 1
+                size += image_bytes
+    return count, size
+
+
+class _Run:
+    def __init__(self, agent: str, images: int, image_bytes: int):
+        self.agent = agent
+        self.images = images
+        self.image_bytes = image_bytes
+        self.started_at = time.perf_counter()
+        self.first_token_at: float | None = None
+
+
+class LLMUsageTracker(BaseCallbackHandler):
+    """
+    Aggregates the LLM calls per agent. The agent is the one named in the run metadata (see
+    `get_agent_run_config`), or else the graph node the call was made from.
+    For calls that are not streamed, the first token comes with the whole response.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.usage: dict[str, LLMNodeUsage] = {}
+        self._runs: dict[UUID, _Run] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        agent = get_agent_name(metadata)
+        images, image_bytes = count_images([m for batch in messages for m in batch])
+        with self._lock:
+            self._runs[run_id] = _Run(agent=agent, images=images, image_bytes=image_bytes)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and run.first_token_at is None:
+            run.first_token_at = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                if not isinstance(generation, ChatGeneration):
+                    continue
+                usage = getattr(generation.message, "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        self._end_run(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_run(run_id, is_error=True)
+
+    def _end_run(
+        self,
+        run_id: UUID,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        is_error: bool = False,
+    ):
+        ended_at = time.perf_counter()
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            usage = self.usage.setdefault(run.agent, LLMNodeUsage())
+            usage.calls += 1
+            usage.errors += int(is_error)
+            usage.prompt_tokens += prompt_tokens
+            usage.completion_tokens += completion_tokens
+            usage.images += run.images
+            usage.image_bytes += run.image_bytes
+            usage.wall_time_seconds += ended_at - run.started_at
+            usage.time_to_first_token_seconds += (run.first_token_at or ended_at) - run.started_at
+
+    def get_usage(self) -> dict[str, LLMNodeUsage]:
+        with self._lock:
+            return {agent: usage.model_copy() for agent, usage in self.usage.items()}
@@ -5,6 +5,8 @@ from pathlib import Path
 
 from PIL import Image
 
+from minitap.mobile_use.utils.llm_usage import LLMNodeUsage
+
 
 def compress_base64_jpeg(base64_str: str, quality: int = 50) -> str:
     if base64_str.startswith("data:image"):
@@ -71,3 +73,8 @@ def remove_steps_json_from_trace_folder(trace_folder_path: Path):
     for file in trace_folder_path.iterdir():
         if file.suffix == ".json" and file.name != "steps.json":
             file.unlink()
+
+
+def write_llm_usage_to_trace_folder(trace_folder_path: Path, llm_usage: dict[str, LLMNodeUsage]):
+    with open(trace_folder_path / "llm_usage.json", "w", encoding="utf-8") as f:
+        f.write(json.dumps({agent: usage.model_dump() for agent, usage in llm_usage.items()}))
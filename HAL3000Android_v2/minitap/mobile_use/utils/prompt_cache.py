@@ -0,0 +1,88 @@
+"""
+Helpers to benefit from the prompt caching of LLM providers.
+
+Providers cache the longest prefix a request shares with the previous ones, so agents put their
+static instructions first and their volatile context last. Anthropic also needs explicit cache
+breakpoints, which `add_cache_control` adds.
+"""
+
+import threading
+from typing import Any
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+
+def _with_cache_control(message: BaseMessage) -> BaseMessage:
+    content = message.content
+    if isinstance(content, str):
+        blocks: list = [{"type": "text", "text": content}]
+    else:
+        blocks = [
+            block if isinstance(block, dict) else {"type": "text", "text": block}
+            for block in content
+        ]
+    if not blocks:
+        return message
+    blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+    return message.model_copy(update={"content": blocks})
+
+
+def add_cache_control(
+    llm: BaseChatModel, messages: list[BaseMessage], stable_prefix_length: int
+) -> list[BaseMessage]:
+    """
+    Marks the end of the system message and the end of the stable prefix (the first
+    `stable_prefix_length` messages) as cache breakpoints, for the providers that need them.
+    Other providers cache prefixes automatically: the messages are returned untouched.
+    """
+    if not isinstance(llm, ChatAnthropic) or stable_prefix_length <= 0:
+        return messages
+    breakpoints = {0, min(stable_prefix_length, len(messages)) - 1}
+    return [
+        _with_cache_control(message) if i in breakpoints else message
+        for i, message in enumerate(messages)
+    ]
+
+
+class PromptCacheStats(BaseCallbackHandler):
+    """
+    Counts the LLM calls that did (hit) or did not (miss) read part of their prompt from the
+    provider cache, based on the usage metadata of the responses.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                if not isinstance(generation, ChatGeneration):
+                    continue
+                usage = getattr(generation.message, "usage_metadata", None)
+                if not usage:
+                    continue
+                cache_read = (usage.get("input_token_details") or {}).get("cache_read") or 0
+                with self._lock:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.cached_input_tokens += cache_read
+                    if cache_read > 0:
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+
+    def __str__(self) -> str:
+        ratio = self.cached_input_tokens / self.input_tokens if self.input_tokens else 0
+        return (
+            f"{self.hits} hits, {self.misses} misses, "
+            f"{self.cached_input_tokens}/{self.input_tokens} input tokens cached ({ratio:.0%})"
+        )
@@ -0,0 +1,120 @@
+"""
+Registry of the prompt files of the agents, loaded and compiled once per process.
+
+The Jinja templates are compiled on first use, and the system prompts, which only depend on the
+device platform and the tool set, are rendered once per such context and kept along with their
+knowledge base context. With `PROMPT_RELOAD`, the files are checked for changes on every use, to
+edit the prompts and the knowledge base without restarting.
+"""
+
+import json
+import threading
+from collections.abc import Callable, Hashable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from jinja2 import Template
+
+from minitap.mobile_use.config import settings
+
+if TYPE_CHECKING:
+    from minitap.mobile_use.context import MobileUseContext
+
+T = TypeVar("T")
+
+
+def _get_mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load_json(path: Path) -> Any | None:
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class PromptRegistry:
+    """Parsed prompt files, and the system prompts rendered from them."""
+
+    def __init__(self, reload: bool):
+        self.reload = reload
+        self.loads = 0
+        self.renders = 0
+        self._lock = threading.Lock()
+        # Per file: its modification time when loaded, and what it was parsed into
+        self._files: dict[Path, tuple[int | None, Any]] = {}
+        # Per template, agent and key: the rendered prompt, and the parsed files it comes from
+        self._prompts: dict[tuple[Path, str, Hashable], tuple[str, tuple[Any, ...]]] = {}
+
+    def _load(self, path: Path, parse: Callable[[Path], T]) -> T:
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and not self.reload:
+                return entry[1]
+            mtime = _get_mtime(path)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            parsed = parse(path)
+            self._files[path] = (mtime, parsed)
+            self.loads += 1
+            return parsed
+
+    def get_template(self, path: Path) -> Template:
+        return self._load(path, lambda path: Template(path.read_text(encoding="utf-8")))
+
+    def render(self, path: Path, **variables: Any) -> str:
+        return self.get_template(path).render(**variables)
+
+    def load_json(self, path: Path) -> Any | None:
+        """The parsed JSON file, None when it does not exist."""
+        return self._load(path, _load_json)
+
+    def render_system_prompt(
+        self,
+        agent_name: str,
+        path: Path,
+        key: Hashable,
+        get_variables: Callable[[], dict[str, Any]] = dict,
+    ) -> str:
+        """
+        The system prompt of the agent, rendered from its template and enhanced with the
+        knowledge base. It is rendered again only for another `key`, which must identify the
+        variables, or when the template or the knowledge base changed.
+        """
+        from minitap.mobile_use.utils.knowledge_base import (
+            enhance_agent_prompt,
+            load_knowledge_base,
+        )
+
+        template = self.get_template(path)
+        kb = load_knowledge_base(self)
+        sources = (template, kb)
+        cached = self._prompts.get((path, agent_name, key))
+        if cached is not None and all(a is b for a, b in zip(cached[1], sources)):
+            return cached[0]
+        prompt = enhance_agent_prompt(agent_name, template.render(**get_variables()), kb=kb)
+        self._prompts[(path, agent_name, key)] = (prompt, sources)
+        self.renders += 1
+        return prompt
+
+    def __str__(self) -> str:
+        return f"{self.loads} file loads, {self.renders} system prompt renders"
+
+
+def get_system_prompt_key(ctx: "MobileUseContext") -> Hashable:
+    """What the system prompts depend on: the platform and the tools of the executor LLM."""
+    return (ctx.device.mobile_platform, ctx.llm_config.get_agent("executor").provider)
+
+
+_prompt_registry: PromptRegistry | None = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    global _prompt_registry
+    if _prompt_registry is None or _prompt_registry.reload != settings.PROMPT_RELOAD:
+        _prompt_registry = PromptRegistry(reload=settings.PROMPT_RELOAD)
+    return _prompt_registry
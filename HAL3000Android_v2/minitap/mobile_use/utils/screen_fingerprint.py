@@ -0,0 +1,121 @@
+"""
+Cheap and stable identity of a screen, to recognize screens that were already seen.
+
+The skeleton hash only depends on the structure of the UI hierarchy (classes, resource ids and
+coarse layout), not on its text: a chat with a new message or a clock that ticks keeps the same
+skeleton. It can be combined with a perceptual hash of the screenshot to tell apart screens
+sharing the same structure.
+"""
+
+import base64
+import hashlib
+from io import BytesIO
+
+from PIL import Image
+from pydantic import BaseModel
+
+from minitap.mobile_use.utils.spatial_index import parse_element_rect
+
+# Number of layout buckets per screen axis
+LAYOUT_BUCKETS = 16
+# Side of the (grayscale) image the perceptual hash is computed from
+PERCEPTUAL_HASH_SIZE = 8
+# Max number of differing bits for two screenshots to be considered the same screen
+PERCEPTUAL_HASH_MAX_DISTANCE = 10
+
+
+class ScreenFingerprint(BaseModel):
+    skeleton: str
+    perceptual: str | None = None
+
+    def __str__(self) -> str:
+        if self.perceptual is None:
+            return self.skeleton
+        return f"{self.skeleton}:{self.perceptual}"
+
+    def is_same_screen(
+        self, other: "ScreenFingerprint", max_distance: int = PERCEPTUAL_HASH_MAX_DISTANCE
+    ) -> bool:
+        """
+        Same skeleton, and close screenshots when both fingerprints have a perceptual hash.
+        """
+        if self.skeleton != other.skeleton:
+            return False
+        if self.perceptual is None or other.perceptual is None:
+            return True
+        return get_hamming_distance(self.perceptual, other.perceptual) <= max_distance
+
+
+def _get_element_tokens(
+    ui_hierarchy: list[dict], width: int, height: int, depth: int = 0
+) -> list[str]:
+    tokens = []
+    for element in ui_hierarchy:
+        if not isinstance(element, dict):
+            continue
+        attributes = element.get("attributes") or element
+        class_name = attributes.get("className") or attributes.get("class") or ""
+        resource_id = attributes.get("resourceId") or attributes.get("resource-id") or ""
+        layout = ""
+        rect = parse_element_rect(element)
+        if rect is not None and width > 0 and height > 0:
+            left, top, right, bottom = rect
+            layout = ",".join(
+                str(min(max(int(value * LAYOUT_BUCKETS / size), 0), LAYOUT_BUCKETS))
+                for value, size in ((left, width), (top, height), (right, width), (bottom, height))
+            )
+        tokens.append(f"{depth}|{class_name}|{resource_id}|{layout}")
+        children = element.get("children")
+        if children:
+            tokens += _get_element_tokens(children, width, height, depth + 1)
+    return tokens
+
+
+def compute_skeleton_hash(ui_hierarchy: list[dict], width: int, height: int) -> str:
+    """
+    Hash of the hierarchy skeleton: classes, resource ids and layout buckets of every element.
+    Texts are ignored, and so is the order of elements.
+    """
+    tokens = sorted(set(_get_element_tokens(ui_hierarchy, width, height)))
+    return hashlib.blake2b("\n".join(tokens).encode(), digest_size=8).hexdigest()
+
+
+def compute_perceptual_hash(screenshot_base64: str) -> str | None:
+    """
+    Difference hash (dHash) of a screenshot: one bit per pair of horizontally adjacent pixels
+    of its downscaled grayscale version. Returns None if the image can't be decoded.
+    """
+    if screenshot_base64.startswith("data:image"):
+        screenshot_base64 = screenshot_base64.split(",")[1]
+    try:
+        image = Image.open(BytesIO(base64.b64decode(screenshot_base64)))
+        image.draft("L", (PERCEPTUAL_HASH_SIZE * 16, PERCEPTUAL_HASH_SIZE * 16))
+        image = image.convert("L").resize(
+            (PERCEPTUAL_HASH_SIZE + 1, PERCEPTUAL_HASH_SIZE), Image.Resampling.BILINEAR
+        )
+    except Exception:
+        return None
+    pixels = image.tobytes()
+    bits = 0
+    for row in range(PERCEPTUAL_HASH_SIZE):
+        for col in range(PERCEPTUAL_HASH_SIZE):
+            left = pixels[row * (PERCEPTUAL_HASH_SIZE + 1) + col]
+            right = pixels[row * (PERCEPTUAL_HASH_SIZE + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{PERCEPTUAL_HASH_SIZE * PERCEPTUAL_HASH_SIZE // 4}x}"
+
+
+def get_hamming_distance(hash_a: str, hash_b: str) -> int:
+    return (int(hash_a, 16) ^ int(hash_b, 16)).bit_count()
+
+
+def compute_screen_fingerprint(
+    ui_hierarchy: list[dict],
+    width: int,
+    height: int,
+    screenshot_base64: str | None = None,
+) -> ScreenFingerprint:
+    return ScreenFingerprint(
+        skeleton=compute_skeleton_hash(ui_hierarchy, width, height),
+        perceptual=compute_perceptual_hash(screenshot_base64) if screenshot_base64 else None,
+    )
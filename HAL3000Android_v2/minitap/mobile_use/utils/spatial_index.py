@@ -0,0 +1,276 @@
+"""
+Grid-based spatial index over the bounds of the UI elements of a single frame.
+
+Used to hit-test coordinates before dispatching them to the device: finding the element under a
+point, the elements intersecting a rectangle, or the nearest actionable element.
+"""
+
+import math
+import re
+from collections.abc import Callable, Iterator
+
+from minitap.mobile_use.utils.ui_hierarchy import Point
+
+DEFAULT_CELL_SIZE = 128
+
+_BOUNDS_STRING_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+# (left, top, right, bottom)
+Rect = tuple[int, int, int, int]
+
+
+def parse_element_rect(element: dict) -> Rect | None:
+    """
+    Returns the (left, top, right, bottom) rectangle of an element.
+    Supports Maestro bounds ({x, y, width, height}), uiautomator bounds ("[l,t][r,b]")
+    and rich hierarchy elements (bounds under `attributes`).
+    """
+    bounds = element.get("bounds")
+    if bounds is None:
+        bounds = (element.get("attributes") or {}).get("bounds")
+    if isinstance(bounds, dict):
+        try:
+            x, y = int(bounds["x"]), int(bounds["y"])
+            return x, y, x + int(bounds["width"]), y + int(bounds["height"])
+        except (KeyError, TypeError, ValueError):
+            return None
+    if isinstance(bounds, str):
+        match = _BOUNDS_STRING_PATTERN.match(bounds)
+        if match:
+            left, top, right, bottom = (int(v) for v in match.groups())
+            return left, top, right, bottom
+    return None
+
+
+def is_element_actionable(element: dict) -> bool:
+    """
+    Heuristic telling whether an element is a meaningful tap target.
+    Maestro elements carry no `clickable` flag, so any labelled element is considered actionable.
+    """
+    attributes = element.get("attributes") or element
+    clickable = attributes.get("clickable")
+    if clickable is not None:
+        return clickable in (True, "true")
+    return any(
+        attributes.get(key)
+        for key in ("text", "accessibilityText", "content-desc", "resourceId", "resource-id")
+    )
+
+
+def _iter_elements(ui_hierarchy: list[dict]) -> Iterator[dict]:
+    for element in ui_hierarchy:
+        if not isinstance(element, dict):
+            continue
+        yield element
+        children = element.get("children")
+        if children:
+            yield from _iter_elements(children)
+
+
+def _distance_to_rect(x: int, y: int, rect: Rect) -> float:
+    left, top, right, bottom = rect
+    dx = max(left - x, 0, x - right)
+    dy = max(top - y, 0, y - bottom)
+    return math.hypot(dx, dy)
+
+
+class ElementSpatialIndex:
+    """
+    Uniform grid over element bounds.
+
+    Elements are stored in traversal (i.e. drawing) order: when several elements contain a point,
+    the last drawn one is considered the topmost.
+    """
+
+    def __init__(
+        self,
+        ui_hierarchy: list[dict],
+        width: int | None = None,
+        height: int | None = None,
+        cell_size: int = DEFAULT_CELL_SIZE,
+    ):
+        self.cell_size = cell_size
+        self._rects: list[Rect] = []
+        self._elements: list[dict] = []
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._max_right = 0
+        self._max_bottom = 0
+        self._width = width
+        self._height = height
+
+        for element in _iter_elements(ui_hierarchy):
+            self.add(element)
+
+    @property
+    def width(self) -> int:
+        return self._width if self._width is not None else self._max_right
+
+    @property
+    def height(self) -> int:
+        return self._height if self._height is not None else self._max_bottom
+
+    def add(self, element: dict) -> bool:
+        """
+        Indexes an element on top of the ones already added (children are not traversed).
+        Returns False when the element has no usable bounds.
+        """
+        rect = parse_element_rect(element)
+        if rect is None or rect[2] <= rect[0] or rect[3] <= rect[1]:
+            return False
+        idx = len(self._elements)
+        self._rects.append(rect)
+        self._elements.append(element)
+        for cell in self._get_cells_for_rect(rect):
+            self._cells.setdefault(cell, []).append(idx)
+        self._max_right = max(self._max_right, rect[2])
+        self._max_bottom = max(self._max_bottom, rect[3])
+        return True
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def _get_cells_for_rect(self, rect: Rect) -> Iterator[tuple[int, int]]:
+        left, top, right, bottom = rect
+        size = self.cell_size
+        for cx in range(left // size, (right - 1) // size + 1):
+            for cy in range(top // size, (bottom - 1) // size + 1):
+                yield cx, cy
+
+    def contains_point(self, x: int, y: int) -> bool:
+        """Whether the point lies on the screen."""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def elements_at(self, x: int, y: int) -> list[dict]:
+        """All elements containing the point, from the topmost to the bottommost."""
+        candidates = self._cells.get((x // self.cell_size, y // self.cell_size), [])
+        return [
+            self._elements[idx]
+            for idx in reversed(candidates)
+            if self._rects[idx][0] <= x < self._rects[idx][2]
+            and self._rects[idx][1] <= y < self._rects[idx][3]
+        ]
+
+    def element_at(self, x: int, y: int) -> dict | None:
+        """The topmost element containing the point."""
+        candidates = self._cells.get((x // self.cell_size, y // self.cell_size), [])
+        for idx in reversed(candidates):
+            left, top, right, bottom = self._rects[idx]
+            if left <= x < right and top <= y < bottom:
+                return self._elements[idx]
+        return None
+
+    def elements_intersecting(self, rect: Rect) -> list[dict]:
+        """All elements intersecting the (left, top, right, bottom) rectangle, in drawing order."""
+        left, top, right, bottom = rect
+        if right <= left or bottom <= top:
+            return []
+        found: set[int] = set()
+        for cell in self._get_cells_for_rect(rect):
+            for idx in self._cells.get(cell, []):
+                e_left, e_top, e_right, e_bottom = self._rects[idx]
+                if e_left < right and left < e_right and e_top < bottom and top < e_bottom:
+                    found.add(idx)
+        return [self._elements[idx] for idx in sorted(found)]
+
+    def nearest_element(
+        self,
+        x: int,
+        y: int,
+        predicate: Callable[[dict], bool] = is_element_actionable,
+        max_distance: float | None = None,
+    ) -> dict | None:
+        """
+        The element matching `predicate` that is the closest to the point
+        (a distance of 0 meaning the point is inside the element).
+        Ties are resolved in favor of the topmost element.
+        """
+        size = self.cell_size
+        origin_x, origin_y = x // size, y // size
+        max_cells = max(self.width, self.height) // size + 1
+        if max_distance is not None:
+            max_cells = min(max_cells, int(max_distance // size) + 1)
+
+        best_idx: int | None = None
+        best_distance = math.inf
+        seen: set[int] = set()
+        for ring in range(max_cells + 1):
+            # Every element of this ring is at least (ring - 1) cells away from the point
+            if (ring - 1) * size > best_distance:
+                break
+            for cell in self._get_ring_cells(origin_x, origin_y, ring):
+                for idx in self._cells.get(cell, []):
+                    if idx in seen:
+                        continue
+                    seen.add(idx)
+                    if not predicate(self._elements[idx]):
+                        continue
+                    distance = _distance_to_rect(x, y, self._rects[idx])
+                    is_closer = distance < best_distance
+                    is_above = distance == best_distance and best_idx is not None and idx > best_idx
+                    if is_closer or is_above:
+                        best_idx, best_distance = idx, distance
+
+        if best_idx is None:
+            return None
+        if max_distance is not None and best_distance > max_distance:
+            return None
+        return self._elements[best_idx]
+
+    def _get_ring_cells(self, cx: int, cy: int, ring: int) -> Iterator[tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+def get_element_center(element: dict) -> Point | None:
+    rect = parse_element_rect(element)
+    if rect is None:
+        return None
+    return Point(x=(rect[0] + rect[2]) // 2, y=(rect[1] + rect[3]) // 2)
+
+
+def is_point_in_element(element: dict, x: int, y: int) -> bool:
+    rect = parse_element_rect(element)
+    return rect is not None and rect[0] <= x < rect[2] and rect[1] <= y < rect[3]
+
+
+class IndexedHierarchy(ElementSpatialIndex):
+    """
+    Flat list of UI elements, in drawing order, indexed by bounds, resource id and text.
+    Unlike the spatial index alone, elements without usable bounds are kept.
+    """
+
+    def __init__(
+        self,
+        ui_hierarchy: list[dict] | None = None,
+        width: int | None = None,
+        height: int | None = None,
+        cell_size: int = DEFAULT_CELL_SIZE,
+    ):
+        self.elements: list[dict] = []
+        self._by_resource_id: dict[str, list[dict]] = {}
+        self._by_text: dict[str, list[dict]] = {}
+        super().__init__(ui_hierarchy or [], width=width, height=height, cell_size=cell_size)
+
+    def add(self, element: dict) -> bool:
+        self.elements.append(element)
+        resource_id = element.get("resourceId")
+        if resource_id:
+            self._by_resource_id.setdefault(resource_id, []).append(element)
+        for text in {element.get(key) for key in ("text", "accessibilityText", "hintText")}:
+            if text:
+                self._by_text.setdefault(text, []).append(element)
+        return super().add(element)
+
+    def find_by_resource_id(self, resource_id: str) -> list[dict]:
+        return self._by_resource_id.get(resource_id, [])
+
+    def find_by_text(self, text: str) -> list[dict]:
+        """Elements whose text, accessibility text or hint text is exactly `text`."""
+        return self._by_text.get(text, [])
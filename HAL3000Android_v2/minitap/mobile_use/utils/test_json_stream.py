@@ -0,0 +1,44 @@
+import json
+
+from minitap.mobile_use.utils.json_stream import IncrementalJsonObjectParser
+
+PAYLOAD = {
+    "decisions": '{"action": "tap", "target": {"text": "Alice \\"A\\""}}',
+    "agent_thought": "Tapping on {Alice}, then [searching].",
+    "complete_subgoals_by_ids": ["1", "2"],
+    "nested": {"a": [1, {"b": "}"}]},
+    "count": -1.5e3,
+    "flag": True,
+    "nothing": None,
+}
+
+
+def test_fields_are_reported_as_soon_as_complete():
+    parser = IncrementalJsonObjectParser()
+    text = json.dumps(PAYLOAD)
+    decisions_end = text.index('", "agent_thought"') + 1
+
+    assert parser.feed(text[: decisions_end - 1]) == []
+    assert parser.feed(text[decisions_end - 1 : decisions_end]) == [
+        ("decisions", PAYLOAD["decisions"])
+    ]
+    assert not parser.is_complete
+
+
+def test_char_by_char_parsing_matches_json_loads():
+    parser = IncrementalJsonObjectParser()
+    completed = []
+    for char in json.dumps(PAYLOAD, indent=2):
+        completed.extend(parser.feed(char))
+
+    assert parser.is_complete
+    assert parser.fields == PAYLOAD
+    assert [key for key, _ in completed] == list(PAYLOAD)
+
+
+def test_trailing_primitive_is_completed_by_the_closing_brace():
+    parser = IncrementalJsonObjectParser()
+
+    assert parser.feed('{"a": "x", "b": 12') == [("a", "x")]
+    assert parser.feed("}") == [("b", 12)]
+    assert parser.is_complete
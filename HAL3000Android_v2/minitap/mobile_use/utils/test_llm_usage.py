@@ -0,0 +1,60 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from minitap.mobile_use.utils.llm_usage import (
+    LLMUsageTracker,
+    count_images,
+    get_agent_run_config,
+)
+
+IMAGE = {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAAAAAA"}}
+
+
+def _fake_llm() -> GenericFakeChatModel:
+    response = AIMessage(
+        content="home screen",
+        usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128},
+    )
+    return GenericFakeChatModel(messages=iter([response, response]))
+
+
+def test_count_images():
+    messages = [
+        HumanMessage(content="no image"),
+        HumanMessage(content=[{"type": "text", "text": "Look"}, IMAGE, IMAGE]),
+    ]
+
+    assert count_images(messages) == (2, 12)
+
+
+def test_llm_usage_is_aggregated_per_agent():
+    tracker = LLMUsageTracker()
+    llm = _fake_llm()
+    messages = [HumanMessage(content=[{"type": "text", "text": "Describe"}, IMAGE])]
+
+    llm.invoke(messages, config={"callbacks": [tracker], "metadata": {"langgraph_node": "cortex"}})
+    llm.invoke(messages, config={**get_agent_run_config("hopper"), "callbacks": [tracker]})
+
+    usage = tracker.get_usage()
+    assert set(usage) == {"cortex", "hopper"}
+    assert usage["cortex"].calls == 1
+    assert usage["cortex"].prompt_tokens == 120
+    assert usage["cortex"].completion_tokens == 8
+    assert (usage["cortex"].images, usage["cortex"].image_bytes) == (1, 6)
+    assert usage["cortex"].wall_time_seconds > 0
+
+
+def test_time_to_first_token_of_streamed_calls():
+    tracker = LLMUsageTracker()
+
+    async def run():
+        async for _ in _fake_llm().astream("Describe", config={"callbacks": [tracker]}):
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    usage = tracker.get_usage()["unknown"]
+    assert usage.calls == 1
+    assert usage.time_to_first_token_seconds < usage.wall_time_seconds
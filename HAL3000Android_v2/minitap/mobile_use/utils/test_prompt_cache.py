@@ -0,0 +1,53 @@
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_openai import ChatOpenAI
+
+from minitap.mobile_use.utils.prompt_cache import PromptCacheStats, add_cache_control
+
+
+def _messages():
+    return [
+        SystemMessage(content="static instructions"),
+        HumanMessage(content="device info"),
+        HumanMessage(content=[{"type": "text", "text": "thought"}]),
+        HumanMessage(content="volatile ui hierarchy"),
+    ]
+
+
+def test_add_cache_control_marks_the_stable_prefix_for_anthropic():
+    llm = ChatAnthropic(model_name="claude-sonnet-4-0", api_key="key")  # type: ignore
+
+    messages = add_cache_control(llm, _messages(), stable_prefix_length=3)
+
+    assert messages[0].content[-1]["cache_control"] == {"type": "ephemeral"}
+    assert messages[0].content[-1]["text"] == "static instructions"
+    assert messages[1].content == "device info"
+    assert messages[2].content[-1]["cache_control"] == {"type": "ephemeral"}
+    assert messages[3].content == "volatile ui hierarchy"
+
+
+def test_add_cache_control_leaves_other_providers_untouched():
+    llm = ChatOpenAI(model="gpt-4.1", api_key="key")  # type: ignore
+    messages = _messages()
+
+    assert add_cache_control(llm, messages, stable_prefix_length=3) is messages
+
+
+def test_prompt_cache_stats_counts_hits_and_misses():
+    stats = PromptCacheStats()
+
+    for cache_read in (0, 800):
+        message = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 10,
+                "total_tokens": 1010,
+                "input_token_details": {"cache_read": cache_read},
+            },
+        )
+        stats.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+
+    assert (stats.hits, stats.misses) == (1, 1)
+    assert str(stats) == "1 hits, 1 misses, 800/2000 input tokens cached (40%)"
@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from minitap.mobile_use.utils import knowledge_base
+from minitap.mobile_use.utils.prompts import PromptRegistry
+
+
+@pytest.fixture
+def prompt_path(tmp_path, monkeypatch):
+    kb_path = tmp_path / "knowledgebase.json"
+    kb_path.write_text(json.dumps({"system_context": "Be careful"}), encoding="utf-8")
+    monkeypatch.setattr(knowledge_base, "KNOWLEDGE_BASE_PATH", kb_path)
+    path = tmp_path / "agent.md"
+    path.write_text("Act on {{ platform }}", encoding="utf-8")
+    return path
+
+
+def _touch(path, text: str):
+    """Rewrites the file with a later modification time, whatever the file system resolution."""
+    mtime = path.stat().st_mtime_ns
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+def test_templates_are_compiled_once(prompt_path):
+    registry = PromptRegistry(reload=False)
+
+    template = registry.get_template(prompt_path)
+    _touch(prompt_path, "Changed")
+
+    assert registry.get_template(prompt_path) is template
+    assert registry.render(prompt_path, platform="android") == "Act on android"
+    assert registry.loads == 1
+
+
+def test_changed_templates_are_reloaded_in_reload_mode(prompt_path):
+    registry = PromptRegistry(reload=True)
+
+    template = registry.get_template(prompt_path)
+    assert registry.get_template(prompt_path) is template
+    _touch(prompt_path, "Changed")
+
+    assert registry.render(prompt_path) == "Changed"
+
+
+def test_system_prompts_are_rendered_once_per_key(prompt_path):
+    registry = PromptRegistry(reload=True)
+    calls = []
+
+    def get_variables():
+        calls.append(1)
+        return {"platform": "android"}
+
+    prompt = registry.render_system_prompt("cortex", prompt_path, "android", get_variables)
+    again = registry.render_system_prompt("cortex", prompt_path, "android", get_variables)
+
+    assert prompt == again
+    assert prompt.startswith("Act on android\n\n## HAL3000Android Context\nSystem: Be careful")
+    assert len(calls) == 1
+    registry.render_system_prompt("cortex", prompt_path, "ios", lambda: {"platform": "ios"})
+    assert registry.renders == 2
+
+
+def test_system_prompts_follow_knowledge_base_changes_in_reload_mode(prompt_path):
+    registry = PromptRegistry(reload=True)
+    registry.render_system_prompt("cortex", prompt_path, None, lambda: {"platform": "android"})
+
+    _touch(knowledge_base.KNOWLEDGE_BASE_PATH, json.dumps({"system_context": "Be quick"}))
+    prompt = registry.render_system_prompt(
+        "cortex", prompt_path, None, lambda: {"platform": "android"}
+    )
+
+    assert prompt.endswith("System: Be quick")
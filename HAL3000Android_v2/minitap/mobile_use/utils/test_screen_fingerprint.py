@@ -0,0 +1,58 @@
+import base64
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from minitap.mobile_use.utils.screen_fingerprint import (
+    compute_perceptual_hash,
+    compute_screen_fingerprint,
+    get_hamming_distance,
+)
+
+
+def _hierarchy(title: str, button_y: int = 1800) -> list[dict]:
+    return [
+        {"resourceId": "com.example:id/title", "text": title, "bounds": _bounds(0, 0, 1080, 200)},
+        {
+            "resourceId": "com.example:id/send",
+            "text": "Send",
+            "bounds": _bounds(0, button_y, 1080, 100),
+        },
+    ]
+
+
+def _bounds(x: int, y: int, width: int, height: int) -> dict:
+    return {"x": x, "y": y, "width": width, "height": height}
+
+
+def _screenshot(square_x: int) -> str:
+    image = Image.new("RGB", (540, 960), "white")
+    ImageDraw.Draw(image).rectangle((square_x, 300, square_x + 200, 500), fill="black")
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return base64.b64encode(output.getvalue()).decode()
+
+
+def test_skeleton_ignores_text_but_not_layout():
+    fingerprint = compute_screen_fingerprint(_hierarchy("Alice"), 1080, 2000)
+
+    same_screen = compute_screen_fingerprint(_hierarchy("Bob"), 1080, 2000)
+    moved_button = compute_screen_fingerprint(_hierarchy("Alice", button_y=900), 1080, 2000)
+
+    assert fingerprint.is_same_screen(same_screen)
+    assert not fingerprint.is_same_screen(moved_button)
+
+
+def test_perceptual_hash_tells_apart_screens_with_the_same_skeleton():
+    left = compute_screen_fingerprint(_hierarchy("Alice"), 1080, 2000, _screenshot(20))
+    left_again = compute_screen_fingerprint(_hierarchy("Alice"), 1080, 2000, _screenshot(24))
+    right = compute_screen_fingerprint(_hierarchy("Alice"), 1080, 2000, _screenshot(320))
+
+    assert left.is_same_screen(left_again)
+    assert not left.is_same_screen(right)
+    assert str(left) == f"{left.skeleton}:{left.perceptual}"
+
+
+def test_perceptual_hash_of_invalid_image():
+    assert compute_perceptual_hash("bm90IGFuIGltYWdl") is None
+    assert get_hamming_distance("ff", "0f") == 4
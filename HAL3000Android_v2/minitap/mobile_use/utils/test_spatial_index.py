@@ -0,0 +1,41 @@
+from minitap.mobile_use.utils.spatial_index import ElementSpatialIndex
+
+
+def _element(x: int, y: int, width: int, height: int, **kwargs) -> dict:
+    return {"bounds": {"x": x, "y": y, "width": width, "height": height}, **kwargs}
+
+
+def _get_index() -> ElementSpatialIndex:
+    elements = [
+        _element(0, 0, 1080, 1920),
+        _element(0, 100, 1080, 200, resourceId="com.example:id/header"),
+        _element(40, 140, 200, 100, text="Back"),
+        _element(600, 1000, 300, 120, text="Send"),
+    ]
+    return ElementSpatialIndex(elements, width=1080, height=1920)
+
+
+def test_element_at_returns_topmost_element():
+    index = _get_index()
+
+    assert index.element_at(50, 150)["text"] == "Back"
+    assert index.element_at(500, 150)["resourceId"] == "com.example:id/header"
+    assert len(index.elements_at(50, 150)) == 3
+    assert index.element_at(2000, 150) is None
+    assert not index.contains_point(2000, 150)
+
+
+def test_elements_intersecting():
+    index = _get_index()
+
+    found = index.elements_intersecting((550, 950, 700, 1050))
+
+    assert [e.get("text") for e in found] == [None, "Send"]
+
+
+def test_nearest_element_respects_max_distance():
+    index = _get_index()
+
+    assert index.nearest_element(580, 990)["text"] == "Send"
+    assert index.nearest_element(580, 990, max_distance=10) is None
+    assert index.nearest_element(580, 900, max_distance=150)["text"] == "Send"
@@ -0,0 +1,68 @@
+from minitap.mobile_use.utils.thoughts_memory import (
+    FOLDED_THOUGHT_MAX_CHARS,
+    estimate_tokens,
+    fold_thought,
+    get_thoughts_memory,
+)
+
+
+def _get_thoughts(count: int) -> list[str]:
+    return [f"[cortex] Step {i} done. Details of step {i}." for i in range(count)]
+
+
+def test_short_histories_are_kept_verbatim():
+    thoughts = _get_thoughts(5)
+
+    memory = get_thoughts_memory(thoughts, budget_tokens=1000, keep_last=5)
+
+    assert memory.to_list() == thoughts
+    assert memory.folded == 0
+
+
+def test_older_thoughts_are_folded_by_blocks():
+    memory = get_thoughts_memory(_get_thoughts(13), budget_tokens=1000, keep_last=5)
+
+    assert memory.folded == 5
+    assert memory.recent == _get_thoughts(13)[5:]
+    assert memory.summary[0] == "[cortex] Step 0 done."
+    # The view only changes when the next block is folded
+    next_memory = get_thoughts_memory(_get_thoughts(14), budget_tokens=1000, keep_last=5)
+    assert next_memory.to_list()[:9] == memory.to_list()
+
+
+def test_view_stays_within_budget_on_long_tasks():
+    thoughts = _get_thoughts(500)
+
+    memory = get_thoughts_memory(thoughts, budget_tokens=300, keep_last=10)
+
+    assert sum(estimate_tokens(thought) for thought in memory.to_list()) < 350
+    assert memory.recent == thoughts[-10:]
+    assert memory.omitted > 0
+
+
+def test_most_relevant_folded_thoughts_are_kept():
+    thoughts = [*_get_thoughts(100), "[cortex] Found the wifi password: hunter2."]
+    thoughts = [*thoughts, *_get_thoughts(20)]
+
+    memory = get_thoughts_memory(thoughts, budget_tokens=200, keep_last=10, query="Share wifi")
+
+    assert "[cortex] Found the wifi password: hunter2." in memory.summary
+
+
+def test_long_thoughts_are_folded_to_their_first_sentence():
+    assert fold_thought("Tapped the button. It worked.") == "Tapped the button."
+    assert len(fold_thought("a" * 1000)) == FOLDED_THOUGHT_MAX_CHARS
+
+
+def test_view_over_budget_only_changes_when_a_block_is_folded():
+    thoughts = [f"[cortex] Step {i} done. {'Details. ' * 25}" for i in range(30)]
+    previous = None
+    for count in range(6, 30):
+        memory = get_thoughts_memory(thoughts[:count], budget_tokens=300, keep_last=3)
+
+        assert memory.folded % 3 == 0
+        assert sum(estimate_tokens(thought) for thought in memory.recent) <= 210
+        if previous is not None and memory.folded == previous.folded:
+            # Between folds, the view of the previous step is a prefix of the new one
+            assert memory.to_list()[: len(previous.to_list())] == previous.to_list()
+        previous = memory
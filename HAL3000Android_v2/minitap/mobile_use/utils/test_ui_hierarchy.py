@@ -0,0 +1,68 @@
+from minitap.mobile_use.utils.ui_hierarchy import collapse_repeated_subtrees, get_foreground_package
+
+
+def _row(i: int) -> dict:
+    return {
+        "resourceId": "com.example:id/row",
+        "bounds": {"x": 0, "y": 100 * i, "width": 1080, "height": 100},
+        "children": [
+            {"resourceId": "com.example:id/title", "text": f"Contact {i}"},
+            {"resourceId": "com.example:id/subtitle", "text": f"Last seen {i}"},
+        ],
+    }
+
+
+def test_collapse_repeated_subtrees_keeps_first_rows():
+    hierarchy = [{"resourceId": "com.example:id/list", "children": [_row(i) for i in range(10)]}]
+
+    collapsed = collapse_repeated_subtrees(hierarchy, keep_first=3)
+
+    rows = collapsed[0]["children"]
+    assert len(rows) == 4
+    assert rows[:3] == [_row(i) for i in range(3)]
+    assert rows[3]["summary"].startswith("+7 similar rows: texts=")
+    assert "Contact 9 | Last seen 9" in rows[3]["summary"]
+    assert rows[3]["resourceIds"] == ["com.example:id/row"]
+    assert rows[3]["centers"][0] == [540, 350]
+    # The input hierarchy must be left untouched
+    assert len(hierarchy[0]["children"]) == 10
+
+
+def test_collapse_repeated_subtrees_flat_elements():
+    elements = []
+    for i in range(8):
+        elements.append({"resourceId": "com.example:id/title", "text": f"Title {i}"})
+        elements.append({"resourceId": "com.example:id/summary", "text": f"Summary {i}"})
+
+    collapsed = collapse_repeated_subtrees(elements, keep_first=2)
+
+    assert len(collapsed) == 5
+    assert collapsed[-1]["summary"].startswith("+6 similar rows")
+    assert collapsed[-1]["resourceIds"] == ["com.example:id/title", "com.example:id/summary"]
+
+
+def test_collapse_repeated_subtrees_short_lists_are_untouched():
+    hierarchy = [_row(i) for i in range(4)] + [{"resourceId": "com.example:id/footer"}]
+
+    assert collapse_repeated_subtrees(hierarchy, keep_first=3) == hierarchy
+
+
+def test_foreground_package_is_the_most_common_one_outside_overlays():
+    hierarchy = [
+        {
+            "packageName": "com.android.systemui",
+            "children": [{"packageName": "com.android.systemui"}] * 5,
+        },
+        {"packageName": "com.whatsapp", "children": [{"packageName": "com.whatsapp"}] * 3},
+        {
+            "packageName": "com.google.android.inputmethod.latin",
+            "children": [{"package": "com.google.android.inputmethod.latin"}] * 9,
+        },
+        {"package": "com.android.chrome"},
+    ]
+
+    assert get_foreground_package(hierarchy) == "com.whatsapp"
+
+
+def test_foreground_package_is_none_without_packages():
+    assert get_foreground_package([{"text": "Settings", "children": [{"text": "Wi-Fi"}]}]) is None
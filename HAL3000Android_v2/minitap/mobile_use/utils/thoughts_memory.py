@@ -0,0 +1,124 @@
+"""
+Rolling memory of the agent thoughts, so that the prompts stay the same size on long tasks.
+
+`State.agents_thoughts` keeps every thought, but each agent only sees a view of them fitting its
+token budget: the latest thoughts verbatim, preceded by a summary of the older ones. Thoughts are
+folded into the summary by blocks of `THOUGHTS_KEPT_VERBATIM`, also when the latest ones exceed
+their budget, so that the view, and the prompt prefix the providers cache, only changes when a
+block is folded. Each folded thought is reduced to its first sentence and, when the summary
+exceeds its budget, only the ones most relevant to the query are kept, in their order. The
+query must stay the same between folds for the view to do so: the Cortex, whose prefix is
+cached, queries with the goal of the task rather than with its current subgoal.
+"""
+
+import re
+
+from pydantic import BaseModel
+
+from minitap.mobile_use.config import settings
+from minitap.mobile_use.services.rate_limiter import CHARS_PER_TOKEN_ESTIMATE
+
+FOLDED_THOUGHT_MAX_CHARS = 200
+# Share of the budget of an agent kept for the summary of the folded thoughts
+SUMMARY_BUDGET_SHARE = 0.3
+
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s")
+_WORD_PATTERN = re.compile(r"\w{4,}")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+
+def fold_thought(thought: str) -> str:
+    """The first sentence of the thought, at most `FOLDED_THOUGHT_MAX_CHARS` long."""
+    first_sentence = _SENTENCE_END_PATTERN.split(thought.strip(), maxsplit=1)[0]
+    if len(first_sentence) > FOLDED_THOUGHT_MAX_CHARS:
+        return first_sentence[: FOLDED_THOUGHT_MAX_CHARS - 1] + "…"
+    return first_sentence
+
+
+def get_relevance(thought: str, query_words: set[str]) -> int:
+    return len(query_words.intersection(_WORD_PATTERN.findall(thought.lower())))
+
+
+class ThoughtsMemory(BaseModel):
+    """The view of the thoughts of an agent: a summary of the folded ones, and the latest ones."""
+
+    summary: list[str]
+    recent: list[str]
+    folded: int
+    omitted: int
+
+    def get_summary_text(self) -> str | None:
+        if not self.folded:
+            return None
+        header = f"Summary of the {self.folded} earlier thoughts"
+        if self.omitted:
+            header += f" ({self.omitted} less relevant ones omitted)"
+        return header + ":\n" + "\n".join(f"- {thought}" for thought in self.summary)
+
+    def to_list(self) -> list[str]:
+        summary = self.get_summary_text()
+        return [summary, *self.recent] if summary else list(self.recent)
+
+    def __str__(self) -> str:
+        return "\n".join(self.to_list())
+
+
+def get_thoughts_memory(
+    thoughts: list[str],
+    budget_tokens: int,
+    keep_last: int,
+    query: str | None = None,
+) -> ThoughtsMemory:
+    """
+    The view of the thoughts fitting the budget: the thoughts since the last folded block
+    verbatim, more blocks being folded while they exceed the budget, then the summary of the
+    folded blocks, most relevant to the query first.
+    """
+    folded_count = max(0, len(thoughts) - keep_last) // keep_last * keep_last
+    recent_budget = budget_tokens - int(budget_tokens * SUMMARY_BUDGET_SHARE)
+    if not folded_count and sum(estimate_tokens(t) for t in thoughts) <= budget_tokens:
+        recent_budget = budget_tokens
+    while (
+        folded_count < len(thoughts) - 1
+        and sum(estimate_tokens(t) for t in thoughts[folded_count:]) > recent_budget
+    ):
+        # Whole blocks, but the latest thought is always kept verbatim
+        folded_count = min(folded_count + keep_last, len(thoughts) - 1)
+    recent = thoughts[folded_count:]
+
+    folded = [fold_thought(thought) for thought in thoughts[:folded_count]]
+    # Its own share of the budget, rather than what the latest thoughts leave, which changes
+    # every step
+    summary_budget = budget_tokens - recent_budget
+    query_words = set(_WORD_PATTERN.findall(query.lower())) if query else set()
+    # Most relevant first, the most recent ones among equally relevant
+    ranked = sorted(
+        range(len(folded)), key=lambda i: (get_relevance(folded[i], query_words), i), reverse=True
+    )
+    kept: set[int] = set()
+    for index in ranked:
+        tokens = estimate_tokens(folded[index])
+        if tokens <= summary_budget:
+            kept.add(index)
+            summary_budget -= tokens
+    return ThoughtsMemory(
+        summary=[thought for index, thought in enumerate(folded) if index in kept],
+        recent=recent,
+        folded=len(folded),
+        omitted=len(folded) - len(kept),
+    )
+
+
+def get_agent_thoughts_memory(
+    agent: str, thoughts: list[str], query: str | None = None
+) -> ThoughtsMemory:
+    """The view of the thoughts for the agent, within its `THOUGHTS_TOKEN_BUDGETS` budget."""
+    return get_thoughts_memory(
+        thoughts,
+        budget_tokens=settings.THOUGHTS_TOKEN_BUDGETS.get(agent, settings.THOUGHTS_TOKEN_BUDGET),
+        keep_last=settings.THOUGHTS_KEPT_VERBATIM,
+        query=query,
+    )
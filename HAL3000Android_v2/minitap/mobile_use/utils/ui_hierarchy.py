@@ -72,6 +72,35 @@ def find_element_by_resource_id(
     return search_recursive(ui_hierarchy)
 
 
+# Windows drawn over the foreground app, which is never one of them
+_OVERLAY_PACKAGES = frozenset({"com.android.systemui", "android"})
+_OVERLAY_PACKAGE_SUFFIXES = (".inputmethod", ".inputmethod.latin", ".keyboard")
+
+
+def _is_overlay_package(package: str) -> bool:
+    return package in _OVERLAY_PACKAGES or package.endswith(_OVERLAY_PACKAGE_SUFFIXES)
+
+
+def get_foreground_package(ui_hierarchy: list[dict]) -> str | None:
+    """
+    The package of the foreground app: the one owning the most elements of the hierarchy, the
+    system UI and keyboards aside. None when the elements carry no package.
+    """
+    counts: dict[str, int] = {}
+    stack = list(ui_hierarchy)
+    while stack:
+        element = stack.pop()
+        if not isinstance(element, dict):
+            continue
+        package = element.get("packageName") or element.get("package")
+        if package and not _is_overlay_package(package):
+            counts[package] = counts.get(package, 0) + 1
+        stack.extend(element.get("children", []) or [])
+    if not counts:
+        return None
+    return max(counts, key=lambda package: counts[package])
+
+
 def is_element_focused(element: dict) -> bool:
     return element.get("focused", None) == "true"
 
@@ -123,3 +152,138 @@ def get_bounds_for_element(element: dict) -> ElementBounds | None:
             logger.error(f"Failed to validate bounds: {e}")
             return None
     return None
+
+
+###### Repeated subtrees collapsing ######
+
+# Keys carrying per-row content: they are ignored when comparing the shape of two subtrees.
+_VOLATILE_ELEMENT_KEYS = {
+    "id",
+    "text",
+    "textIndex",
+    "hintText",
+    "accessibilityText",
+    "content-desc",
+    "resourceIdIndex",
+    "bounds",
+    "checked",
+    "selected",
+    "focused",
+    "index",
+}
+_TEXT_ELEMENT_KEYS = ("text", "accessibilityText", "content-desc", "hintText")
+
+
+def _get_element_resource_id(element: dict) -> str:
+    return element.get("resourceId") or element.get("resource-id") or ""
+
+
+def _get_element_shape(element: dict) -> tuple:
+    """
+    Structural signature of an element and its descendants.
+    Two rows of the same list share the same shape even if their texts differ.
+    """
+    shape_keys = tuple(sorted(k for k in element if k not in _VOLATILE_ELEMENT_KEYS))
+    return (
+        _get_element_resource_id(element),
+        element.get("className") or element.get("class") or "",
+        shape_keys,
+        tuple(_get_element_shape(child) for child in element.get("children", []) or []),
+    )
+
+
+def _get_subtree_texts(elements: list[dict]) -> list[str]:
+    texts = []
+    for element in elements:
+        text = next((element[k] for k in _TEXT_ELEMENT_KEYS if element.get(k)), None)
+        if text:
+            texts.append(text)
+        texts.extend(_get_subtree_texts(element.get("children", []) or []))
+    return texts
+
+
+def _get_block_center(block: list[dict]) -> list[int] | None:
+    for element in block:
+        if not isinstance(element.get("bounds"), dict):
+            continue
+        bounds = get_bounds_for_element(element)
+        if bounds:
+            center = bounds.get_center()
+            return [center.x, center.y]
+    return None
+
+
+def _summarize_repeated_blocks(blocks: list[list[dict]]) -> dict:
+    rows_texts = [" | ".join(_get_subtree_texts(block)) for block in blocks]
+    resource_ids = []
+    for element in blocks[0]:
+        resource_id = _get_element_resource_id(element)
+        if resource_id and resource_id not in resource_ids:
+            resource_ids.append(resource_id)
+    return {
+        "summary": f"+{len(blocks)} similar rows: texts={rows_texts}",
+        "resourceIds": resource_ids,
+        "centers": [_get_block_center(block) for block in blocks],
+    }
+
+
+def _find_repeated_run(shapes: list[tuple], start: int, max_period: int) -> tuple[int, int]:
+    """
+    Finds the longest run of a repeated block of siblings starting at `start`.
+    Returns (period, repetitions), period being the number of siblings per block.
+    """
+    best_period, best_repetitions = 1, 1
+    for period in range(1, max_period + 1):
+        block = shapes[start : start + period]
+        if len(block) < period:
+            break
+        repetitions = 1
+        while shapes[start + repetitions * period : start + (repetitions + 1) * period] == block:
+            repetitions += 1
+        if repetitions > 1 and repetitions * period > best_repetitions * best_period:
+            best_period, best_repetitions = period, repetitions
+    return best_period, best_repetitions
+
+
+def collapse_repeated_subtrees(
+    ui_hierarchy: list[dict],
+    keep_first: int = 3,
+    max_period: int = 4,
+) -> list[dict]:
+    """
+    Collapses runs of structurally identical sibling subtrees (list rows, grid cells...).
+
+    The first `keep_first` rows of a run are kept in full, the remaining ones are replaced by a
+    single summary element listing their texts, resource ids and center coordinates, so that
+    a collapsed row can still be targeted.
+    Works on both nested hierarchies (elements with `children`) and flat Maestro element lists,
+    where a row spans up to `max_period` consecutive elements.
+
+    The input hierarchy is not modified.
+    """
+    elements = [
+        {
+            **element,
+            "children": collapse_repeated_subtrees(element["children"], keep_first, max_period),
+        }
+        if element.get("children")
+        else element
+        for element in ui_hierarchy
+        if isinstance(element, dict)
+    ]
+    shapes = [_get_element_shape(element) for element in elements]
+
+    collapsed: list[dict] = []
+    i = 0
+    while i < len(elements):
+        period, repetitions = _find_repeated_run(shapes, i, max_period)
+        if repetitions <= keep_first + 1:
+            collapsed.append(elements[i])
+            i += 1
+            continue
+        blocks = [elements[i + r * period : i + (r + 1) * period] for r in range(repetitions)]
+        for block in blocks[:keep_first]:
+            collapsed.extend(block)
+        collapsed.append(_summarize_repeated_blocks(blocks[keep_first:]))
+        i += period * repetitions
+    return collapsed
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the Cortex time-to-action on a stubbed streaming model: waiting for the whole
+structured output (previous behavior) vs dispatching the decisions as soon as they are streamed.
+The stub streams a typical Cortex output (short decisions, 2-4 sentences of thought) at a
+constant token rate.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from minitap.mobile_use.agents.cortex.streaming import CortexStream
+
+RUNS = 10
+CHARS_PER_TOKEN = 4
+TOKENS_PER_SECOND = 150
+TIME_TO_FIRST_TOKEN = 0.4
+
+OUTPUT = {
+    "decisions": json.dumps(
+        [
+            {"action": "tap", "target": {"resource_id": "com.android.settings:id/search"}},
+            {"action": "input_text", "resource_id": "android:id/search_src_text", "text": "wifi"},
+        ]
+    ),
+    "agent_thought": (
+        "Analyzing previous agent thoughts: the Settings app was opened successfully at the "
+        "previous step, and no failed attempt at searching was made so far. The search bar is "
+        "visible at the top of the screen, so I will tap it and type 'wifi' to reach the Wi-Fi "
+        "settings faster than scrolling through the categories. If the search results do not "
+        "show the Wi-Fi entry, I will fall back to the Network & internet category."
+    ),
+    "complete_subgoals_by_ids": [],
+}
+
+
+class StubStreamingModel(BaseChatModel):
+    """Streams the Cortex output as tool call chunks, one token at a time."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-streaming"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        args = json.dumps(OUTPUT)
+        await asyncio.sleep(TIME_TO_FIRST_TOKEN)
+        for start in range(0, len(args), CHARS_PER_TOKEN):
+            await asyncio.sleep(1 / TOKENS_PER_SECOND)
+            tool_call_chunk = {
+                "name": "CortexOutput" if start == 0 else None,
+                "args": args[start : start + CHARS_PER_TOKEN],
+                "id": "call_0" if start == 0 else None,
+                "index": 0,
+            }
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", tool_call_chunks=[tool_call_chunk])
+            )
+
+
+async def time_to_action(early_dispatch: bool) -> float:
+    """Seconds until the decisions can be handed over to the Executor."""
+    start = time.perf_counter()
+    stream = CortexStream(StubStreamingModel(), [HumanMessage(content="Open the Wi-Fi settings")])
+    if early_dispatch:
+        decisions = await stream.wait_for_decisions()
+    else:
+        decisions = (await stream.output).decisions
+    elapsed = time.perf_counter() - start
+    assert decisions == OUTPUT["decisions"]
+    await stream.output
+    return elapsed
+
+
+async def main():
+    results = {}
+    for name, early_dispatch in (("full output", False), ("early dispatch", True)):
+        durations = [await time_to_action(early_dispatch) for _ in range(RUNS)]
+        results[name] = sum(durations) / RUNS * 1000
+
+    tokens = len(json.dumps(OUTPUT)) // CHARS_PER_TOKEN
+    print(
+        f"{RUNS} runs, ~{tokens} output tokens at {TOKENS_PER_SECOND} tokens/s, "
+        f"{TIME_TO_FIRST_TOKEN * 1000:.0f} ms to first token"
+    )
+    print(f"{'':<16}{'time to action (ms)':>21}")
+    for name, duration_ms in results.items():
+        print(f"{name:<16}{duration_ms:>21.1f}")
+    saved = results["full output"] - results["early dispatch"]
+    print(f"Saved {saved:.1f} ms per Cortex step ({saved / results['full output']:.0%})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the LLM client pool of `services/llm.get_llm` against a local OpenAI-compatible
+stub server: creating new clients at every step (previous behavior) vs reusing pooled clients.
+A step mimics the Cortex: it gets its primary and fallback clients, then runs one inference.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STEPS = 50
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "ok"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections += 1
+
+    def _send_json(self, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._send_json({"object": "list", "data": []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send_json(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_steps(get_client) -> tuple[float, float]:
+    """Returns the mean time spent getting the clients and the mean step duration (ms)."""
+    client_durations, step_durations = [], []
+    for _ in range(STEPS):
+        start = time.perf_counter()
+        llm = get_client()
+        get_client()  # fallback
+        client_durations.append(time.perf_counter() - start)
+        await llm.ainvoke("ping")
+        step_durations.append(time.perf_counter() - start)
+    return (
+        sum(client_durations) / STEPS * 1000,
+        sum(step_durations) / STEPS * 1000,
+    )
+
+
+async def main():
+    server = start_stub_server()
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    from minitap.mobile_use.config import LLM, LLMConfig, LLMConfigUtils, LLMWithFallback
+    from minitap.mobile_use.services.llm import (
+        _get_pooled_llm,
+        get_openai_llm,
+        warm_up_llm_clients,
+    )
+
+    results = {}
+    StubHandler.connections = 0
+    results["new clients"] = await run_steps(lambda: get_openai_llm("stub", temperature=1))
+    results["new clients"] += (StubHandler.connections,)
+
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    llm = LLM(provider="openai", model="stub")
+    llm_with_fallback = LLMWithFallback(provider="openai", model="stub", fallback=llm)
+    await warm_up_llm_clients(
+        LLMConfig(
+            planner=llm,
+            orchestrator=llm,
+            contextor=llm_with_fallback,
+            cortex=llm_with_fallback,
+            executor=llm,
+            utils=LLMConfigUtils(outputter=llm, hopper=llm),
+        )
+    )
+    warm_up_ms = (time.perf_counter() - start) * 1000
+    results["pooled clients"] = await run_steps(lambda: _get_pooled_llm("openai", "stub", 1))
+    results["pooled clients"] += (StubHandler.connections,)
+
+    print(f"{STEPS} steps, warm-up took {warm_up_ms:.2f} ms")
+    print(f"{'':<16}{'get clients (ms)':>18}{'step (ms)':>12}{'connections':>13}")
+    for name, (client_ms, step_ms, connections) in results.items():
+        print(f"{name:<16}{client_ms:>18.3f}{step_ms:>12.3f}{connections:>13}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
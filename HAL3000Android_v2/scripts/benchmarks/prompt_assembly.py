@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the system prompt assembly of each agent: reading, compiling and rendering its
+template and loading the knowledge base twice on every call (previous behavior) vs the prompt
+registry, which does it once per process.
+"""
+
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Template
+
+from minitap.mobile_use.agents.cortex.fast_cortex import CompleteSubgoals
+from minitap.mobile_use.config import LLM, LLMConfig, LLMConfigUtils, LLMWithFallback
+from minitap.mobile_use.context import DeviceContext, DevicePlatform, MobileUseContext
+from minitap.mobile_use.tools.index import (
+    EXECUTOR_WRAPPERS_TOOLS,
+    format_tools_arguments,
+    format_tools_list,
+)
+from minitap.mobile_use.utils.knowledge_base import KNOWLEDGE_BASE_PATH, enhance_agent_prompt
+from minitap.mobile_use.utils.prompts import PromptRegistry, get_system_prompt_key
+
+AGENTS_PATH = Path(__file__).parent.parent.parent / "minitap" / "mobile_use" / "agents"
+RUNS = 200
+
+
+def get_ctx() -> MobileUseContext:
+    llm = LLM(provider="openai", model="gpt-5-nano")
+    llm_with_fallback = LLMWithFallback(provider="openai", model="gpt-5-nano", fallback=llm)
+    return MobileUseContext.model_construct(
+        device=DeviceContext(
+            host_platform="LINUX",
+            mobile_platform=DevicePlatform.ANDROID,
+            device_id="emulator-5554",
+            device_width=1080,
+            device_height=2400,
+        ),
+        llm_config=LLMConfig(
+            planner=llm,
+            orchestrator=llm,
+            contextor=llm_with_fallback,
+            cortex=llm_with_fallback,
+            executor=llm,
+            utils=LLMConfigUtils(outputter=llm, hopper=llm),
+        ),
+    )
+
+
+def get_agent_prompts(ctx: MobileUseContext) -> dict[str, tuple[str, Path, Callable[[], dict]]]:
+    """Per agent: its knowledge base name, its template and the variables of its template."""
+    platform = ctx.device.mobile_platform.value
+    return {
+        "cortex": (
+            "cortex",
+            AGENTS_PATH / "cortex" / "cortex.md",
+            lambda: dict(
+                platform=platform,
+                executor_tools_list=format_tools_list(ctx=ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS),
+                executor_tools_arguments=format_tools_arguments(
+                    ctx=ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS
+                ),
+            ),
+        ),
+        "fast_cortex": (
+            "cortex",
+            AGENTS_PATH / "cortex" / "fast_cortex.md",
+            lambda: dict(platform=platform, complete_subgoals_tool=CompleteSubgoals.__name__),
+        ),
+        "planner": (
+            "planner",
+            AGENTS_PATH / "planner" / "planner.md",
+            lambda: dict(
+                platform=platform,
+                executor_tools_list=format_tools_list(ctx=ctx, wrappers=EXECUTOR_WRAPPERS_TOOLS),
+            ),
+        ),
+        "orchestrator": (
+            "orchestrator",
+            AGENTS_PATH / "orchestrator" / "orchestrator.md",
+            lambda: dict(platform=platform),
+        ),
+        "executor": (
+            "executor",
+            AGENTS_PATH / "executor" / "executor.md",
+            lambda: dict(platform=platform),
+        ),
+        "hopper": ("hopper", AGENTS_PATH / "hopper" / "hopper.md", dict),
+    }
+
+
+def load_knowledge_base_from_disk() -> Any:
+    with open(KNOWLEDGE_BASE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def assemble_from_disk(agent_name: str, path: Path, get_variables: Callable[[], dict]) -> str:
+    """Previous approach: everything is read, parsed and rendered again on every call."""
+    prompt = Template(path.read_text(encoding="utf-8")).render(**get_variables())
+    # The knowledge base was loaded by `enhance_agent_prompt`, then by `format_knowledge_context`
+    load_knowledge_base_from_disk()
+    return enhance_agent_prompt(agent_name, prompt, kb=load_knowledge_base_from_disk())
+
+
+def measure(assemble: Callable[[], str]) -> float:
+    """Returns the mean duration of an assembly (µs), the first one included."""
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        assemble()
+    return (time.perf_counter() - start) / RUNS * 1_000_000
+
+
+def main():
+    ctx = get_ctx()
+    key = get_system_prompt_key(ctx)
+    print(f"{'agent':<14}{'from disk (µs)':>16}{'registry (µs)':>16}{'reload mode (µs)':>18}")
+    for agent, (agent_name, path, get_variables) in get_agent_prompts(ctx).items():
+        registries = [PromptRegistry(reload=False), PromptRegistry(reload=True)]
+        expected = assemble_from_disk(agent_name, path, get_variables)
+        for registry in registries:
+            assert registry.render_system_prompt(agent_name, path, key, get_variables) == expected
+        disk_us = measure(lambda: assemble_from_disk(agent_name, path, get_variables))
+        cached_us, reload_us = (
+            measure(
+                lambda registry=registry: registry.render_system_prompt(
+                    agent_name, path, key, get_variables
+                )
+            )
+            for registry in registries
+        )
+        print(f"{agent:<14}{disk_us:>16.1f}{cached_us:>16.1f}{reload_us:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
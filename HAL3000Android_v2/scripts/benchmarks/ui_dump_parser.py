@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the streaming uiautomator dump parser against a whole-document parse.
+Runs on the checked-in `ui_dump.xml` and on synthetic dumps of increasing size.
+"""
+
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from xml.etree import ElementTree
+
+from minitap.mobile_use.services.accessibility import (
+    UI_DUMP_CHUNK_SIZE,
+    node_to_element,
+    parse_ui_dump,
+)
+from minitap.mobile_use.utils.spatial_index import IndexedHierarchy
+
+UI_DUMP_PATH = Path(__file__).parent.parent.parent / "ui_dump.xml"
+SYNTHETIC_ROWS = (100, 1_000, 10_000)
+RUNS = 5
+
+
+def build_synthetic_dump(rows: int) -> bytes:
+    """A scrollable list of `rows` rows, each holding a title and a subtitle."""
+    nodes = []
+    for i in range(rows):
+        top = 200 + i * 150
+        nodes.append(
+            f'<node index="{i}" text="" resource-id="com.example:id/row" '
+            f'class="android.widget.LinearLayout" package="com.example" content-desc="" '
+            f'clickable="true" focused="false" bounds="[0,{top}][1080,{top + 150}]">'
+            f'<node index="0" text="Title {i}" resource-id="com.example:id/title" '
+            f'class="android.widget.TextView" package="com.example" content-desc="" '
+            f'clickable="false" focused="false" bounds="[40,{top + 10}][1040,{top + 80}]" />'
+            f'<node index="1" text="Subtitle {i}" resource-id="com.example:id/subtitle" '
+            f'class="android.widget.TextView" package="com.example" content-desc="" '
+            f'clickable="false" focused="false" bounds="[40,{top + 80}][1040,{top + 140}]" />'
+            "</node>"
+        )
+    return (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?><hierarchy rotation=\"0\">"
+        '<node index="0" text="" resource-id="com.example:id/list" '
+        'class="androidx.recyclerview.widget.RecyclerView" package="com.example" '
+        'content-desc="" scrollable="true" bounds="[0,0][1080,2290]">'
+        + "".join(nodes)
+        + "</node></hierarchy>UI hierchary dumped to: /dev/tty\n"
+    ).encode()
+
+
+def parse_whole_document(data: bytes) -> IndexedHierarchy:
+    """Previous approach: wait for the full output, then parse and walk the whole tree."""
+    text = data.decode()
+    xml = text[text.find("<?xml") : text.find("</hierarchy>") + len("</hierarchy>")]
+    root = ElementTree.fromstring(xml)
+    return IndexedHierarchy([node_to_element(node.attrib) for node in root.iter("node")])
+
+
+def parse_streaming(data: bytes) -> IndexedHierarchy:
+    chunks = (data[i : i + UI_DUMP_CHUNK_SIZE] for i in range(0, len(data), UI_DUMP_CHUNK_SIZE))
+    return parse_ui_dump(chunks)
+
+
+def measure(parse: Callable[[bytes], IndexedHierarchy], data: bytes) -> tuple[float, float, int]:
+    """Returns the best duration (ms), the peak memory (KiB) and the number of elements."""
+    durations = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        hierarchy = parse(data)
+        durations.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    parse(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(durations), peak / 1024, len(hierarchy.elements)
+
+
+def main():
+    dumps = {"ui_dump.xml": UI_DUMP_PATH.read_bytes()}
+    for rows in SYNTHETIC_ROWS:
+        dumps[f"synthetic ({rows} rows)"] = build_synthetic_dump(rows)
+
+    print(
+        f"{'dump':<24}{'nodes':>8}{'size':>10}  {'whole (ms / KiB)':>20}  {'stream (ms / KiB)':>20}"
+    )
+    for name, data in dumps.items():
+        whole_ms, whole_kib, nodes = measure(parse_whole_document, data)
+        stream_ms, stream_kib, stream_nodes = measure(parse_streaming, data)
+        assert nodes == stream_nodes
+        print(
+            f"{name:<24}{nodes:>8}{len(data) // 1024:>8}KB"
+            f"  {whole_ms:>9.2f} / {whole_kib:>8.0f}  {stream_ms:>9.2f} / {stream_kib:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()